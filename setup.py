@@ -31,8 +31,9 @@ setuptools.setup(
     keywords="aws sfn service step functions states",
     packages=setuptools.find_packages(where="src"),
     package_dir={"": "src"},
-    python_requires="~=3.6",
+    python_requires="~=3.7",
     install_requires=["boto3"],
+    extras_require={"analytics": ["numpy"], "export": ["pyarrow"]},
     project_urls={
         "Documentation": "https://sfini.readthedocs.io/en/latest/",
         "Source": "https://github.com/EpicWink/sfini",
@@ -1,63 +1,107 @@
-"""AWS Step Functions service."""
+"""AWS Step Functions service.
 
-import pkg_resources
+Submodules and the public API are imported on first access, so
+importing ``sfini`` is fast.
+"""
 
-try:
-    __version__ = pkg_resources.get_distribution(__name__).version
-except pkg_resources.DistributionNotFound:  # pragma: no cover
-    __version__ = None
+import importlib
+import logging as lg
 
 __all__ = [
     "AWSSession",
     "Activity",
     "ActivityRegistration",
+    "LazyActivityRegistration",
     "CLI",
     "Lambda",
     "construct_state_machine",
     "Worker",
     "WorkerCancel"]
 
-from ._util import AWSSession
-from .activity import Activity
-from .activity import ActivityRegistration
-from ._cli import CLI
-from .task_resource import Lambda
-from .state_machine import construct_state_machine
-from .worker import Worker
-from .worker import WorkerCancel
-from .state import Succeed
-from .state import Fail
-from .state import Pass
-from .state import Wait
-from .state import Parallel
-from .state import Choice
-from .state import Task
-from .state.choice import And
-from .state.choice import Or
-from .state.choice import Not
-from .state.choice import BooleanEquals
-from .state.choice import NumericEquals
-from .state.choice import NumericGreaterThan
-from .state.choice import NumericGreaterThanEquals
-from .state.choice import NumericLessThan
-from .state.choice import NumericLessThanEquals
-from .state.choice import StringEquals
-from .state.choice import StringGreaterThan
-from .state.choice import StringGreaterThanEquals
-from .state.choice import StringLessThan
-from .state.choice import StringLessThanEquals
-from .state.choice import TimestampEquals
-from .state.choice import TimestampGreaterThan
-from .state.choice import TimestampGreaterThanEquals
-from .state.choice import TimestampLessThan
-from .state.choice import TimestampLessThanEquals
-
-from . import activity
-from . import execution
-from . import state
-from . import state_machine
-from . import task_resource
-from . import worker
+_submodules = {
+    "activity",
+    "emulator",
+    "execution",
+    "state",
+    "state_machine",
+    "task_resource",
+    "worker"}
+_attributes = {
+    "AWSSession": "._util",
+    "Activity": ".activity",
+    "ActivityRegistration": ".activity",
+    "LazyActivityRegistration": ".activity",
+    "CLI": "._cli",
+    "Lambda": ".task_resource",
+    "construct_state_machine": ".state_machine",
+    "Worker": ".worker",
+    "WorkerCancel": ".worker",
+    "Succeed": ".state",
+    "Fail": ".state",
+    "Pass": ".state",
+    "Wait": ".state",
+    "Parallel": ".state",
+    "Choice": ".state",
+    "Task": ".state",
+    "And": ".state.choice",
+    "Or": ".state.choice",
+    "Not": ".state.choice",
+    "BooleanEquals": ".state.choice",
+    "NumericEquals": ".state.choice",
+    "NumericGreaterThan": ".state.choice",
+    "NumericGreaterThanEquals": ".state.choice",
+    "NumericLessThan": ".state.choice",
+    "NumericLessThanEquals": ".state.choice",
+    "StringEquals": ".state.choice",
+    "StringGreaterThan": ".state.choice",
+    "StringGreaterThanEquals": ".state.choice",
+    "StringLessThan": ".state.choice",
+    "StringLessThanEquals": ".state.choice",
+    "TimestampEquals": ".state.choice",
+    "TimestampGreaterThan": ".state.choice",
+    "TimestampGreaterThanEquals": ".state.choice",
+    "TimestampLessThan": ".state.choice",
+    "TimestampLessThanEquals": ".state.choice"}
+
+
+def _get_version():
+    """Get installed ``sfini`` version.
+
+    Returns:
+        str: package version, or ``None`` if not installed
+    """
+
+    try:
+        from importlib import metadata
+    except ImportError:  # pragma: no cover
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution(__name__).version
+        except pkg_resources.DistributionNotFound:
+            return None
+    try:
+        return metadata.version(__name__)
+    except metadata.PackageNotFoundError:  # pragma: no cover
+        return None
+
+
+def __getattr__(name):
+    if name == "__version__":
+        value = _get_version()
+    elif name in _submodules:
+        value = importlib.import_module("." + name, __name__)
+    elif name in _attributes:
+        module = importlib.import_module(_attributes[name], __name__)
+        value = getattr(module, name)
+    else:
+        fmt = "module '%s' has no attribute '%s'"
+        raise AttributeError(fmt % (__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | _submodules | set(_attributes))
+
 
-import logging as lg
 lg.getLogger(__name__).addHandler(lg.NullHandler())
@@ -3,14 +3,51 @@
 Use in your ``__main__`` module to provide a CLI to your service.
 """
 
+import re
 import sys
 import json
 import pathlib
 import argparse
+import datetime
+import itertools
+import typing as T
 import logging as lg
+import functools as ft
 
 from . import _util
 from . import worker as sfini_worker
+from .execution import cache as sfini_cache
+from .execution import history as sfini_history
+
+_duration_units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_time_formats = ("%Y-%m-%d", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S")
+
+
+def _parse_since(value: str) -> datetime.datetime:
+    """Parse a command-line time, relative to now or absolute.
+
+    Args:
+        value: either a duration before now (eg '30m', '2h' or '1d'), or
+            a local time (eg '2019-07-01' or '2019-07-01T12:30')
+
+    Returns:
+        parsed time (time-zone aware)
+
+    Raises:
+        argparse.ArgumentTypeError: invalid time
+    """
+
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if match:
+        seconds = float(match.group(1)) * _duration_units[match.group(2)]
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        return now - datetime.timedelta(seconds=seconds)
+    for fmt in _time_formats:
+        try:
+            return datetime.datetime.strptime(value, fmt).astimezone()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError("Invalid time: '%s'" % value)
 
 
 class CLI:
@@ -112,6 +149,13 @@ class CLI:
                 "--activities-only",
                 action="store_true",
                 help="only register activities")
+        register_parser.add_argument(
+            "-j",
+            "--jobs",
+            default=10,
+            type=int,
+            metavar="N",
+            help="number of concurrent registration requests")
 
         deregister_parser = subparsers.add_parser(
             "deregister",
@@ -129,6 +173,13 @@ class CLI:
                 "--activities-only",
                 action="store_true",
                 help="only deregister activities")
+        deregister_parser.add_argument(
+            "-j",
+            "--jobs",
+            default=10,
+            type=int,
+            metavar="N",
+            help="number of concurrent deregistration requests")
 
         if self.state_machine:
             start_parser = subparsers.add_parser(
@@ -144,6 +195,31 @@ class CLI:
                 action="store_true",
                 help="wait for execution to finish, and print output")
 
+        if self.state_machine:
+            stop_parser = subparsers.add_parser(
+                "stop",
+                help="stop all running executions",
+                description="stop all running executions")
+            stop_parser.add_argument(
+                "-e",
+                "--error",
+                default=_util.DefaultParameter(),
+                metavar="CODE",
+                help="stop reason identification")
+            stop_parser.add_argument(
+                "-c",
+                "--cause",
+                default=_util.DefaultParameter(),
+                metavar="DETAILS",
+                help="stop reason")
+            stop_parser.add_argument(
+                "-j",
+                "--jobs",
+                default=10,
+                type=int,
+                metavar="N",
+                help="number of concurrent stop requests")
+
         if self.activities:
             worker_parser = subparsers.add_parser(
                 "worker",
@@ -168,58 +244,90 @@ class CLI:
                 metavar="STATUS",
                 choices=choices,
                 help="only list executions with this status")
+            executions_parser.add_argument(
+                "--cache",
+                default=None,
+                metavar="PATH",
+                help="cache finished executions in this SQLite database")
+            _g = executions_parser.add_mutually_exclusive_group()
+            _g.add_argument(
+                "-f",
+                "--follow",
+                action="store_true",
+                help="print history events as they occur, until finished")
+            _g.add_argument(
+                "--summary",
+                action="store_true",
+                help="only print each execution's final event")
+            executions_parser.add_argument(
+                "-j",
+                "--jobs",
+                default=1,
+                type=int,
+                metavar="N",
+                help="number of histories to fetch concurrently")
+            executions_parser.add_argument(
+                "-n",
+                "--limit",
+                default=None,
+                type=int,
+                metavar="N",
+                help="only list the N most recent executions")
+            executions_parser.add_argument(
+                "--since",
+                default=None,
+                type=_parse_since,
+                metavar="TIME",
+                help=(
+                    "only list executions started since TIME: a duration "
+                    "ago (eg '2h', '1d') or local time (eg '2019-07-01')"))
 
         return parser
 
+    @staticmethod
+    def _run_concurrently(fns: T.List[T.Callable[[], None]]):
+        """Call functions concurrently, re-raising any error."""
+        list(_util.map_concurrent(lambda fn: fn(), fns, max_workers=2))
+
     def _register(self, args: argparse.Namespace):
         """Register state-machine and/or activities.
 
+        The state-machine and the activities are registered concurrently.
+
         Args:
             args: parsed command-line arguments
         """
 
-        if self.state_machine and self.activities:
-            if args.state_machine_only:
-                self.state_machine.register(
-                    self.role_arn,
-                    allow_update=args.allow_update)
-            elif args.activities_only:
-                self.activities.register()
-            else:
-                self.state_machine.register(
-                    self.role_arn,
-                    allow_update=args.allow_update)
-                self.activities.register()
-        elif self.state_machine:
-            if not args.activities_only:
-                self.state_machine.register(
-                    self.role_arn,
-                    allow_update=args.allow_update)
-        elif self.activities:
-            if not args.state_machine_only:
-                self.activities.register()
+        fns = []
+        if self.state_machine and not getattr(args, "activities_only", False):
+            fns.append(ft.partial(
+                self.state_machine.register,
+                self.role_arn,
+                allow_update=args.allow_update))
+        if self.activities and not getattr(args, "state_machine_only", False):
+            fns.append(ft.partial(
+                self.activities.register,
+                concurrency=args.jobs))
+        self._run_concurrently(fns)
 
     def _deregister(self, args: argparse.Namespace):
         """Deregister state-machine and/or activities.
 
+        The state-machine and the activities are deregistered
+        concurrently.
+
         Args:
             args: parsed command-line arguments
         """
 
-        if self.state_machine and self.activities:
-            if args.state_machine_only:
-                self.state_machine.deregister()
-            elif args.activities_only:
-                self.activities.deregister()
-            else:
-                self.state_machine.deregister()
-                self.activities.deregister()
-        elif self.state_machine:
-            if not args.activities_only:
-                self.state_machine.deregister()
-        elif self.activities:
-            if not args.state_machine_only:
-                self.activities.deregister()
+        fns = []
+        if self.state_machine and not getattr(args, "activities_only", False):
+            fns.append(self.state_machine.deregister)
+        if self.activities and not getattr(args, "state_machine_only", False):
+            fns.append(ft.partial(
+                self.activities.deregister,
+                concurrency=args.jobs))
+        self._run_concurrently(fns)
 
     def _start(self, args: argparse.Namespace):
         """Start a state-machine execution.
@@ -239,6 +347,23 @@ class CLI:
             execution.wait()
             print(execution.output)
 
+    def _stop(self, args: argparse.Namespace):
+        """Stop all running state-machine executions.
+
+        Args:
+            args: parsed command-line arguments
+        """
+
+        def _report(execution):
+            print("Stopped execution '%s'" % execution)
+
+        execs = self.state_machine.stop_executions(
+            error_code=args.error,
+            details=args.cause,
+            concurrency=args.jobs,
+            callback=_report)
+        print("Stopped %d executions" % len(execs))
+
     def _worker(self, args: argparse.Namespace):
         """Run an activity worker.
 
@@ -257,10 +382,33 @@ class CLI:
             args: parsed command-line arguments
         """
 
-        execs = self.state_machine.list_executions(status=args.status)
-        for execution in execs:
+        if args.cache:
+            cache = sfini_cache.ExecutionCache(args.cache)
+            self.state_machine.session.execution_cache = cache
+        execs = self.state_machine.iter_executions(status=args.status)
+        if args.since is not None:
+            execs = itertools.takewhile(
+                lambda e: e.start_date >= args.since,
+                execs)
+        if args.limit is not None:
+            execs = itertools.islice(execs, args.limit)
+
+        if args.follow:
+            for execution in execs:
+                print("\nExecution '%s':" % execution)
+                for event in execution.follow():
+                    print(sfini_history.format_event(event), flush=True)
+            return
+
+        def _format(execution):
+            if args.summary:
+                return execution, execution.format_summary()
+            return execution, execution.format_history()
+
+        formatted = _util.map_concurrent(_format, execs, args.jobs)
+        for execution, execution_str in formatted:
             print("\nExecution '%s':" % execution)
-            print(execution.format_history())
+            print(execution_str)
 
     def _delegate(self, args: argparse.Namespace):
         """Execute command.
@@ -272,10 +420,17 @@ class CLI:
         _lvl = max(lg.WARNING - 10 * (args.verbose - args.quiet), lg.DEBUG)
         _util.setup_logging(level=_lvl)
 
+        jobs = getattr(args, "jobs", None)
+        if jobs is not None:
+            for sfini_object in (self.state_machine, self.activities):
+                if sfini_object:
+                    sfini_object.session.reserve_connections(jobs)
+
         command = {
             "register": self._register,
             "deregister": self._deregister,
             "start": self._start,
+            "stop": self._stop,
             "worker": self._worker,
             "executions": self._executions}
         command[args.command](args)
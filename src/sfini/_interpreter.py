@@ -0,0 +1,914 @@
+"""Local interpretation of state-machine definitions.
+
+Runs a state-machine definition (as sent to AWS Step Functions)
+in-process, recording history events in the same format as the AWS
+API. Task execution is provided by subclasses.
+"""
+
+import re
+import json
+import bisect
+import datetime
+import operator
+import threading
+import traceback
+import typing as T
+import logging as lg
+
+from . import _util
+from . import _jsonpath
+from .execution import history
+
+_logger = lg.getLogger(__name__)
+_offset_pattern = re.compile(r"([+-]\d\d):(\d\d)$")
+_min_table_size = 3
+_comparisons = {
+    "Equals": operator.eq,
+    "GreaterThan": operator.gt,
+    "GreaterThanEquals": operator.ge,
+    "LessThan": operator.lt,
+    "LessThanEquals": operator.le}
+
+
+class StatesError(Exception):
+    """State-machine execution error.
+
+    Args:
+        error: error code, eg 'States.Timeout'
+        cause: error details
+
+    Attributes:
+        event_id: identifying index of the history event recording the
+            error, if recorded
+    """
+
+    def __init__(self, error: str, cause: str = None):
+        super().__init__(error, cause)
+        self.error = error
+        self.cause = cause
+        self.event_id: T.Union[int, None] = None
+
+    def __str__(self):
+        return str(self.error) if self.cause is None else (
+            "%s: %s" % (self.error, self.cause))
+
+
+class ExecutionAborted(StatesError):
+    """Execution was stopped."""
+    pass
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    """Parse an ISO 8601 time-stamp.
+
+    Args:
+        value: time-stamp, with time-zone offset or 'Z'
+
+    Returns:
+        aware time
+
+    Raises:
+        ValueError: invalid or naive time-stamp
+    """
+
+    value_ = _offset_pattern.sub(r"\1\2", value.replace("Z", "+0000"))
+    for fmt in ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z"):
+        try:
+            return datetime.datetime.strptime(value_, fmt)
+        except ValueError:
+            pass
+    raise ValueError("Invalid time-stamp: %s" % value)
+
+
+def _compile_test(
+        comparison: str,
+        comparison_value
+) -> T.Callable[[_util.JSONable], bool]:
+    """Compile a comparison choice-rule's operator.
+
+    Args:
+        comparison: comparison operator, eg 'NumericEquals'
+        comparison_value: value to compare against
+
+    Returns:
+        value test, ``False`` for values of the wrong type
+    """
+
+    if comparison == "BooleanEquals":
+        return lambda v: isinstance(v, bool) and v == comparison_value
+    if comparison.startswith("Numeric"):
+        compare = _comparisons[comparison[7:]]
+        return lambda v: (
+            isinstance(v, (int, float)) and not isinstance(v, bool) and
+            compare(v, comparison_value))
+    if comparison.startswith("String"):
+        compare = _comparisons[comparison[6:]]
+        return lambda v: isinstance(v, str) and compare(v, comparison_value)
+
+    compare = _comparisons[comparison[9:]]
+    comparison_time = parse_timestamp(comparison_value)
+
+    def test(value):
+        if not isinstance(value, str):
+            return False
+        try:
+            value_ = parse_timestamp(value)
+        except ValueError:
+            return False
+        return compare(value_, comparison_time)
+    return test
+
+
+def compile_rule(
+        rule: T.Dict[str, _util.JSONable]
+) -> T.Callable[[_util.JSONable], bool]:
+    """Compile a choice-rule definition into a predicate.
+
+    Variable paths are parsed and comparison time-stamps are parsed once,
+    here, rather than on each evaluation.
+
+    Args:
+        rule: choice-rule definition
+
+    Returns:
+        predicate on state input, true if rule matched
+
+    Raises:
+        sfini._jsonpath.PathError: invalid variable path
+        ValueError: invalid comparison time-stamp
+    """
+
+    if "And" in rule:
+        predicates = [compile_rule(r) for r in rule["And"]]
+        return lambda data: all(p(data) for p in predicates)
+    if "Or" in rule:
+        predicates = [compile_rule(r) for r in rule["Or"]]
+        return lambda data: any(p(data) for p in predicates)
+    if "Not" in rule:
+        negated = compile_rule(rule["Not"])
+        return lambda data: not negated(data)
+
+    comparison, = (k for k in rule if k not in ("Variable", "Next"))
+    get = _jsonpath.getter(rule["Variable"])
+    test = _compile_test(comparison, rule[comparison])
+
+    def predicate(data):
+        try:
+            value = get(data)
+        except _jsonpath.PathError:
+            return False
+        return test(value)
+    return predicate
+
+
+def _table_key(rule: T.Dict[str, _util.JSONable]) -> T.Union[tuple, None]:
+    """Get a choice-rule's decision-table grouping.
+
+    Args:
+        rule: choice-rule definition
+
+    Returns:
+        variable path, comparison kind ('Numeric' or 'String') and
+            comparison operator, or ``None`` if rule can't be tabulated
+    """
+
+    if "Variable" not in rule:
+        return None
+    comparison, = (k for k in rule if k not in ("Variable", "Next"))
+    for kind in ("Numeric", "String"):
+        if comparison.startswith(kind):
+            return rule["Variable"], kind, comparison[len(kind):]
+    return None
+
+
+def _group_rules(
+        rules: T.List[T.Dict[str, _util.JSONable]]
+) -> T.List[T.Tuple[T.Union[tuple, None], T.List[int]]]:
+    """Group consecutive choice-rules with the same decision-table key.
+
+    Args:
+        rules: choice-rule definitions
+
+    Returns:
+        grouping key (see ``_table_key``) and indices of rules in group
+    """
+
+    groups = []
+    for j, rule in enumerate(rules):
+        key = _table_key(rule)
+        if key is not None and groups and groups[-1][0] == key:
+            groups[-1][1].append(j)
+        else:
+            groups.append((key, [j]))
+    return groups
+
+
+def _compile_table(
+        key: tuple,
+        rules: T.List[T.Dict[str, _util.JSONable]]
+) -> T.Callable[[_util.JSONable], T.Union[str, None]]:
+    """Compile same-variable, same-operator choice-rules to a table.
+
+    Equality rules become a hash lookup, and range rules a bisection of
+    the sorted comparison values, while keeping first-match semantics.
+
+    Args:
+        key: rules' grouping key (see ``_table_key``)
+        rules: choice-rule definitions, in order
+
+    Returns:
+        function of state input returning the name of the next state of
+            the first matching rule, or ``None`` if no rule matched
+    """
+
+    variable, kind, op = key
+    comparison = kind + op
+    get = _jsonpath.getter(variable)
+    if kind == "Numeric":
+        def is_kind(v):
+            return isinstance(v, (int, float)) and not isinstance(v, bool)
+    else:
+        def is_kind(v):
+            return isinstance(v, str)
+
+    if op == "Equals":
+        table = {}
+        for rule in rules:
+            table.setdefault(rule[comparison], rule["Next"])
+        lookup = table.get
+    else:
+        entries = sorted(
+            (r[comparison], j, r["Next"]) for j, r in enumerate(rules))
+        thresholds = [e[0] for e in entries]
+        is_upper = op.startswith("LessThan")
+        strict_right = op in ("LessThan", "GreaterThanEquals")
+        find = bisect.bisect_right if strict_right else bisect.bisect_left
+
+        # first-matching rule among thresholds above (or below) each index
+        firsts = []
+        first = None
+        for _, j, next_name in entries[::-1] if is_upper else entries:
+            if first is None or j < first[0]:
+                first = (j, next_name)
+            firsts.append(first[1])
+        if is_upper:
+            firsts.reverse()
+
+        def lookup(value):
+            k = find(thresholds, value)
+            if is_upper:
+                return firsts[k] if k < len(firsts) else None
+            return firsts[k - 1] if k > 0 else None
+
+    def choose(data):
+        try:
+            value = get(data)
+        except _jsonpath.PathError:
+            return None
+        return lookup(value) if is_kind(value) else None
+    return choose
+
+
+def compile_choices(
+        state_defn: T.Dict[str, _util.JSONable]
+) -> T.Callable[[_util.JSONable], T.Union[str, None]]:
+    """Compile a 'Choice' state definition's rules.
+
+    Runs of consecutive numeric or string comparisons with the same
+    variable and operator are compiled to decision tables, so evaluation
+    cost doesn't grow with the number of rules in the run.
+
+    Args:
+        state_defn: 'Choice' state definition
+
+    Returns:
+        function of state input returning the name of the next state, or
+            ``None`` if no rule matched and there is no default
+    """
+
+    rules = state_defn["Choices"]
+    branches = []
+    for key, indices in _group_rules(rules):
+        group = [rules[j] for j in indices]
+        if key is not None and len(group) >= _min_table_size:
+            branches.append(_compile_table(key, group))
+            continue
+        for rule in group:
+            predicate = compile_rule(rule)
+            branches.append(
+                lambda d, p=predicate, n=rule["Next"]: n if p(d) else None)
+    default = state_defn.get("Default")
+
+    def choose(data):
+        for branch in branches:
+            next_name = branch(data)
+            if next_name is not None:
+                return next_name
+        return default
+    return choose
+
+
+def find_shadowed_rules(
+        state_defn: T.Dict[str, _util.JSONable]
+) -> T.List[T.Tuple[int, int]]:
+    """Find unreachable rules of a 'Choice' state definition.
+
+    Only consecutive numeric and string comparisons with the same
+    variable and operator are checked: a rule is unreachable if an
+    earlier rule matches all of its values.
+
+    Args:
+        state_defn: 'Choice' state definition
+
+    Returns:
+        indices of unreachable rules, each with the index of the earlier
+            rule which shadows it
+    """
+
+    rules = state_defn["Choices"]
+    shadowed = []
+    for key, indices in _group_rules(rules):
+        if key is None:
+            continue
+        comparison = key[1] + key[2]
+        op = key[2]
+        seen = {}
+        bound = None
+        for j in indices:
+            value = rules[j][comparison]
+            if op == "Equals":
+                if value in seen:
+                    shadowed.append((j, seen[value]))
+                else:
+                    seen[value] = j
+                continue
+            is_upper = op.startswith("LessThan")
+            if bound is not None and (
+                    value <= bound[0] if is_upper else value >= bound[0]):
+                shadowed.append((j, bound[1]))
+            elif bound is None or (
+                    value > bound[0] if is_upper else value < bound[0]):
+                bound = (value, j)
+    return shadowed
+
+
+def evaluate_rule(rule: T.Dict[str, _util.JSONable], data) -> bool:
+    """Evaluate a choice-rule definition.
+
+    Args:
+        rule: choice-rule definition
+        data: state input
+
+    Returns:
+        if rule matched
+    """
+
+    return compile_rule(rule)(data)
+
+
+def _error_matches(error: str, error_equals: T.List[str]) -> bool:
+    """Check if an error matches a retrier or catcher.
+
+    ``States.Runtime`` errors can't be retried or caught.
+    """
+
+    if error == "States.Runtime":
+        return False
+    if "States.ALL" in error_equals or error in error_equals:
+        return True
+    task_failed = error != "States.Timeout"
+    return task_failed and "States.TaskFailed" in error_equals
+
+
+class Interpreter:
+    """Local state-machine definition interpreter.
+
+    Each run is recorded as history events, in the format provided by
+    the AWS API, in ``history``. Runs are stopped after the definition's
+    time-out, if any. Branches of 'Parallel' states are run in
+    threads; when a branch fails, the other branches are run to
+    completion before the failure is handled. Call ``abort`` from another
+    thread to stop a run.
+
+    Args:
+        definition: state-machine definition
+        time_scale: multiplier of wait and retry times, eg ``0.0`` to
+            not wait at all
+
+    Attributes:
+        history: recorded history events
+    """
+
+    def __init__(
+            self,
+            definition: T.Dict[str, _util.JSONable],
+            time_scale: float = 1.0):
+        self.definition = definition
+        self.time_scale = time_scale
+        self.history: T.List[T.Dict[str, _util.JSONable]] = []
+        self._lock = threading.Lock()
+        self._aborted = threading.Event()
+        self._abort_details: T.Dict[str, str] = {}
+        self._timed_out = False
+        self._started_event_ids: T.Dict[int, int] = {}
+        self._choosers: T.Dict[int, T.Callable] = {}
+
+    def __str__(self):
+        return "interpreter of %d states" % len(self.definition["States"])
+
+    __repr__ = _util.easy_repr
+
+    @property
+    def aborted(self) -> bool:
+        """Run has been aborted."""
+        return self._aborted.is_set()
+
+    def record(
+            self,
+            event_type: str,
+            previous_event_id: T.Union[int, None],
+            details: T.Dict[str, _util.JSONable] = None
+    ) -> int:
+        """Record an history event.
+
+        Args:
+            event_type: type of event
+            previous_event_id: identifying index of causal event
+            details: event details
+
+        Returns:
+            identifying index of recorded event
+        """
+
+        with self._lock:
+            event = {
+                "timestamp": datetime.datetime.now(tz=datetime.timezone.utc),
+                "type": event_type,
+                "id": len(self.history) + 1}
+            if previous_event_id is not None:
+                event["previousEventId"] = previous_event_id
+            details_key = history._type_keys.get(event_type)
+            if details is not None and details_key is not None:
+                event[details_key] = details
+            self.history.append(event)
+            return event["id"]
+
+    def abort(self, error: str = None, cause: str = None):
+        """Stop the run, interrupting waits.
+
+        Args:
+            error: error code for abortion
+            cause: abortion details
+        """
+
+        if error is not None:
+            self._abort_details["error"] = error
+        if cause is not None:
+            self._abort_details["cause"] = cause
+        self._aborted.set()
+
+    def _time_out(self):
+        """Stop the run due to execution time-out."""
+        self._timed_out = True
+        self._aborted.set()
+
+    def sleep(self, seconds: float):
+        """Wait, scaled by ``time_scale``.
+
+        Args:
+            seconds: time to wait
+
+        Raises:
+            ExecutionAborted: run was aborted while waiting
+        """
+
+        if self._aborted.wait(max(seconds * self.time_scale, 0.0)):
+            raise ExecutionAborted("States.Aborted")
+
+    def task_started(self, scheduled_event_id: int, worker_name: str):
+        """Record a task being started.
+
+        Args:
+            scheduled_event_id: identifying index of task-schedule event
+            worker_name: name of worker running task
+        """
+
+        event_id = self.record(
+            self._task_event_prefix(scheduled_event_id) + "Started",
+            scheduled_event_id,
+            {"workerName": worker_name})
+        self._started_event_ids[scheduled_event_id] = event_id
+
+    def _task_event_prefix(self, scheduled_event_id: int) -> str:
+        """Get type-prefix of a task's events, eg 'Activity'."""
+        event_type = self.history[scheduled_event_id - 1]["type"]
+        return event_type[:-len("Scheduled")]
+
+    def run_task(
+            self,
+            resource: str,
+            task_input: _util.JSONable,
+            timeout: T.Union[int, None],
+            heartbeat: T.Union[int, None],
+            scheduled_event_id: int
+    ) -> _util.JSONable:
+        """Run a task.
+
+        Implementations should call ``task_started`` when the task is
+        started.
+
+        Args:
+            resource: task resource ARN
+            task_input: task input
+            timeout: task time-out (seconds)
+            heartbeat: task heartbeat time-out (seconds)
+            scheduled_event_id: identifying index of task-schedule event
+
+        Returns:
+            task output
+
+        Raises:
+            StatesError: task failed
+        """
+
+        raise NotImplementedError
+
+    @staticmethod
+    def _apply_input_path(state_defn, data):
+        """Filter state input."""
+        path = state_defn.get("InputPath", "$")
+        return {} if path is None else _jsonpath.get(data, path)
+
+    @staticmethod
+    def _apply_result_path(state_defn, data, result, key="ResultPath"):
+        """Insert state result into state input."""
+        path = state_defn.get(key, "$")
+        if path is None:
+            return data
+        try:
+            return _jsonpath.put(data, path, result)
+        except _jsonpath.PathError as e:
+            raise StatesError("States.ResultPathMatchFailure", str(e))
+
+    @staticmethod
+    def _apply_output_path(state_defn, data):
+        """Filter state output."""
+        path = state_defn.get("OutputPath", "$")
+        return {} if path is None else _jsonpath.get(data, path)
+
+    def _run_task_state(self, state_defn, data, previous_event_id):
+        """Run a task state's task, recording its events.
+
+        Returns:
+            task output, and identifying index of last event
+        """
+
+        resource = state_defn["Resource"]
+        prefix = "Activity" if ":activity:" in resource else "LambdaFunction"
+        details = {"resource": resource, "input": json.dumps(data)}
+        timeout = state_defn.get("TimeoutSeconds")
+        heartbeat = state_defn.get("HeartbeatSeconds")
+        if timeout is not None:
+            details["timeoutInSeconds"] = timeout
+        if heartbeat is not None:
+            details["heartbeatInSeconds"] = heartbeat
+        scheduled_id = self.record(
+            prefix + "Scheduled",
+            previous_event_id,
+            details)
+        try:
+            output = self.run_task(
+                resource,
+                data,
+                timeout,
+                heartbeat,
+                scheduled_id)
+        except ExecutionAborted:
+            raise
+        except StatesError as e:
+            event_type = "TimedOut" if e.error == "States.Timeout" else (
+                "Failed")
+            details = {"error": e.error}
+            if e.cause is not None:
+                details["cause"] = e.cause
+            e.event_id = self.record(
+                prefix + event_type,
+                self._started_event_ids.get(scheduled_id, scheduled_id),
+                details)
+            raise
+        event_id = self.record(
+            prefix + "Succeeded",
+            self._started_event_ids.get(scheduled_id, scheduled_id),
+            {"output": json.dumps(output)})
+        return output, event_id
+
+    def _run_parallel_state(self, state_defn, data, previous_event_id):
+        """Run a parallel state's branches in threads.
+
+        Returns:
+            branches' outputs, and identifying index of last event
+        """
+
+        started_id = self.record("ParallelStateStarted", previous_event_id)
+        branches = state_defn["Branches"]
+        results = [None] * len(branches)
+        errors = [None] * len(branches)
+
+        def run_branch(j):
+            try:
+                results[j] = self._run_states(branches[j], data, started_id)
+            except StatesError as e:
+                errors[j] = e
+            except Exception as e:
+                _logger.exception("Branch %d failed unexpectedly" % j)
+                errors[j] = StatesError("States.Runtime", repr(e))
+
+        threads = [
+            threading.Thread(target=run_branch, args=(j,))
+            for j in range(len(branches))]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        error = next((e for e in errors if e is not None), None)
+        if error is not None:
+            details = {"error": error.error}
+            if error.cause is not None:
+                details["cause"] = error.cause
+            error.event_id = self.record(
+                "ParallelStateFailed",
+                error.event_id or started_id,
+                details)
+            raise error
+        last_id = max(event_id for _, event_id in results)
+        event_id = self.record("ParallelStateSucceeded", last_id)
+        return [output for output, _ in results], event_id
+
+    def _run_with_retries(self, state_defn, data, previous_event_id):
+        """Run a task or parallel state's work, retrying on failure.
+
+        Returns:
+            work result, and identifying index of last event
+        """
+
+        run = self._run_task_state if state_defn["Type"] == "Task" else (
+            self._run_parallel_state)
+        attempts = [0] * len(state_defn.get("Retry", []))
+        while True:
+            try:
+                return run(state_defn, data, previous_event_id)
+            except ExecutionAborted:
+                raise
+            except StatesError as e:
+                for j, retrier in enumerate(state_defn.get("Retry", [])):
+                    if _error_matches(e.error, retrier["ErrorEquals"]):
+                        break
+                else:
+                    raise
+                if attempts[j] >= retrier.get("MaxAttempts", 3):
+                    raise
+                interval = retrier.get("IntervalSeconds", 1)
+                backoff = retrier.get("BackoffRate", 2.0)
+                self.sleep(interval * backoff ** attempts[j])
+                attempts[j] += 1
+                previous_event_id = e.event_id or previous_event_id
+
+    def _get_choose(self, state_defn):
+        """Get a 'Choice' state's compiled rules, compiling on first use."""
+        key = id(state_defn)
+        if key not in self._choosers:
+            self._choosers[key] = compile_choices(state_defn)
+        return self._choosers[key]
+
+    def _wait_seconds(self, state_defn, data) -> float:
+        """Get time to wait in a wait state.
+
+        Raises:
+            StatesError: wait time path doesn't match input, or isn't a
+                number or timestamp
+        """
+
+        try:
+            if "Seconds" in state_defn:
+                return state_defn["Seconds"]
+            if "SecondsPath" in state_defn:
+                seconds = _jsonpath.get(data, state_defn["SecondsPath"])
+                if isinstance(seconds, bool) or not isinstance(
+                        seconds, (int, float)):
+                    raise ValueError("Invalid wait seconds: %r" % seconds)
+                return seconds
+            if "Timestamp" in state_defn:
+                until = parse_timestamp(state_defn["Timestamp"])
+            else:
+                until = parse_timestamp(
+                    _jsonpath.get(data, state_defn["TimestampPath"]))
+        except (_jsonpath.PathError, ValueError, TypeError) as e:
+            raise StatesError("States.Runtime", str(e))
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        return (until - now).total_seconds()
+
+    def _run_state(self, name, state_defn, data, previous_event_id):
+        """Run a state.
+
+        Args:
+            name: state name
+            state_defn: state definition
+            data: state input
+            previous_event_id: identifying index of causal event
+
+        Returns:
+            state output, name of next state (``None`` if execution or
+                branch finished), and identifying index of last event
+
+        Raises:
+            StatesError: unhandled state failure
+        """
+
+        if self.aborted:
+            raise ExecutionAborted("States.Aborted")
+        state_type = state_defn["Type"]
+        entered_id = self.record(
+            state_type + "StateEntered",
+            previous_event_id,
+            {"name": name, "input": json.dumps(data)})
+        last_id = entered_id
+        next_name = state_defn.get("Next")
+
+        try:
+            effective_input = self._apply_input_path(state_defn, data)
+        except _jsonpath.PathError as e:
+            raise StatesError("States.Runtime", str(e))
+
+        if state_type == "Fail":
+            details = {}
+            for key in ("Error", "Cause"):
+                if key in state_defn:
+                    details[key.lower()] = state_defn[key]
+            error = StatesError(details.get("error"), details.get("cause"))
+            error.event_id = entered_id
+            raise error
+
+        if state_type == "Choice":
+            next_name = self._get_choose(state_defn)(effective_input)
+            if next_name is None:
+                raise StatesError(
+                    "States.NoChoiceMatched",
+                    "No choice rule matched in state '%s'" % name)
+            result = effective_input
+        elif state_type == "Wait":
+            self.sleep(self._wait_seconds(state_defn, effective_input))
+            result = effective_input
+        elif state_type == "Pass":
+            result = state_defn.get("Result", effective_input)
+            result = self._apply_result_path(state_defn, data, result)
+        elif state_type in ("Task", "Parallel"):
+            try:
+                result, last_id = self._run_with_retries(
+                    state_defn,
+                    effective_input,
+                    entered_id)
+            except ExecutionAborted:
+                raise
+            except StatesError as e:
+                for catcher in state_defn.get("Catch", []):
+                    if _error_matches(e.error, catcher["ErrorEquals"]):
+                        break
+                else:
+                    raise
+                error_output = {"Error": e.error, "Cause": e.cause}
+                result = self._apply_result_path(
+                    catcher,
+                    data,
+                    error_output)
+                next_name = catcher["Next"]
+                last_id = e.event_id or last_id
+            else:
+                result = self._apply_result_path(state_defn, data, result)
+        else:  # Succeed
+            result = effective_input
+
+        try:
+            output = self._apply_output_path(state_defn, result)
+        except _jsonpath.PathError as e:
+            raise StatesError("States.Runtime", str(e))
+        exited_id = self.record(
+            state_type + "StateExited",
+            last_id,
+            {"name": name, "output": json.dumps(output)})
+        return output, next_name, exited_id
+
+    def _run_states(self, definition, data, previous_event_id):
+        """Run a state-machine or branch definition.
+
+        Returns:
+            output, and identifying index of last event
+
+        Raises:
+            StatesError: unhandled state failure
+        """
+
+        name = definition["StartAt"]
+        event_id = previous_event_id
+        while name is not None:
+            state_defn = definition["States"][name]
+            data, name, event_id = self._run_state(
+                name,
+                state_defn,
+                data,
+                event_id)
+        return data, event_id
+
+    def run(self, execution_input: _util.JSONable) -> _util.JSONable:
+        """Run the state-machine definition.
+
+        Args:
+            execution_input: execution input
+
+        Returns:
+            execution output
+
+        Raises:
+            StatesError: execution failed or was aborted
+        """
+
+        _logger.debug("Running %s" % self)
+        started_id = self.record(
+            "ExecutionStarted",
+            None,
+            {"input": json.dumps(execution_input)})
+        timer = None
+        if "TimeoutSeconds" in self.definition:
+            timer = threading.Timer(
+                self.definition["TimeoutSeconds"],
+                self._time_out)
+            timer.daemon = True
+            timer.start()
+        try:
+            output, event_id = self._run_states(
+                self.definition,
+                execution_input,
+                started_id)
+        except ExecutionAborted:
+            if self._timed_out:
+                self.record(
+                    "ExecutionTimedOut",
+                    None,
+                    {"error": "States.Timeout"})
+                raise StatesError("States.Timeout") from None
+            self.record("ExecutionAborted", None, self._abort_details)
+            raise
+        except StatesError as e:
+            details = {}
+            if e.error is not None:
+                details["error"] = e.error
+            if e.cause is not None:
+                details["cause"] = e.cause
+            self.record(
+                "ExecutionFailed",
+                e.event_id,
+                details)
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+        self.record(
+            "ExecutionSucceeded",
+            event_id,
+            {"output": json.dumps(output)})
+        return output
+
+
+class LocalInterpreter(Interpreter):
+    """Definition interpreter calling activities in-process.
+
+    Task time-outs and heartbeats are not enforced.
+
+    Args:
+        definition: state-machine definition
+        activities (dict[str, sfini.activity.CallableActivity]): task
+            activities, by ARN
+        time_scale: multiplier of wait and retry times
+    """
+
+    def __init__(
+            self,
+            definition: T.Dict[str, _util.JSONable],
+            activities,
+            time_scale: float = 1.0):
+        super().__init__(definition, time_scale=time_scale)
+        self.activities = activities
+
+    def run_task(
+            self,
+            resource,
+            task_input,
+            timeout,
+            heartbeat,
+            scheduled_event_id):
+        if resource not in self.activities:
+            msg = "Task resource '%s' can't be run locally" % resource
+            raise StatesError("States.Runtime", msg)
+        self.task_started(scheduled_event_id, "local")
+        try:
+            return self.activities[resource].call_with(task_input)
+        except Exception as e:
+            tb = traceback.format_exception(type(e), e, e.__traceback__)
+            raise StatesError(type(e).__name__, "".join(tb))
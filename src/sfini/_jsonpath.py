@@ -0,0 +1,194 @@
+"""Reference-path evaluation, for local state data-flow.
+
+Supports the Step Functions reference-path subset of JSONPath: the root
+``$``, dot-notation field names, and bracketed field names and array
+indices (eg ``$.spam['eggs'][0]``). Paths are compiled once into getters
+and setters, which are cached.
+"""
+
+import re
+import typing as T
+import functools as ft
+
+from . import _util
+
+_cache_size = 1024
+_token_pattern = re.compile(
+    r"\.([^.\[\]]+)|\['([^']*)'\]|\[\"([^\"]*)\"\]|\[(-?\d+)\]")
+
+
+class PathError(ValueError):
+    """Path is invalid or doesn't match the data."""
+    pass
+
+
+def parse(path: str) -> T.List[T.Union[str, int]]:
+    """Parse a reference path.
+
+    Args:
+        path: reference path, starting with '$'
+
+    Returns:
+        path components: field names and array indices
+
+    Raises:
+        PathError: invalid path
+    """
+
+    if not path.startswith("$"):
+        raise PathError("Path must start with '$': %s" % path)
+    components = []
+    position = 1
+    while position < len(path):
+        match = _token_pattern.match(path, position)
+        if match is None:
+            raise PathError("Invalid path '%s' at %d" % (path, position))
+        field, quoted, double_quoted, index = match.groups()
+        if index is not None:
+            components.append(int(index))
+        else:
+            components.append(next(
+                c for c in (field, quoted, double_quoted) if c is not None))
+        position = match.end()
+    return components
+
+
+def validate(path: str, reference: bool = True):
+    """Validate a path.
+
+    Args:
+        path: path to validate
+        reference: path must be a reference path, otherwise only check
+            the path is a JSONPath rooted at '$' (Step Functions allows
+            general JSONPath for input, output and choice-variable paths)
+
+    Raises:
+        PathError: invalid path
+    """
+
+    if reference:
+        getter(path)
+    elif not path.startswith("$"):
+        raise PathError("Path must start with '$': %s" % path)
+
+
+@ft.lru_cache(maxsize=_cache_size)
+def getter(path: str) -> T.Callable[[_util.JSONable], _util.JSONable]:
+    """Compile a reference path into a value getter.
+
+    Args:
+        path: reference path
+
+    Returns:
+        function getting the value at the path from data, raising
+            ``PathError`` when the path doesn't match the data
+
+    Raises:
+        PathError: invalid path
+    """
+
+    components = tuple(parse(path))
+
+    def get_(data):
+        value = data
+        for component in components:
+            try:
+                if isinstance(component, int) != isinstance(value, list):
+                    raise TypeError
+                value = value[component]
+            except (KeyError, IndexError, TypeError):
+                msg = "Path '%s' not found in data" % path
+                raise PathError(msg) from None
+        return value
+    return get_
+
+
+def get(data: _util.JSONable, path: str) -> _util.JSONable:
+    """Get the value at a reference path.
+
+    Args:
+        data: data to get value from
+        path: reference path
+
+    Returns:
+        value at path
+
+    Raises:
+        PathError: path doesn't match data
+    """
+
+    return getter(path)(data)
+
+
+@ft.lru_cache(maxsize=_cache_size)
+def setter(
+        path: str
+) -> T.Callable[[_util.JSONable, _util.JSONable], _util.JSONable]:
+    """Compile a reference path into a value setter.
+
+    Setting is copy-on-write: only the objects and arrays along the path
+    are (shallow) copied, and the input data is not modified.
+
+    Args:
+        path: reference path
+
+    Returns:
+        function of data and value, returning updated data with the value
+            at the path and creating missing objects, raising
+            ``PathError`` when the path doesn't match the data
+
+    Raises:
+        PathError: invalid path
+    """
+
+    components = tuple(parse(path))
+
+    def set_in(container, j, value):
+        component = components[j]
+        if isinstance(component, int):
+            if not isinstance(container, list):
+                raise PathError("Path '%s' not found in data" % path)
+            try:
+                child = container[component]
+            except IndexError:
+                raise PathError("Path '%s' not found in data" % path) from None
+            updated = list(container)
+        else:
+            if not isinstance(container, dict):
+                raise PathError("Path '%s' not found in data" % path)
+            child = container.get(component, {})
+            updated = dict(container)
+        is_last = j == len(components) - 1
+        updated[component] = value if is_last else set_in(child, j + 1, value)
+        return updated
+
+    def set_(data, value):
+        if not components:
+            return value
+        return set_in(data, 0, value)
+    return set_
+
+
+def put(
+        data: _util.JSONable,
+        path: str,
+        value: _util.JSONable
+) -> _util.JSONable:
+    """Put a value at a reference path, creating missing objects.
+
+    The input data is not modified, but unchanged objects and arrays are
+    shared with the result.
+
+    Args:
+        data: data to put value into
+        path: reference path
+        value: value to put
+
+    Returns:
+        updated data
+
+    Raises:
+        PathError: path doesn't match data
+    """
+
+    return setter(path)(data, value)
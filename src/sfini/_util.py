@@ -1,21 +1,45 @@
 """Common utilities for ``sfini``."""
 
-import inspect
+import os
 import sys
+import json
+import time
+import random
+import hashlib
+import pathlib
+import inspect
+import threading
 import typing as T
 import logging as lg
 import functools as ft
+import collections
 from collections import abc
+from concurrent import futures
+
+from botocore import exceptions as bc_exc
 
-import boto3
-from botocore import credentials
-from botocore import client as botocore_client
+if T.TYPE_CHECKING:  # pragma: no cover
+    import botocore.client
+    import botocore.credentials
 
 _logger = lg.getLogger(__name__)
 lg.getLogger("botocore").setLevel(lg.WARNING)
 MAX_NAME_LENGTH = 79
 INVALID_NAME_CHARACTERS = " \n\t<>{}[]?*\"#%\\^|~`$&,;:/"
 DEBUG = "pytest" in sys.modules
+boto3 = None
+bc_config = None
+THROTTLING_ERROR_CODES = (
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded")
+DEFAULT_ACCOUNT_ID_CACHE = str(
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() /
+    "sfini" / "account-ids.json")
+_max_cached_account_ids = 100
+BOTOCORE_MAX_ATTEMPTS = 3
+LONG_POLL_READ_TIMEOUT = 70.0  # SFN holds activity-task polls for 60s
 JSONable = T.Union[
     None,
     bool,
@@ -41,6 +65,14 @@ class DefaultParameter:
         return type(self).__name__ + "()"
 
 
+def _import_boto3():
+    """Import ``boto3`` AWS SDK, which is slow to import."""
+    global boto3, bc_config
+    if boto3 is None:
+        import boto3
+        from botocore import config as bc_config
+
+
 def setup_logging(level: int = None):
     """Setup logging for ``sfini``, if logs would otherwise be ignored.
 
@@ -139,6 +171,104 @@ def collect_paginated(
     return result
 
 
+def iter_paginated(
+        fn: T.Callable[..., T.Dict[str, JSONable]],
+        **kwargs: JSONable
+) -> T.Generator[T.Dict[str, JSONable], None, None]:
+    """Call SFN API paginated endpoint, yielding each page.
+
+    Calls ``fn`` until "nextToken" isn't in the return value. Pages are
+    requested as they're consumed.
+
+    Args:
+        fn: SFN API function
+        **kwargs: arguments to ``fn``
+
+    Returns:
+        results of each paginated API call
+    """
+
+    while True:
+        result = fn(**kwargs)
+        next_token = result.pop("nextToken", None)
+        yield result
+        if next_token is None:
+            return
+        kwargs["nextToken"] = next_token
+
+
+def call_with_retries(
+        fn: T.Callable,
+        *args,
+        max_attempts: int = 8,
+        base_delay: float = 0.1,
+        max_delay: float = 10.0,
+        **kwargs):
+    """Call SFN API endpoint, retrying when throttled.
+
+    Retries back-off exponentially, with full jitter. Note that
+    ``AWSSession`` clients also retry throttled requests (up to
+    ``BOTOCORE_MAX_ATTEMPTS`` times, adaptively), so a throttled request
+    is sent at most ``BOTOCORE_MAX_ATTEMPTS * max_attempts`` times.
+
+    Args:
+        fn: SFN API function
+        *args: positional arguments to ``fn``
+        max_attempts: maximum number of calls before re-raising error
+        base_delay: initial maximum retry delay (seconds)
+        max_delay: maximum retry delay (seconds)
+        **kwargs: keyword arguments to ``fn``
+
+    Returns:
+        result of API call
+    """
+
+    attempt = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except bc_exc.ClientError as e:
+            attempt += 1
+            if e.response["Error"]["Code"] not in THROTTLING_ERROR_CODES:
+                raise
+            if attempt >= max_attempts:
+                raise
+            max_delay_ = min(max_delay, base_delay * 2 ** attempt)
+            delay = random.uniform(0, max_delay_)
+            fmt = "Request throttled, retrying in %.3f seconds (attempt %d)"
+            _logger.debug(fmt % (delay, attempt))
+            time.sleep(delay)
+
+
+def map_concurrent(
+        fn: T.Callable,
+        items: T.Iterable,
+        max_workers: int = 10
+) -> T.Generator[T.Any, None, None]:
+    """Apply a function to items concurrently, yielding results in order.
+
+    At most ``2 * max_workers`` items are in-flight at once, so ``items``
+    can be a long (or lazy) iterable.
+
+    Args:
+        fn: function to apply, passed each item
+        items: items to process
+        max_workers: number of threads to run ``fn`` in
+
+    Returns:
+        results of ``fn``, in order of ``items``
+    """
+
+    with futures.ThreadPoolExecutor(max_workers) as executor:
+        pending = collections.deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 def easy_repr(instance) -> str:
     """Use attributes to generate a string representation.
 
@@ -193,15 +323,187 @@ def easy_repr(instance) -> str:
     return "%s(%s)" % (type_name, args_str)
 
 
+class RateLimiter:
+    """Token-bucket rate limiter, shareable between threads.
+
+    Args:
+        rate: sustained number of acquisitions per second
+        burst: maximum number of acquisitions without waiting
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    __repr__ = easy_repr
+
+    def acquire(self):
+        """Block until an acquisition is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens = self._tokens + (now - self._last) * self.rate
+                self._tokens = min(float(self.burst), tokens)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class Registry:
+    """Snapshot of resources registered with AWS SFN, indexed by ARN.
+
+    The snapshot is built by one paginated listing on first use, and
+    rebuilt when it's older than the time-to-live or was invalidated.
+    Resources registered or removed through ``sfini`` are recorded with
+    ``add`` and ``remove``, so don't need a rebuild. Shareable between
+    threads.
+
+    Args:
+        list_fn: SFN API paginated listing function, eg
+            ``list_activities``
+        items_key: key of resource items in listing response
+        arn_key: key of ARN in resource items
+        ttl: snapshot lifetime (seconds)
+    """
+
+    def __init__(
+            self,
+            list_fn: T.Callable[..., T.Dict[str, JSONable]],
+            items_key: str,
+            arn_key: str,
+            ttl: float = 60.0):
+        self.list_fn = list_fn
+        self.items_key = items_key
+        self.arn_key = arn_key
+        self.ttl = ttl
+        self._items: T.Union[T.Dict[str, T.Dict[str, JSONable]], None] = None
+        self._expiry = 0.0
+        self._lock = threading.Lock()
+
+    __repr__ = easy_repr
+
+    def _get_snapshot(self) -> T.Dict[str, T.Dict[str, JSONable]]:
+        """Get resource items, listing resources if stale."""
+        with self._lock:
+            if self._items is None or time.monotonic() >= self._expiry:
+                _logger.debug("Listing %s" % self.items_key)
+                items = {}
+                for resp in iter_paginated(self.list_fn):
+                    for item in resp[self.items_key]:
+                        items[item[self.arn_key]] = item
+                self._items = items
+                self._expiry = time.monotonic() + self.ttl
+            return self._items
+
+    def __contains__(self, arn: str) -> bool:
+        return arn in self._get_snapshot()
+
+    def get(self, arn: str) -> T.Union[T.Dict[str, JSONable], None]:
+        """Get a registered resource.
+
+        Args:
+            arn: resource ARN
+
+        Returns:
+            resource list-item, or ``None`` if not registered
+        """
+
+        return self._get_snapshot().get(arn)
+
+    def items(self) -> T.List[T.Dict[str, JSONable]]:
+        """Get all registered resources.
+
+        Returns:
+            resource list-items
+        """
+
+        return list(self._get_snapshot().values())
+
+    def add(self, item: T.Dict[str, JSONable]):
+        """Record a resource registration.
+
+        Args:
+            item: resource list-item
+        """
+
+        with self._lock:
+            if self._items is not None:
+                self._items[item[self.arn_key]] = item
+
+    def remove(self, arn: str):
+        """Record a resource removal.
+
+        Args:
+            arn: resource ARN
+        """
+
+        with self._lock:
+            if self._items is not None:
+                self._items.pop(arn, None)
+
+    def invalidate(self):
+        """Discard the snapshot, listing resources on next use."""
+        with self._lock:
+            self._items = None
+
+
 class AWSSession:
     """AWS session, for preconfigure communication with AWS.
 
+    The account ID is taken from (in order of preference) the
+    ``aws_account_id`` argument, the ``AWS_ACCOUNT_ID`` environment
+    variable, the session's credentials, the on-disk account ID cache
+    (keyed by a hash of the credentials' access key), or finally from AWS
+    STS, so ARNs can be derived (and definitions built) offline.
+
     Args:
         session: session to use
+        execution_cache (sfini.execution.cache.ExecutionCache): local
+            cache of finished executions, default: no caching
+        registry_ttl: lifetime of registered activities and state-machines
+            snapshots (seconds)
+        region_name: AWS region, default: the session's region
+        aws_account_id: AWS account ID
+        account_id_cache: path to account ID cache file, ``None`` to not
+            cache account IDs on disk
+        max_pool_connections: maximum number of connections kept by each
+            client, eg the number of threads sharing this session
+
+    Clients are thread-safe (and may be shared between threads), but are
+    created under a lock as ``boto3`` sessions are not. Clients use
+    adaptive retries (``BOTOCORE_MAX_ATTEMPTS`` attempts, beneath any
+    ``call_with_retries``), and a separate client (``sfn_long_poll``)
+    with a longer read time-out is used for long-polling requests. Bulk
+    operations call ``reserve_connections`` with their concurrency.
     """
 
-    def __init__(self, session: boto3.Session = None):
-        self.session = session or boto3.Session()
+    def __init__(
+            self,
+            session: "boto3.Session" = None,
+            *,
+            execution_cache=None,
+            registry_ttl: float = 60.0,
+            region_name: str = None,
+            aws_account_id: str = None,
+            account_id_cache: T.Union[str, None] = DEFAULT_ACCOUNT_ID_CACHE,
+            max_pool_connections: int = 10):
+        if session is None:
+            session = self._create_session()
+        self.session = session
+        self.execution_cache = execution_cache
+        self.registry_ttl = registry_ttl
+        self.region_name = region_name
+        self.aws_account_id = aws_account_id
+        self.account_id_cache = account_id_cache
+        self.max_pool_connections = max_pool_connections
+        self._session_lock = threading.Lock()
+        self._clients = {}
 
     def __str__(self):
         fmt = "<access key: %s, region: %s>"
@@ -209,22 +511,151 @@ class AWSSession:
 
     __repr__ = easy_repr
 
+    def _create_session(self) -> "boto3.Session":
+        """Create the default ``boto3`` session."""
+        _import_boto3()
+        return boto3.Session()
+
     @cached_property
-    def credentials(self) -> credentials.Credentials:
+    def credentials(self) -> "botocore.credentials.Credentials":
         """AWS session credentials."""
-        return self.session.get_credentials()
+        with self._session_lock:
+            return self.session.get_credentials()
+
+    def _get_client(
+            self,
+            service_name: str,
+            **config_kwargs
+    ) -> "botocore.client.BaseClient":
+        """Get a client, with adaptive retries, creating it once.
+
+        Args:
+            service_name: AWS service name
+            **config_kwargs: extra client configuration
+
+        Returns:
+            AWS service client, shared with other threads
+        """
+
+        key = (service_name,) + tuple(sorted(config_kwargs.items()))
+        with self._session_lock:
+            if key not in self._clients:
+                _import_boto3()
+                config = bc_config.Config(
+                    region_name=self.region_name,
+                    max_pool_connections=self.max_pool_connections,
+                    retries={
+                        "mode": "adaptive",
+                        "max_attempts": BOTOCORE_MAX_ATTEMPTS},
+                    **config_kwargs)
+                client = self.session.client(service_name, config=config)
+                self._clients[key] = client
+            return self._clients[key]
+
+    def reserve_connections(self, count: int):
+        """Make sure clients keep enough connections for concurrent use.
+
+        Clients created with a smaller connection pool are replaced on
+        next access (existing references to them remain usable).
+
+        Args:
+            count: number of threads which will make requests concurrently
+        """
+
+        with self._session_lock:
+            if count <= self.max_pool_connections:
+                return
+            fmt = "Increasing maximum client connections from %d to %d"
+            _logger.debug(fmt % (self.max_pool_connections, count))
+            self.max_pool_connections = count
+            self._clients.clear()
+            cache = getattr(self, "__cache__", {})
+            cache.pop("sfn", None)
+            cache.pop("sfn_long_poll", None)
 
     @cached_property
-    def sfn(self) -> botocore_client.BaseClient:
+    def sfn(self) -> "botocore.client.BaseClient":
         """Step Functions client."""
-        return self.session.client("stepfunctions")
+        return self._get_client("stepfunctions")
+
+    @cached_property
+    def sfn_long_poll(self) -> "botocore.client.BaseClient":
+        """Step Functions client for long-polling, eg for activity tasks."""
+        return self._get_client(
+            "stepfunctions",
+            read_timeout=LONG_POLL_READ_TIMEOUT)
+
+    @cached_property
+    def activity_registry(self) -> Registry:
+        """Snapshot of activities registered with AWS SFN."""
+        return Registry(
+            self.sfn.list_activities,
+            "activities",
+            "activityArn",
+            ttl=self.registry_ttl)
+
+    @cached_property
+    def state_machine_registry(self) -> Registry:
+        """Snapshot of state-machines registered with AWS SFN."""
+        return Registry(
+            self.sfn.list_state_machines,
+            "stateMachines",
+            "stateMachineArn",
+            ttl=self.registry_ttl)
 
     @cached_property
     def region(self) -> str:
         """Session AWS region."""
-        return self.session.region_name
+        return self.region_name or self.session.region_name
+
+    def _load_account_ids(self) -> T.Dict[str, str]:
+        """Load cached account IDs, by access key hash."""
+        try:
+            with open(self.account_id_cache, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_account_ids(self, account_ids: T.Dict[str, str]):
+        """Save account IDs to the cache, ignoring failures."""
+        path = pathlib.Path(self.account_id_cache)
+        tmp_path = path.with_name(path.name + ".%d.tmp" % os.getpid())
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(account_ids, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            _logger.warning("Failed to cache account ID: %s" % e)
+
+    def _get_sts_account_id(self) -> str:
+        """Get account ID from AWS STS."""
+        _logger.debug("Getting account ID from STS")
+        client = self._get_client("sts")
+        return client.get_caller_identity()["Account"]
 
     @cached_property
     def account_id(self) -> str:
         """Session's account's account ID."""
-        return self.session.client("sts").get_caller_identity()["Account"]
+        if self.aws_account_id:
+            return self.aws_account_id
+        if os.environ.get("AWS_ACCOUNT_ID"):
+            return os.environ["AWS_ACCOUNT_ID"]
+        credentials_ = self.credentials
+        account_id = getattr(credentials_, "account_id", None)
+        if isinstance(account_id, str) and account_id:
+            return account_id
+
+        access_key = getattr(credentials_, "access_key", None)
+        if self.account_id_cache is None or not isinstance(access_key, str):
+            return self._get_sts_account_id()
+        key = hashlib.sha256(access_key.encode("utf-8")).hexdigest()
+        account_ids = self._load_account_ids()
+        if key in account_ids:
+            return account_ids[key]
+        account_id = self._get_sts_account_id()
+        account_ids[key] = account_id
+        while len(account_ids) > _max_cached_account_ids:
+            del account_ids[next(iter(account_ids))]
+        self._save_account_ids(account_ids)
+        return account_id
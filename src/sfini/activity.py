@@ -4,10 +4,13 @@ Activities are separate from state-machines, and are used as
 implementations of 'Task' states. Activities are registered separately.
 """
 
+import json
 import inspect
+import importlib
 import typing as T
 import logging as lg
 import functools as ft
+from collections import abc
 
 from . import _util
 from . import task_resource as sfini_task_resource
@@ -39,25 +42,30 @@ class Activity(sfini_task_resource.TaskResource):
         _util.assert_valid_name(self.name)
         resp = self.session.sfn.create_activity(name=self.name)
         assert resp["activityArn"] == self.arn
+        self.session.activity_registry.add({
+            "activityArn": self.arn,
+            "name": self.name,
+            "creationDate": resp["creationDate"]})
         fmt = "Activity '%s' registered with ARN '%s' at %s"
         _logger.info(fmt % (self, self.arn, resp["creationDate"]))
 
     def is_registered(self) -> bool:
         """See if this activity is registered with AWS SFN.
 
+        Uses the session's snapshot of registered activities.
+
         Returns:
             if this activity is registered
         """
 
         _logger.debug("Testing for registration of '%s' on SFN" % self)
-        resp = _util.collect_paginated(self.session.sfn.list_activities)
-        arns = {sm["activityArn"] for sm in resp["activities"]}
-        return self.arn in arns
+        return self.arn in self.session.activity_registry
 
     def deregister(self):
         """Remove activity from AWS SFN."""
         _logger.info("Deleting activity '%s' from SFN" % self)
         self.session.sfn.delete_activity(activityArn=self.arn)
+        self.session.activity_registry.remove(self.arn)
 
 
 class CallableActivity(Activity):
@@ -300,16 +308,39 @@ class ActivityRegistration:
             name=name,
             heartbeat=heartbeat)
 
-    def register(self):
-        """Add registered activities to AWS SFN."""
-        for activity in self.activities.values():
-            activity.register()
+    def _get_registration_activities(self) -> T.Iterable[Activity]:
+        """Get activities to register, which only need name and session."""
+        return self.activities.values()
+
+    def register(self, concurrency: int = 10):
+        """Add registered activities to AWS SFN.
+
+        Activities already in the session's snapshot of registered
+        activities are skipped. Activities are registered concurrently,
+        with retries when requests are throttled.
+
+        Args:
+            concurrency: maximum number of concurrent requests
+        """
+
+        activities = []
+        for activity in self._get_registration_activities():
+            if activity.arn in self.session.activity_registry:
+                _logger.debug("Activity '%s' already registered" % activity)
+                continue
+            activities.append(activity)
+
+        def _register(activity):
+            _util.call_with_retries(activity.register)
+
+        _logger.info("Registering %d activities" % len(activities))
+        self.session.reserve_connections(concurrency)
+        list(_util.map_concurrent(_register, activities, concurrency))
 
     def _list_activities(self) -> T.List[T.Tuple[str, str, str]]:
         """List activities in SFN."""
-        resp = _util.collect_paginated(self.session.sfn.list_activities)
         acts = []
-        for act in resp["activities"]:
+        for act in self.session.activity_registry.items():
             prefix = act["name"][:len(self.prefix)]
             if prefix != self.prefix and act["name"] not in self.activities:
                 continue
@@ -318,14 +349,251 @@ class ActivityRegistration:
 
     def _deregister_activities(
             self,
-            activity_items: T.Sequence[T.Tuple[str, str, str]]):
-        """Deregister activities."""
+            activity_items: T.Sequence[T.Tuple[str, str, str]],
+            concurrency: int = 10):
+        """Deregister activities, concurrently."""
         _logger.info("Deregistering %d activities" % len(activity_items))
-        for act in activity_items:
+        self.session.reserve_connections(concurrency)
+
+        def _deregister(act):
             _logger.debug("Deregistering '%s'" % act[0])
-            self.session.sfn.delete_activity(activityArn=act[1])
+            _util.call_with_retries(
+                self.session.sfn.delete_activity,
+                activityArn=act[1])
+            self.session.activity_registry.remove(act[1])
+
+        list(_util.map_concurrent(_deregister, activity_items, concurrency))
+
+    def deregister(self, concurrency: int = 10):
+        """Remove activities in AWS SFN.
+
+        Activities are deregistered concurrently, with retries when
+        requests are throttled.
+
+        Args:
+            concurrency: maximum number of concurrent requests
+        """
 
-    def deregister(self):
-        """Remove activities in AWS SFN."""
         acts = self._list_activities()
-        self._deregister_activities(acts)
+        self._deregister_activities(acts, concurrency=concurrency)
+
+
+def _import_reference(reference: str) -> T.Any:
+    """Import an object by reference.
+
+    Args:
+        reference: object reference, as ``module:qualified.name``
+
+    Returns:
+        referenced object
+
+    Raises:
+        ValueError: invalid reference
+    """
+
+    module_name, sep, qualified_name = reference.partition(":")
+    if not sep or not module_name or not qualified_name:
+        fmt = "Invalid reference '%s', expected 'module:name'"
+        raise ValueError(fmt % reference)
+    obj = importlib.import_module(module_name.strip())
+    for attr in qualified_name.strip().split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _iter_entry_points(group: str) -> T.Iterable[T.Tuple[str, str]]:
+    """Iterate over installed entry-points.
+
+    Args:
+        group: entry-point group
+
+    Returns:
+        entry-point names and object references
+    """
+
+    try:
+        from importlib import metadata
+    except ImportError:  # pragma: no cover
+        import pkg_resources
+        for entry_point in pkg_resources.iter_entry_points(group):
+            reference = "%s:%s" % (
+                entry_point.module_name,
+                ".".join(entry_point.attrs))
+            yield entry_point.name, reference
+        return
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        entry_points = entry_points.select(group=group)
+    else:  # pragma: no cover
+        entry_points = entry_points.get(group, [])
+    for entry_point in entry_points:
+        yield entry_point.name, entry_point.value
+
+
+class _LazyActivities(abc.MutableMapping):
+    """Activities, imported on first access.
+
+    Args:
+        load: activity loader, taking activity name and reference
+    """
+
+    def __init__(self, load: T.Callable[[str, str], CallableActivity]):
+        self.load = load
+        self.references: T.Dict[str, str] = {}
+        self._loaded: T.Dict[str, Activity] = {}
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, self.references)
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            self._loaded[name] = self.load(name, self.references[name])
+        return self._loaded[name]
+
+    def __setitem__(self, name, activity):
+        self.references.pop(name, None)
+        self._loaded[name] = activity
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self.references.pop(name, None)
+        self._loaded.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.references or name in self._loaded
+
+    def __iter__(self):
+        yield from self.references
+        yield from (n for n in self._loaded if n not in self.references)
+
+    def __len__(self):
+        return len(set(self.references) | set(self._loaded))
+
+
+class LazyActivityRegistration(ActivityRegistration):
+    """Activities registration, importing activities on first use.
+
+    Activities are added by reference to their implementation, as
+    ``module:function``, and the module is only imported when the
+    activity is accessed (eg to run a worker for that activity). This
+    keeps a worker from importing every activity's dependencies.
+
+    A referenced function is wrapped in an activity, and a referenced
+    activity is used directly (its name must match).
+
+    Args:
+        prefix: prefix for activity names
+        session: session to use for AWS communication
+
+    Attributes:
+        activities: registered activities, imported on access
+
+    Example:
+        >>> activities = LazyActivityRegistration(prefix="foo")
+        >>> activities.add_reference("MyActivity", "my_package.acts:fn")
+        >>> list(activities.activities)
+        ['fooMyActivity']
+    """
+
+    def __init__(self, prefix: str = "", *, session: _util.AWSSession = None):
+        super().__init__(prefix=prefix, session=session)
+        self.activities = _LazyActivities(self._load_activity)
+
+    def _load_activity(self, name: str, reference: str) -> CallableActivity:
+        """Import an activity.
+
+        Args:
+            name: full activity name
+            reference: activity implementation reference
+
+        Returns:
+            referenced activity
+
+        Raises:
+            ValueError: referenced activity name doesn't match
+        """
+
+        _logger.debug("Importing activity '%s' from '%s'" % (name, reference))
+        obj = _import_reference(reference)
+        if isinstance(obj, Activity):
+            if obj.name != name:
+                fmt = "Activity '%s' referenced by name '%s'"
+                raise ValueError(fmt % (obj.name, name))
+            return obj
+        return self._activity_class(name, obj, session=self.session)
+
+    def add_reference(self, name: str, reference: str):
+        """Add an activity by reference to its implementation.
+
+        Args:
+            name: name of activity, without prefix
+            reference: implementation reference, as ``module:function``
+
+        Raises:
+            ValueError: if activity name already in-use in group, or
+                invalid reference
+        """
+
+        full_name = self.prefix + name
+        if full_name in self.activities:
+            raise ValueError("Activity '%s' already in group" % full_name)
+        if ":" not in reference:
+            fmt = "Invalid reference '%s', expected 'module:name'"
+            raise ValueError(fmt % reference)
+        self.activities.references[full_name] = reference
+
+    @classmethod
+    def from_entry_points(
+            cls,
+            group: str,
+            prefix: str = "",
+            *,
+            session: _util.AWSSession = None
+    ) -> "LazyActivityRegistration":
+        """Add activities from installed packages' entry-points.
+
+        Args:
+            group: entry-point group, whose entry-point names are
+                activity names (without prefix)
+            prefix: prefix for activity names
+            session: session to use for AWS communication
+
+        Returns:
+            activities registration
+        """
+
+        activities = cls(prefix=prefix, session=session)
+        for name, reference in _iter_entry_points(group):
+            activities.add_reference(name, reference)
+        return activities
+
+    @classmethod
+    def from_manifest(
+            cls,
+            path: str,
+            prefix: str = "",
+            *,
+            session: _util.AWSSession = None
+    ) -> "LazyActivityRegistration":
+        """Add activities from a manifest.
+
+        Args:
+            path: path to JSON manifest, an object of activity names
+                (without prefix) to implementation references
+            prefix: prefix for activity names
+            session: session to use for AWS communication
+
+        Returns:
+            activities registration
+        """
+
+        with open(path) as f:
+            references = json.load(f)
+        activities = cls(prefix=prefix, session=session)
+        for name, reference in references.items():
+            activities.add_reference(name, reference)
+        return activities
+
+    def _get_registration_activities(self):
+        return [Activity(n, session=self.session) for n in self.activities]
@@ -0,0 +1,699 @@
+"""Local in-process AWS Step Functions emulator.
+
+Use ``EmulatorSession`` in place of ``sfini.AWSSession`` to register
+activities and state-machines, start executions and run workers without
+an AWS account, eg for tests and benchmarks::
+
+    session = sfini.emulator.EmulatorSession()
+    activities = sfini.ActivityRegistration("myPackage", session=session)
+
+Executions are run in threads by the local definition interpreter, and
+'Task' states dispatch activity tasks to workers polling
+``get_activity_task``. Only activity tasks are supported.
+"""
+
+import json
+import uuid
+import time
+import datetime
+import threading
+import collections
+import typing as T
+import logging as lg
+
+from botocore import exceptions as bc_exc
+
+from . import _util
+from . import _interpreter
+
+_logger = lg.getLogger(__name__)
+_execution_statuses = {
+    "ExecutionSucceeded": "SUCCEEDED",
+    "ExecutionFailed": "FAILED",
+    "ExecutionAborted": "ABORTED",
+    "ExecutionTimedOut": "TIMED_OUT"}
+
+
+def _now() -> datetime.datetime:
+    """Get the current aware time."""
+    return datetime.datetime.now(tz=datetime.timezone.utc)
+
+
+def _client_error(operation: str, code: str, message: str):
+    """Build an AWS API error.
+
+    Args:
+        operation: API operation name
+        code: error code
+        message: error message
+
+    Returns:
+        botocore.exceptions.ClientError: error
+    """
+
+    resp = {"Error": {"Code": code, "Message": message}}
+    return bc_exc.ClientError(resp, operation)
+
+
+def _paginate(
+        items: T.List,
+        key: str,
+        maxResults: int = 100,
+        nextToken: str = None
+) -> T.Dict[str, _util.JSONable]:
+    """Build a paginated response.
+
+    Args:
+        items: all items
+        key: response key of items
+        maxResults: maximum number of items in page
+        nextToken: pagination token from previous page
+
+    Returns:
+        response page
+    """
+
+    start = int(nextToken) if nextToken else 0
+    stop = start + (maxResults or 100)
+    resp = {key: items[start:stop]}
+    if stop < len(items):
+        resp["nextToken"] = str(stop)
+    return resp
+
+
+class _ActivityTask:
+    """Pending activity task.
+
+    Args:
+        activity_arn: activity ARN
+        task_input: task input
+        interpreter: interpreter of task's execution
+        scheduled_event_id: identifying index of task-schedule event
+    """
+
+    def __init__(
+            self,
+            activity_arn: str,
+            task_input: _util.JSONable,
+            interpreter: "_EmulatedInterpreter",
+            scheduled_event_id: int):
+        self.activity_arn = activity_arn
+        self.task_input = task_input
+        self.interpreter = interpreter
+        self.scheduled_event_id = scheduled_event_id
+        self.token = uuid.uuid4().hex
+        self.scheduled = time.monotonic()
+        self.last_heartbeat: T.Union[float, None] = None
+        self.finished = False
+        self.output: _util.JSONable = None
+        self.error: T.Union[_interpreter.StatesError, None] = None
+
+
+class _EmulatedInterpreter(_interpreter.Interpreter):
+    """Interpreter dispatching activity tasks to emulator workers.
+
+    Args:
+        emulator: emulator to dispatch tasks on
+        definition: state-machine definition
+    """
+
+    def __init__(self, emulator: "Emulator", definition):
+        super().__init__(definition, time_scale=emulator.time_scale)
+        self.emulator = emulator
+
+    def run_task(
+            self,
+            resource,
+            task_input,
+            timeout,
+            heartbeat,
+            scheduled_event_id):
+        return self.emulator._run_activity_task(
+            self,
+            resource,
+            task_input,
+            timeout,
+            heartbeat,
+            scheduled_event_id)
+
+
+class _EmulatedExecution:
+    """Emulated execution state.
+
+    Args:
+        arn: execution ARN
+        name: execution name
+        state_machine_arn: execution's state-machine's ARN
+        execution_input: execution input
+        interpreter: execution definition interpreter
+    """
+
+    def __init__(
+            self,
+            arn: str,
+            name: str,
+            state_machine_arn: str,
+            execution_input: str,
+            interpreter: _EmulatedInterpreter):
+        self.arn = arn
+        self.name = name
+        self.state_machine_arn = state_machine_arn
+        self.execution_input = execution_input
+        self.interpreter = interpreter
+        self.start_date = _now()
+        self.stop_date: T.Union[datetime.datetime, None] = None
+        self.status = "RUNNING"
+        self.output: T.Union[str, None] = None
+
+    def list_item(self) -> T.Dict[str, _util.JSONable]:
+        """Build execution list-item."""
+        item = {
+            "executionArn": self.arn,
+            "stateMachineArn": self.state_machine_arn,
+            "name": self.name,
+            "status": self.status,
+            "startDate": self.start_date}
+        if self.stop_date is not None:
+            item["stopDate"] = self.stop_date
+        return item
+
+
+class Emulator:
+    """In-process stand-in for the AWS Step Functions API client.
+
+    Implements the API operations used by ``sfini``, with the same
+    arguments, responses and errors (``botocore`` client errors) as the
+    ``boto3`` client. Safe to share between threads.
+
+    Args:
+        region: emulated AWS region
+        account_id: emulated AWS account ID
+        poll_timeout: maximum time ``get_activity_task`` waits for a task
+            (seconds)
+        time_scale: multiplier of 'Wait' state and retry times, eg
+            ``0.0`` to not wait at all. Task time-outs are not scaled
+    """
+
+    def __init__(
+            self,
+            region: str = "us-east-1",
+            account_id: str = "123456789012",
+            poll_timeout: float = 60.0,
+            time_scale: float = 1.0):
+        self.region = region
+        self.account_id = account_id
+        self.poll_timeout = poll_timeout
+        self.time_scale = time_scale
+        self._condition = threading.Condition()
+        self._activities: T.Dict[str, T.Dict[str, _util.JSONable]] = {}
+        self._state_machines: T.Dict[str, T.Dict[str, _util.JSONable]] = {}
+        self._executions: T.Dict[str, _EmulatedExecution] = {}
+        self._queues: T.Dict[str, T.Deque[_ActivityTask]] = {}
+        self._tasks: T.Dict[str, _ActivityTask] = {}
+
+    def __str__(self):
+        return "SFN emulator (%s, %s)" % (self.region, self.account_id)
+
+    __repr__ = _util.easy_repr
+
+    def _arn(self, resource_type: str, *names: str) -> str:
+        """Build an ARN of an emulated resource."""
+        fmt = "arn:aws:states:%s:%s:%s:%s"
+        return fmt % (self.region, self.account_id, resource_type, ":".join(
+            names))
+
+    def _get_activity(self, operation: str, arn: str):
+        """Get an activity, raising if it doesn't exist."""
+        if arn not in self._activities:
+            msg = "Activity does not exist: '%s'" % arn
+            raise _client_error(operation, "ActivityDoesNotExist", msg)
+        return self._activities[arn]
+
+    def _get_state_machine(self, operation: str, arn: str):
+        """Get a state-machine, raising if it doesn't exist."""
+        if arn not in self._state_machines:
+            msg = "State Machine Does Not Exist: '%s'" % arn
+            raise _client_error(operation, "StateMachineDoesNotExist", msg)
+        return self._state_machines[arn]
+
+    def _get_execution(self, operation: str, arn: str) -> _EmulatedExecution:
+        """Get an execution, raising if it doesn't exist."""
+        if arn not in self._executions:
+            msg = "Execution Does Not Exist: '%s'" % arn
+            raise _client_error(operation, "ExecutionDoesNotExist", msg)
+        return self._executions[arn]
+
+    def _get_task(self, operation: str, token: str) -> _ActivityTask:
+        """Get a started task, raising if it's finished or doesn't exist."""
+        task = self._tasks.get(token)
+        if task is None or task.finished:
+            msg = "Task does not exist or has timed out: '%s'" % token
+            raise _client_error(operation, "TaskTimedOut", msg)
+        return task
+
+    def create_activity(
+            self,
+            name: str,
+            tags: T.List[T.Dict[str, str]] = None
+    ) -> T.Dict[str, _util.JSONable]:
+        """Create an activity, if it doesn't already exist."""
+        _util.assert_valid_name(name)
+        arn = self._arn("activity", name)
+        with self._condition:
+            if arn not in self._activities:
+                self._activities[arn] = {
+                    "activityArn": arn,
+                    "name": name,
+                    "creationDate": _now()}
+                self._queues[arn] = collections.deque()
+            activity = self._activities[arn]
+        return {
+            "activityArn": arn,
+            "creationDate": activity["creationDate"]}
+
+    def delete_activity(self, activityArn: str) -> T.Dict[str, _util.JSONable]:
+        """Delete an activity."""
+        with self._condition:
+            self._activities.pop(activityArn, None)
+        return {}
+
+    def describe_activity(
+            self,
+            activityArn: str
+    ) -> T.Dict[str, _util.JSONable]:
+        """Describe an activity."""
+        with self._condition:
+            return dict(self._get_activity("DescribeActivity", activityArn))
+
+    def list_activities(self, **kwargs) -> T.Dict[str, _util.JSONable]:
+        """List activities."""
+        with self._condition:
+            items = [dict(a) for a in self._activities.values()]
+        return _paginate(items, "activities", **kwargs)
+
+    def get_activity_task(
+            self,
+            activityArn: str,
+            workerName: str = None
+    ) -> T.Dict[str, _util.JSONable]:
+        """Poll for an activity task, waiting up to ``poll_timeout``."""
+        deadline = time.monotonic() + self.poll_timeout
+        with self._condition:
+            self._get_activity("GetActivityTask", activityArn)
+            queue = self._queues[activityArn]
+            while True:
+                while queue:
+                    task = queue.popleft()
+                    if not task.finished:
+                        break
+                else:
+                    task = None
+                if task is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {}
+                self._condition.wait(remaining)
+            task.last_heartbeat = time.monotonic()
+            task.interpreter.task_started(
+                task.scheduled_event_id,
+                workerName or "")
+            self._condition.notify_all()
+        return {"taskToken": task.token, "input": json.dumps(task.task_input)}
+
+    def _finish_task(
+            self,
+            operation: str,
+            token: str,
+            output: _util.JSONable = None,
+            error: _interpreter.StatesError = None):
+        """Complete a started activity task."""
+        with self._condition:
+            task = self._get_task(operation, token)
+            task.finished = True
+            task.output = output
+            task.error = error
+            self._condition.notify_all()
+
+    def send_task_success(
+            self,
+            taskToken: str,
+            output: str
+    ) -> T.Dict[str, _util.JSONable]:
+        """Complete an activity task successfully."""
+        self._finish_task("SendTaskSuccess", taskToken, json.loads(output))
+        return {}
+
+    def send_task_failure(
+            self,
+            taskToken: str,
+            error: str = None,
+            cause: str = None
+    ) -> T.Dict[str, _util.JSONable]:
+        """Complete an activity task unsuccessfully."""
+        error_ = _interpreter.StatesError(error, cause)
+        self._finish_task("SendTaskFailure", taskToken, error=error_)
+        return {}
+
+    def send_task_heartbeat(
+            self,
+            taskToken: str
+    ) -> T.Dict[str, _util.JSONable]:
+        """Report an activity task is still running."""
+        with self._condition:
+            task = self._get_task("SendTaskHeartbeat", taskToken)
+            task.last_heartbeat = time.monotonic()
+        return {}
+
+    def _wait_for_task(
+            self,
+            task: _ActivityTask,
+            timeout: T.Union[int, None],
+            heartbeat: T.Union[int, None]):
+        """Wait for an activity task to finish.
+
+        Must be called with the emulator's condition acquired.
+
+        Args:
+            task: task to wait for
+            timeout: task time-out (seconds)
+            heartbeat: task heartbeat time-out (seconds)
+
+        Raises:
+            sfini._interpreter.StatesError: task timed-out, or execution
+                was stopped
+        """
+
+        while not task.finished:
+            if task.interpreter.aborted:
+                raise _interpreter.ExecutionAborted("States.Aborted")
+            deadlines = []
+            if timeout is not None:
+                deadlines.append(task.scheduled + timeout)
+            if heartbeat is not None and task.last_heartbeat is not None:
+                deadlines.append(task.last_heartbeat + heartbeat)
+            remaining = None
+            if deadlines:
+                remaining = min(deadlines) - time.monotonic()
+                if remaining <= 0:
+                    raise _interpreter.StatesError("States.Timeout")
+            self._condition.wait(remaining)
+
+    def _run_activity_task(
+            self,
+            interpreter: _EmulatedInterpreter,
+            resource: str,
+            task_input: _util.JSONable,
+            timeout: T.Union[int, None],
+            heartbeat: T.Union[int, None],
+            scheduled_event_id: int
+    ) -> _util.JSONable:
+        """Queue an activity task and wait for its completion.
+
+        Args:
+            interpreter: interpreter of task's execution
+            resource: activity ARN
+            task_input: task input
+            timeout: task time-out (seconds)
+            heartbeat: task heartbeat time-out (seconds)
+            scheduled_event_id: identifying index of task-schedule event
+
+        Returns:
+            task output
+
+        Raises:
+            sfini._interpreter.StatesError: task failed or timed-out
+        """
+
+        with self._condition:
+            if resource not in self._activities:
+                msg = "Unsupported or missing task resource: '%s'" % resource
+                raise _interpreter.StatesError("States.Runtime", msg)
+            task = _ActivityTask(
+                resource,
+                task_input,
+                interpreter,
+                scheduled_event_id)
+            self._tasks[task.token] = task
+            self._queues[resource].append(task)
+            self._condition.notify_all()
+
+            try:
+                self._wait_for_task(task, timeout, heartbeat)
+            finally:
+                task.finished = True
+                del self._tasks[task.token]
+
+        if task.error is not None:
+            raise task.error
+        return task.output
+
+    def create_state_machine(
+            self,
+            name: str,
+            definition: str,
+            roleArn: str,
+            **kwargs
+    ) -> T.Dict[str, _util.JSONable]:
+        """Create a state-machine."""
+        _util.assert_valid_name(name)
+        arn = self._arn("stateMachine", name)
+        with self._condition:
+            existing = self._state_machines.get(arn)
+            if existing is not None:
+                if (existing["definition"], existing["roleArn"]) != (
+                        definition, roleArn):
+                    msg = "State Machine Already Exists: '%s'" % arn
+                    raise _client_error(
+                        "CreateStateMachine",
+                        "StateMachineAlreadyExists",
+                        msg)
+            else:
+                self._state_machines[arn] = {
+                    "stateMachineArn": arn,
+                    "name": name,
+                    "status": "ACTIVE",
+                    "definition": definition,
+                    "roleArn": roleArn,
+                    "type": "STANDARD",
+                    "creationDate": _now()}
+            state_machine = self._state_machines[arn]
+        return {
+            "stateMachineArn": arn,
+            "creationDate": state_machine["creationDate"]}
+
+    def update_state_machine(
+            self,
+            stateMachineArn: str,
+            definition: str = None,
+            roleArn: str = None,
+            **kwargs
+    ) -> T.Dict[str, _util.JSONable]:
+        """Update a state-machine's definition or role."""
+        with self._condition:
+            state_machine = self._get_state_machine(
+                "UpdateStateMachine",
+                stateMachineArn)
+            if definition is not None:
+                state_machine["definition"] = definition
+            if roleArn is not None:
+                state_machine["roleArn"] = roleArn
+        return {"updateDate": _now()}
+
+    def delete_state_machine(
+            self,
+            stateMachineArn: str
+    ) -> T.Dict[str, _util.JSONable]:
+        """Delete a state-machine."""
+        with self._condition:
+            self._state_machines.pop(stateMachineArn, None)
+        return {}
+
+    def describe_state_machine(
+            self,
+            stateMachineArn: str
+    ) -> T.Dict[str, _util.JSONable]:
+        """Describe a state-machine."""
+        with self._condition:
+            return dict(self._get_state_machine(
+                "DescribeStateMachine",
+                stateMachineArn))
+
+    def list_state_machines(self, **kwargs) -> T.Dict[str, _util.JSONable]:
+        """List state-machines."""
+        keys = ("stateMachineArn", "name", "type", "creationDate")
+        with self._condition:
+            items = [
+                {k: sm[k] for k in keys}
+                for sm in self._state_machines.values()]
+        return _paginate(items, "stateMachines", **kwargs)
+
+    def _run_execution(self, execution: _EmulatedExecution):
+        """Run an execution, updating its status when finished."""
+        try:
+            output = execution.interpreter.run(
+                json.loads(execution.execution_input))
+        except _interpreter.StatesError:
+            output = None
+        except Exception as e:
+            _logger.error("Emulated execution failed", exc_info=e)
+            execution.interpreter.record(
+                "ExecutionFailed",
+                None,
+                {"error": "States.Runtime", "cause": str(e)})
+            output = None
+        with self._condition:
+            last_event = execution.interpreter.history[-1]
+            execution.status = _execution_statuses[last_event["type"]]
+            execution.stop_date = last_event["timestamp"]
+            if output is not None or execution.status == "SUCCEEDED":
+                execution.output = json.dumps(output)
+            self._condition.notify_all()
+
+    def start_execution(
+            self,
+            stateMachineArn: str,
+            name: str = None,
+            input: str = "{}",
+            **kwargs
+    ) -> T.Dict[str, _util.JSONable]:
+        """Start a state-machine execution."""
+        name = name or str(uuid.uuid4())
+        state_machine_name = stateMachineArn.split(":")[-1]
+        arn = self._arn("execution", state_machine_name, name)
+        with self._condition:
+            state_machine = self._get_state_machine(
+                "StartExecution",
+                stateMachineArn)
+            existing = self._executions.get(arn)
+            if existing is not None:
+                if existing.execution_input != input:
+                    msg = "Execution Already Exists: '%s'" % arn
+                    raise _client_error(
+                        "StartExecution",
+                        "ExecutionAlreadyExists",
+                        msg)
+                return {"executionArn": arn, "startDate": existing.start_date}
+            interpreter = _EmulatedInterpreter(
+                self,
+                json.loads(state_machine["definition"]))
+            execution = _EmulatedExecution(
+                arn,
+                name,
+                stateMachineArn,
+                input,
+                interpreter)
+            self._executions[arn] = execution
+        thread = threading.Thread(
+            target=self._run_execution,
+            args=(execution,),
+            daemon=True)
+        thread.start()
+        return {"executionArn": arn, "startDate": execution.start_date}
+
+    def stop_execution(
+            self,
+            executionArn: str,
+            error: str = None,
+            cause: str = None
+    ) -> T.Dict[str, _util.JSONable]:
+        """Stop a running execution."""
+        with self._condition:
+            execution = self._get_execution("StopExecution", executionArn)
+            execution.interpreter.abort(error=error, cause=cause)
+            self._condition.notify_all()
+            while execution.status == "RUNNING":
+                self._condition.wait()
+            return {"stopDate": execution.stop_date}
+
+    def describe_execution(
+            self,
+            executionArn: str
+    ) -> T.Dict[str, _util.JSONable]:
+        """Describe an execution."""
+        with self._condition:
+            execution = self._get_execution("DescribeExecution", executionArn)
+            resp = execution.list_item()
+            resp["input"] = execution.execution_input
+            if execution.output is not None:
+                resp["output"] = execution.output
+        return resp
+
+    def list_executions(
+            self,
+            stateMachineArn: str,
+            statusFilter: str = None,
+            **kwargs
+    ) -> T.Dict[str, _util.JSONable]:
+        """List a state-machine's executions, newest first."""
+        with self._condition:
+            self._get_state_machine("ListExecutions", stateMachineArn)
+            items = [
+                e.list_item() for e in self._executions.values()
+                if e.state_machine_arn == stateMachineArn and (
+                    statusFilter is None or e.status == statusFilter)]
+        return _paginate(items[::-1], "executions", **kwargs)
+
+    def get_execution_history(
+            self,
+            executionArn: str,
+            reverseOrder: bool = False,
+            **kwargs
+    ) -> T.Dict[str, _util.JSONable]:
+        """Get an execution's history events."""
+        with self._condition:
+            execution = self._get_execution(
+                "GetExecutionHistory",
+                executionArn)
+            with execution.interpreter._lock:
+                events = list(execution.interpreter.history)
+        if reverseOrder:
+            events = events[::-1]
+        return _paginate(events, "events", **kwargs)
+
+
+class EmulatorSession(_util.AWSSession):
+    """Session communicating with a local emulator instead of AWS.
+
+    Args:
+        emulator: emulator to communicate with, default: new emulator
+        session (boto3.Session): session to use, only needed for its
+            credentials, default: none
+        execution_cache (sfini.execution.cache.ExecutionCache): local
+            cache of finished executions, default: no caching
+    """
+
+    def __init__(
+            self,
+            emulator: Emulator = None,
+            *,
+            session=None,
+            execution_cache=None):
+        super().__init__(session, execution_cache=execution_cache)
+        self.emulator = emulator or Emulator()
+
+    def _create_session(self):
+        return None
+
+    def __str__(self):
+        return "<%s>" % self.emulator
+
+    @property
+    def sfn(self) -> Emulator:
+        """Emulated Step Functions client."""
+        return self.emulator
+
+    @property
+    def sfn_long_poll(self) -> Emulator:
+        """Emulated Step Functions client."""
+        return self.emulator
+
+    @property
+    def region(self) -> str:
+        """Emulated AWS region."""
+        return self.emulator.region
+
+    @property
+    def account_id(self) -> str:
+        """Emulated account ID."""
+        return self.emulator.account_id
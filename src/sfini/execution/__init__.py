@@ -5,7 +5,21 @@ available) output. You can wait on it to finish, and iterate over its
 history.
 """
 
-__all__ = ["Execution", "history"]
+__all__ = [
+    "Execution",
+    "history",
+    "cache",
+    "index",
+    "spans",
+    "analytics",
+    "backlog",
+    "export"]
 
 from ._execution import Execution
 from . import history
+from . import cache
+from . import index
+from . import spans
+from . import analytics
+from . import backlog
+from . import export
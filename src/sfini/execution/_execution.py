@@ -6,11 +6,43 @@ import datetime
 import typing as T
 import logging as lg
 
+from botocore import exceptions as bc_exc
+
 from .. import _util
 from . import history
 
 _logger = lg.getLogger(__name__)
 _default = _util.DefaultParameter()
+_finished_statuses = {
+    "ExecutionSucceeded": "SUCCEEDED",
+    "ExecutionFailed": "FAILED",
+    "ExecutionAborted": "ABORTED",
+    "ExecutionTimedOut": "TIMED_OUT"}
+
+
+def _describe(
+        session: _util.AWSSession,
+        arn: str
+) -> T.Dict[str, _util.JSONable]:
+    """Describe an execution, using the session's execution cache if any.
+
+    Args:
+        session: session to use for AWS communication
+        arn: execution ARN
+
+    Returns:
+        execution description
+    """
+
+    cache = session.execution_cache
+    if cache is not None:
+        resp = cache.get_description(arn)
+        if resp is not None:
+            return resp
+    resp = session.sfn.describe_execution(executionArn=arn)
+    if cache is not None:
+        cache.put_description(arn, resp)
+    return resp
 
 
 class Execution:
@@ -26,6 +58,7 @@ class Execution:
     """
 
     _wait_sleep_time = 3.0
+    _follow_page_size = 100
     _not_provided = object()
 
     def __init__(
@@ -73,7 +106,7 @@ class Execution:
         """
 
         session = session or _util.AWSSession()
-        resp = session.sfn.describe_execution(executionArn=arn)
+        resp = _describe(session, arn)
         assert resp["executionArn"] == arn
         execution_input = _default
         if "input" in resp:
@@ -174,7 +207,7 @@ class Execution:
             _logger.debug("Execution finished: update is unnecessary")
             return
         self._raise_no_arn()
-        resp = self.session.sfn.describe_execution(executionArn=self.arn)
+        resp = _describe(self.session, self.arn)
         assert resp["executionArn"] == self.arn
         self._status = resp["status"]
         self._start_date = resp["startDate"]
@@ -204,20 +237,44 @@ class Execution:
         if self.arn is None:
             raise RuntimeError("Execution '%s' ARN is unknown" % self)
 
-    def start(self):
+    def _derive_arn(self) -> str:
+        """Derive execution ARN from its name and state-machine ARN.
+
+        Returns:
+            execution ARN
+        """
+
+        arn_split = self.state_machine_arn.split(":")
+        arn_split[5] = "execution"
+        return ":".join(arn_split + [self.name])
+
+    def start(self, allow_existing: bool = False):
         """Start this state-machine execution.
 
         Sets the ``arn`` attribute.
+
+        Args:
+            allow_existing: treat an existing execution with the same name
+                as this execution, rather than raising
         """
 
         _util.assert_valid_name(self.name)
         if self.execution_input == _default:
             self.execution_input = {}
         input_str = json.dumps(self.execution_input)
-        resp = self.session.sfn.start_execution(
-            stateMachineArn=self.state_machine_arn,
-            name=self.name,
-            input=input_str)
+        try:
+            resp = self.session.sfn.start_execution(
+                stateMachineArn=self.state_machine_arn,
+                name=self.name,
+                input=input_str)
+        except bc_exc.ClientError as e:
+            if not allow_existing:
+                raise
+            if e.response["Error"]["Code"] != "ExecutionAlreadyExists":
+                raise
+            _logger.info("Execution '%s' already exists" % self)
+            self.arn = self._derive_arn()
+            return
         self.arn = resp["executionArn"]
         self._status = "RUNNING"
         self._start_date = resp["startDate"]
@@ -275,10 +332,116 @@ class Execution:
         """
 
         self._raise_no_arn()
-        resp = _util.collect_paginated(
-            self.session.sfn.get_execution_history,
-            executionArn=self.arn)
-        return history.parse_history(resp["events"])
+        cache = self.session.execution_cache
+        history_events = None
+        if cache is not None:
+            history_events = cache.get_history(self.arn)
+        if history_events is None:
+            resp = _util.collect_paginated(
+                self.session.sfn.get_execution_history,
+                executionArn=self.arn)
+            history_events = resp["events"]
+            if cache is not None:
+                cache.put_history(self.arn, history_events)
+        return history.parse_history(history_events)
+
+    def follow(
+            self,
+            poll_interval: float = None
+    ) -> T.Generator[history.Event, None, None]:
+        """Iterate over history events as they occur.
+
+        Yields events until the execution finishes. Only the last page of
+        history is requested again when polling for new events. If the
+        page token has expired, history is paged from the start again,
+        skipping events already yielded.
+
+        Args:
+            poll_interval: time between polls for new events (seconds),
+                default: execution waiting poll time
+
+        Returns:
+            history of execution events
+        """
+
+        self._raise_no_arn()
+        if poll_interval is None:
+            poll_interval = self._wait_sleep_time
+        kwargs = {
+            "executionArn": self.arn,
+            "maxResults": self._follow_page_size}
+        last_event_id = 0
+        while True:
+            try:
+                resp = self.session.sfn.get_execution_history(**kwargs)
+            except bc_exc.ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code != "InvalidToken" or "nextToken" not in kwargs:
+                    raise
+                _logger.debug("History page token expired for '%s'" % self)
+                del kwargs["nextToken"]
+                continue
+            history_events = [
+                e for e in resp["events"]
+                if e["id"] > last_event_id]
+            for event in history.parse_history(history_events):
+                last_event_id = event.event_id
+                yield event
+                if event.event_type in history.FINISHED_EVENT_TYPES:
+                    return
+            if "nextToken" in resp:
+                kwargs["nextToken"] = resp["nextToken"]
+            else:
+                time.sleep(poll_interval)
+
+    def get_last_events(self, count: int = 1) -> T.List[history.Event]:
+        """List the most recent events of the execution history.
+
+        Only the requested events are downloaded (in reverse order), rather
+        than the whole history.
+
+        Args:
+            count: maximum number of events to get (at most 1000)
+
+        Returns:
+            most recent history events, in order of occurrence
+        """
+
+        self._raise_no_arn()
+        cache = self.session.execution_cache
+        history_events = None
+        if cache is not None:
+            history_events = cache.get_history(self.arn)
+        if history_events is None:
+            resp = self.session.sfn.get_execution_history(
+                executionArn=self.arn,
+                reverseOrder=True,
+                maxResults=count)
+            history_events = resp["events"][::-1]
+        return history.parse_history(history_events[-count:])
+
+    def format_summary(self) -> str:
+        """Format the execution's final (or latest) event for printing.
+
+        Includes any error cause or execution output. Only the last
+        history event is downloaded. Updates the execution status.
+
+        Returns:
+            summary formatted
+        """
+
+        event, = self.get_last_events(count=1)
+        lines = [history.format_event(event)]
+        if event.event_type in _finished_statuses:
+            self._status = _finished_statuses[event.event_type]
+            self._stop_date = event.timestamp
+        if isinstance(event, history.Failed) and event.cause is not None:
+            lines.append("  cause: %s" % event.cause)
+        if event.event_type == "ExecutionSucceeded":
+            self._output = event.output
+            if event.output != _default:
+                lines.append("Output: %s" % json.dumps(event.output))
+        return "\n".join(lines)
 
     def format_history(self) -> str:
         """Format the execution history for printing.
@@ -288,11 +451,7 @@ class Execution:
         """
 
         events = self.get_history()
-        lines = []
-        for event in events:
-            ds = event.details_str
-            line = ("%s:\n  %s" % (event, ds)) if ds else str(event)
-            lines.append(line)
+        lines = [history.format_event(event) for event in events]
         self._update()
         if self._output != _default:
             line = "Output: %s" % json.dumps(self._output)
@@ -0,0 +1,308 @@
+"""Latency analytics across many executions.
+
+Per-state durations, task retry counts and failure codes of many
+executions' histories are collected into columnar NumPy arrays, from
+which percentiles, histograms and trends are computed without looping
+over individual events. Requires ``numpy``.
+"""
+
+import math
+import typing as T
+import logging as lg
+
+from .. import _util
+from . import history
+from . import spans
+
+_logger = lg.getLogger(__name__)
+np = None
+
+
+def _import_numpy():
+    """Import ``numpy`` array-processing module."""
+    global np
+    if np is None:
+        import numpy as np
+
+
+def _state_error(span: spans.StateSpan) -> T.Union[str, None]:
+    """Get error of a state's final task attempt, if it failed."""
+    finished = span.tasks[-1].finished if span.tasks else None
+    return finished.error if isinstance(finished, history.Failed) else None
+
+
+class HistoryTable:
+    """Columnar per-state statistics of many executions.
+
+    Each row is one entering of a state by one execution. Columns are
+    NumPy arrays of equal length. States and errors are stored as
+    integer codes into ``state_names`` and ``error_codes``.
+
+    Args:
+        execution_arns: ARNs of executions in table
+        state_names: names of states in table
+        error_codes: errors of failed states in table
+        execution: index into ``execution_arns`` of each row's execution
+        state: index into ``state_names`` of each row's state
+        start: time each state was entered (POSIX time-stamp)
+        duration: time spent in each state (seconds), NaN if the state
+            didn't exit
+        retries: number of retried task attempts in each state
+        error: index into ``error_codes`` of error of each state's final
+            task attempt, -1 if it didn't fail
+    """
+
+    def __init__(
+            self,
+            execution_arns: T.List[str],
+            state_names: T.List[str],
+            error_codes: T.List[str],
+            execution: "np.ndarray",
+            state: "np.ndarray",
+            start: "np.ndarray",
+            duration: "np.ndarray",
+            retries: "np.ndarray",
+            error: "np.ndarray"):
+        self.execution_arns = execution_arns
+        self.state_names = state_names
+        self.error_codes = error_codes
+        self.execution = execution
+        self.state = state
+        self.start = start
+        self.duration = duration
+        self.retries = retries
+        self.error = error
+
+    def __str__(self):
+        fmt = "history table (%d executions, %d states, %d rows)"
+        return fmt % (
+            len(self.execution_arns),
+            len(self.state_names),
+            len(self.state))
+
+    __repr__ = _util.easy_repr
+
+    @classmethod
+    def from_histories(
+            cls,
+            histories: T.Iterable[T.Tuple[str, T.List[history.Event]]]
+    ) -> "HistoryTable":
+        """Build table from execution histories.
+
+        Args:
+            histories: pairs of execution ARN and its history events
+
+        Returns:
+            table of histories' states
+        """
+
+        _import_numpy()
+        execution_arns = []
+        state_names, state_codes = [], {}
+        error_codes, error_lookup = [], {}
+        execution, state, start, duration, retries, error = (
+            [], [], [], [], [], [])
+        for arn, events in histories:
+            execution_arns.append(arn)
+            j = len(execution_arns) - 1
+            for span in spans.HistoryIndex(events).state_spans:
+                name = span.state_name
+                if name not in state_codes:
+                    state_codes[name] = len(state_names)
+                    state_names.append(name)
+                error_code = _state_error(span)
+                if error_code is not None and error_code not in error_lookup:
+                    error_lookup[error_code] = len(error_codes)
+                    error_codes.append(error_code)
+                span_duration = span.duration
+                execution.append(j)
+                state.append(state_codes[name])
+                start.append(span.entered.timestamp.timestamp())
+                duration.append(
+                    math.nan if span_duration is None else span_duration)
+                retries.append(max(len(span.tasks) - 1, 0))
+                error.append(error_lookup.get(error_code, -1))
+
+        return cls(
+            execution_arns,
+            state_names,
+            error_codes,
+            np.array(execution, dtype=np.int64),
+            np.array(state, dtype=np.int64),
+            np.array(start, dtype=np.float64),
+            np.array(duration, dtype=np.float64),
+            np.array(retries, dtype=np.int64),
+            np.array(error, dtype=np.int64))
+
+    @classmethod
+    def from_executions(
+            cls,
+            executions: T.Iterable,
+            max_workers: int = 10
+    ) -> "HistoryTable":
+        """Build table from executions' histories.
+
+        Histories are fetched concurrently.
+
+        Args:
+            executions (T.Iterable[sfini.execution.Execution]): executions
+                to get histories of
+            max_workers: number of concurrent history requests
+
+        Returns:
+            table of executions' states
+        """
+
+        def get_history(execution):
+            return execution.arn, execution.get_history()
+
+        executions = list(executions)
+        for session in {execution.session for execution in executions}:
+            session.reserve_connections(max_workers)
+        histories = _util.map_concurrent(get_history, executions, max_workers)
+        return cls.from_histories(histories)
+
+    def _state_code(self, state_name: str) -> int:
+        """Get code of state, raising if not in table."""
+        try:
+            return self.state_names.index(state_name)
+        except ValueError:
+            raise KeyError(state_name) from None
+
+    def _finished(self, state_name: str = None) -> "np.ndarray":
+        """Get mask of rows of exited states, optionally for one state."""
+        mask = ~np.isnan(self.duration)
+        if state_name is not None:
+            mask &= self.state == self._state_code(state_name)
+        return mask
+
+    @staticmethod
+    def _group_percentiles(
+            keys: "np.ndarray",
+            values: "np.ndarray",
+            q: T.Sequence[float]
+    ) -> T.Tuple["np.ndarray", "np.ndarray"]:
+        """Compute percentiles of values grouped by key.
+
+        Args:
+            keys: group of each value
+            values: values to compute percentiles of
+            q: percentiles to compute, between 0 and 100
+
+        Returns:
+            sorted unique keys, and percentiles of each key's values with
+                shape (number of keys, number of percentiles)
+        """
+
+        if keys.size == 0:
+            return keys, np.empty((0, len(q)), dtype=np.float64)
+        order = np.lexsort((values, keys))
+        keys, values = keys[order], values[order]
+        unique, splits = np.unique(keys, return_index=True)
+        groups = np.split(values, splits[1:])
+        result = np.empty((len(unique), len(q)), dtype=np.float64)
+        for j, group in enumerate(groups):
+            result[j] = np.percentile(group, q)
+        return unique, result
+
+    def percentiles(
+            self,
+            q: T.Sequence[float] = (50, 95, 99)
+    ) -> T.Dict[str, "np.ndarray"]:
+        """Get percentiles of time spent in each state.
+
+        Only states which exited are included.
+
+        Args:
+            q: percentiles to compute, between 0 and 100
+
+        Returns:
+            percentiles of state durations (seconds), in order of ``q``,
+                keyed by state name
+        """
+
+        mask = self._finished()
+        codes, result = self._group_percentiles(
+            self.state[mask],
+            self.duration[mask],
+            q)
+        return {self.state_names[c]: r for c, r in zip(codes, result)}
+
+    def histogram(
+            self,
+            state_name: str,
+            bins: T.Union[int, T.Sequence[float]] = 10
+    ) -> T.Tuple["np.ndarray", "np.ndarray"]:
+        """Get histogram of time spent in a state.
+
+        Args:
+            state_name: state to get durations of
+            bins: number of bins, or bin edges (seconds)
+
+        Returns:
+            number of entries in each bin, and bin edges (seconds)
+
+        Raises:
+            KeyError: state not in table
+        """
+
+        return np.histogram(self.duration[self._finished(state_name)], bins)
+
+    def trend(
+            self,
+            interval: float,
+            state_name: str = None,
+            q: float = 50
+    ) -> T.Tuple["np.ndarray", "np.ndarray"]:
+        """Get time spent in states over time.
+
+        States are grouped into time intervals by when they were entered.
+
+        Args:
+            interval: length of time intervals (seconds)
+            state_name: state to get durations of, default: all states
+            q: percentile to compute in each interval, between 0 and 100
+
+        Returns:
+            start of each non-empty interval (POSIX time-stamp), and
+                percentile of state durations in each interval (seconds)
+
+        Raises:
+            KeyError: state not in table
+        """
+
+        mask = self._finished(state_name)
+        buckets = np.floor(self.start[mask] / interval).astype(np.int64)
+        buckets, result = self._group_percentiles(
+            buckets,
+            self.duration[mask],
+            [q])
+        return buckets * interval, result[:, 0]
+
+    def retry_counts(self) -> T.Dict[str, int]:
+        """Get total number of task retries in each state.
+
+        Returns:
+            number of retried task attempts, keyed by state name
+        """
+
+        counts = np.bincount(
+            self.state,
+            weights=self.retries,
+            minlength=len(self.state_names))
+        return {n: int(c) for n, c in zip(self.state_names, counts)}
+
+    def failure_counts(self) -> T.Dict[T.Tuple[str, str], int]:
+        """Get number of failed task attempts ending each state, by error.
+
+        Returns:
+            number of failures, keyed by state name and error
+        """
+
+        mask = self.error >= 0
+        keys = self.state[mask] * len(self.error_codes) + self.error[mask]
+        unique, counts = np.unique(keys, return_counts=True)
+        states, errors = np.divmod(unique, max(len(self.error_codes), 1))
+        return {
+            (self.state_names[s], self.error_codes[e]): int(c)
+            for s, e, c in zip(states, errors, counts)}
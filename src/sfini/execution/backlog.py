@@ -0,0 +1,238 @@
+"""Activity queue latency, for scaling workers.
+
+The time between an activity task being scheduled and being started is
+how long the task waited for a free worker. Sample recent executions'
+histories to get the distribution of these waits and the number of
+tasks currently waiting, for each activity. Use these metrics to scale
+the number of workers on demand.
+"""
+
+import time
+import datetime
+import itertools
+import typing as T
+import logging as lg
+
+from .. import _util
+from . import history
+
+_logger = lg.getLogger(__name__)
+
+
+def _percentile(values: T.List[float], q: float) -> T.Union[float, None]:
+    """Compute a percentile with linear interpolation.
+
+    Args:
+        values: values to compute percentile of, in sorted order
+        q: percentile to compute, between 0 and 100
+
+    Returns:
+        percentile, or ``None`` if there are no values
+    """
+
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    fraction = position - lower
+    return values[lower] + (values[upper] - values[lower]) * fraction
+
+
+class ActivityQueueMetric:
+    """Queue latency of an activity's tasks.
+
+    Args:
+        activity_arn: activity ARN
+        timestamp: time of sample
+
+    Attributes:
+        wait_times: time started tasks waited to be started (seconds)
+        waiting_times: time currently waiting tasks have waited so far
+            (seconds)
+    """
+
+    def __init__(self, activity_arn: str, timestamp: datetime.datetime):
+        self.activity_arn = activity_arn
+        self.timestamp = timestamp
+        self.wait_times: T.List[float] = []
+        self.waiting_times: T.List[float] = []
+
+    def __str__(self):
+        fmt = "'%s' queue (%d waiting, median wait: %s seconds)"
+        return fmt % (self.activity_arn, self.backlog, self.percentile(50))
+
+    __repr__ = _util.easy_repr
+
+    @property
+    def backlog(self) -> int:
+        """Number of tasks waiting to be started."""
+        return len(self.waiting_times)
+
+    @property
+    def oldest_wait(self) -> T.Union[float, None]:
+        """Longest time a currently waiting task has waited (seconds)."""
+        return max(self.waiting_times) if self.waiting_times else None
+
+    def percentile(self, q: float) -> T.Union[float, None]:
+        """Get a percentile of started tasks' wait times.
+
+        Args:
+            q: percentile to compute, between 0 and 100
+
+        Returns:
+            wait-time percentile (seconds), or ``None`` if no tasks were
+                started
+        """
+
+        return _percentile(sorted(self.wait_times), q)
+
+    def to_dict(
+            self,
+            percentiles: T.Sequence[int] = (50, 95, 99)
+    ) -> T.Dict[str, _util.JSONable]:
+        """Convert to a JSON-serialisable metric.
+
+        Args:
+            percentiles: wait-time percentiles to include
+
+        Returns:
+            activity ARN, sample time, number of started tasks sampled,
+                wait-time percentiles, backlog and oldest wait
+        """
+
+        wait_times = sorted(self.wait_times)
+        metric = {
+            "activityArn": self.activity_arn,
+            "timestamp": self.timestamp.isoformat(),
+            "samples": len(wait_times)}
+        for q in percentiles:
+            metric["waitP%d" % q] = _percentile(wait_times, q)
+        metric["backlog"] = self.backlog
+        metric["oldestWait"] = self.oldest_wait
+        return metric
+
+
+class QueueLatencySampler:
+    """Sample activity queue latency from recent executions.
+
+    The most recent events of each of the most recent executions are
+    downloaded (newest first, so the download is bounded). Waiting tasks
+    are only counted in the sampled executions, so the backlog is a lower
+    bound when more executions are running than are sampled.
+
+    Args:
+        state_machines (T.List[sfini.state_machine.StateMachine]):
+            state-machines to sample executions of
+        max_executions: maximum number of recent executions to sample,
+            per state-machine
+        max_events: maximum number of recent events to sample, per
+            execution (at most 1000)
+        max_workers: number of concurrent history requests
+    """
+
+    def __init__(
+            self,
+            state_machines: T.List,
+            max_executions: int = 100,
+            max_events: int = 100,
+            max_workers: int = 10):
+        self.state_machines = state_machines
+        self.max_executions = max_executions
+        self.max_events = max_events
+        self.max_workers = max_workers
+
+    def __str__(self):
+        return "queue latency sampler of %d state-machines" % len(
+            self.state_machines)
+
+    __repr__ = _util.easy_repr
+
+    def _iter_executions(self) -> T.Generator[T.Any, None, None]:
+        """Iterate over recent executions of state-machines.
+
+        Returns:
+            T.Generator[sfini.execution.Execution]: recent executions
+        """
+
+        for state_machine in self.state_machines:
+            executions = state_machine.iter_executions()
+            yield from itertools.islice(executions, self.max_executions)
+
+    def _get_events(self, execution) -> T.List[history.Event]:
+        """Get most recent history events of an execution."""
+        return execution.get_last_events(count=self.max_events)
+
+    @staticmethod
+    def _add_events(
+            events: T.List[history.Event],
+            metrics: T.Dict[str, ActivityQueueMetric],
+            now: datetime.datetime):
+        """Add wait times of execution's activity tasks to metrics.
+
+        Args:
+            events: execution history events, in order of occurrence
+            metrics: metrics to update, keyed by activity ARN
+            now: time of sample
+        """
+
+        scheduled = {}
+        for event in events:
+            if isinstance(event, history.ActivityScheduled):
+                scheduled[event.event_id] = event
+            elif event.previous_event_id in scheduled:
+                scheduled_event = scheduled.pop(event.previous_event_id)
+                if isinstance(event, history.ActivityStarted):
+                    metric = metrics.setdefault(
+                        scheduled_event.resource,
+                        ActivityQueueMetric(scheduled_event.resource, now))
+                    wait = event.timestamp - scheduled_event.timestamp
+                    metric.wait_times.append(wait.total_seconds())
+
+        if events and events[-1].event_type in history.FINISHED_EVENT_TYPES:
+            return
+        for scheduled_event in scheduled.values():
+            metric = metrics.setdefault(
+                scheduled_event.resource,
+                ActivityQueueMetric(scheduled_event.resource, now))
+            wait = now - scheduled_event.timestamp
+            metric.waiting_times.append(wait.total_seconds())
+
+    def sample(self) -> T.Dict[str, ActivityQueueMetric]:
+        """Sample recent executions for activity queue latency.
+
+        Returns:
+            queue latency, keyed by activity ARN
+        """
+
+        _logger.debug("Sampling %s" % self)
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        metrics = {}
+        for state_machine in self.state_machines:
+            state_machine.session.reserve_connections(self.max_workers)
+        histories = _util.map_concurrent(
+            self._get_events,
+            self._iter_executions(),
+            self.max_workers)
+        for events in histories:
+            self._add_events(events, metrics, now)
+        _logger.info("Sampled queue latency of %d activities" % len(metrics))
+        return metrics
+
+    def iter_samples(
+            self,
+            interval: float = 60.0
+    ) -> T.Generator[T.Dict[str, ActivityQueueMetric], None, None]:
+        """Sample activity queue latency periodically.
+
+        Args:
+            interval: time between the start of samples (seconds)
+
+        Returns:
+            queue latency, keyed by activity ARN, for each sample
+        """
+
+        while True:
+            t = time.monotonic()
+            yield self.sample()
+            time.sleep(max(interval - (time.monotonic() - t), 0.0))
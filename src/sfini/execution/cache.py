@@ -0,0 +1,229 @@
+"""Local cache of finished executions.
+
+A finished execution's description and history never change, so they
+can be stored locally and re-used instead of being requested from AWS
+Step Functions again. Provide a cache to ``sfini.AWSSession`` to use it
+for all executions in that session.
+"""
+
+import json
+import zlib
+import time
+import sqlite3
+import pathlib
+import datetime
+import threading
+import typing as T
+import logging as lg
+
+from .. import _util
+from . import history
+
+_logger = lg.getLogger(__name__)
+FINISHED_STATUSES = ("SUCCEEDED", "FAILED", "TIMED_OUT", "ABORTED")
+_schema = """
+CREATE TABLE IF NOT EXISTS executions (
+    arn TEXT PRIMARY KEY,
+    description BLOB,
+    history BLOB,
+    size INTEGER NOT NULL DEFAULT 0,
+    accessed REAL NOT NULL
+)
+"""
+
+
+def _json_default(obj):
+    """Encode time-stamps for JSON serialisation."""
+    if isinstance(obj, datetime.datetime):
+        return {"$datetime": obj.timestamp()}
+    raise TypeError("Object of type %s is not serialisable" % type(obj))
+
+
+def _json_object_hook(obj: T.Dict[str, _util.JSONable]):
+    """Decode time-stamps from JSON deserialisation."""
+    if len(obj) == 1 and "$datetime" in obj:
+        tz = datetime.timezone.utc
+        return datetime.datetime.fromtimestamp(obj["$datetime"], tz=tz)
+    return obj
+
+
+def _encode(data) -> bytes:
+    """Serialise and compress API response data."""
+    data_str = json.dumps(data, default=_json_default, separators=(",", ":"))
+    return zlib.compress(data_str.encode("utf-8"))
+
+
+def _decode(data: bytes):
+    """Decompress and deserialise API response data."""
+    data_str = zlib.decompress(data).decode("utf-8")
+    return json.loads(data_str, object_hook=_json_object_hook)
+
+
+class ExecutionCache:
+    """Persistent cache of finished executions' descriptions and histories.
+
+    Stored in an SQLite database, keyed by execution ARN. Only finished
+    executions are stored. When the total (compressed) size of stored
+    data exceeds ``max_size``, least-recently used executions are
+    removed. Safe to share between threads.
+
+    Args:
+        path: database file path, or ':memory:' for a temporary cache
+        max_size: maximum total size of stored data (bytes)
+    """
+
+    def __init__(
+            self,
+            path: T.Union[str, pathlib.Path],
+            max_size: int = 256 * 1024 ** 2):
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(path),
+            check_same_thread=False)
+        with self._connection:
+            self._connection.execute(_schema)
+
+    def __str__(self):
+        return "'%s' execution cache" % self.path
+
+    __repr__ = _util.easy_repr
+
+    def _get(self, arn: str, column: str) -> T.Union[bytes, None]:
+        """Get stored data for an execution, marking it as used.
+
+        Args:
+            arn: execution ARN
+            column: data to get: 'description' or 'history'
+
+        Returns:
+            stored data, or ``None`` if not stored
+        """
+
+        query = "SELECT %s FROM executions WHERE arn = ?" % column
+        with self._lock, self._connection:
+            row = self._connection.execute(query, (arn,)).fetchone()
+            if row is None or row[0] is None:
+                return None
+            self._connection.execute(
+                "UPDATE executions SET accessed = ? WHERE arn = ?",
+                (time.time(), arn))
+        _logger.debug("Found %s of '%s' in cache" % (column, arn))
+        return row[0]
+
+    def _put(self, arn: str, column: str, data: bytes):
+        """Store data for an execution, evicting old data if necessary.
+
+        Args:
+            arn: execution ARN
+            column: data to store: 'description' or 'history'
+            data: data to store
+        """
+
+        _logger.debug("Storing %s of '%s' in cache" % (column, arn))
+        update = "UPDATE executions SET %s = ?, accessed = ? WHERE arn = ?"
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO executions (arn, accessed) "
+                "VALUES (?, ?)",
+                (arn, time.time()))
+            self._connection.execute(update % column, (data, time.time(), arn))
+            self._connection.execute(
+                "UPDATE executions SET size = "
+                "length(coalesce(description, '')) + "
+                "length(coalesce(history, '')) WHERE arn = ?",
+                (arn,))
+            self._evict()
+
+    def _evict(self):
+        """Remove least-recently used executions until below size limit."""
+        query = "SELECT coalesce(sum(size), 0) FROM executions"
+        excess = self._connection.execute(query).fetchone()[0] - self.max_size
+        if excess <= 0:
+            return
+        rows = self._connection.execute(
+            "SELECT arn, size FROM executions ORDER BY accessed")
+        arns = []
+        for arn, size in rows:
+            if excess <= 0:
+                break
+            arns.append((arn,))
+            excess -= size
+        _logger.debug("Evicting %d executions from cache" % len(arns))
+        self._connection.executemany(
+            "DELETE FROM executions WHERE arn = ?",
+            arns)
+
+    def get_description(
+            self,
+            arn: str
+    ) -> T.Union[T.Dict[str, _util.JSONable], None]:
+        """Get a stored execution description.
+
+        Args:
+            arn: execution ARN
+
+        Returns:
+            execution description, as provided by AWS API, or ``None`` if
+                not stored
+        """
+
+        data = self._get(arn, "description")
+        return None if data is None else _decode(data)
+
+    def put_description(self, arn: str, resp: T.Dict[str, _util.JSONable]):
+        """Store an execution description, if the execution is finished.
+
+        Args:
+            arn: execution ARN
+            resp: execution description, as provided by AWS API
+        """
+
+        if resp["status"] not in FINISHED_STATUSES:
+            return
+        self._put(arn, "description", _encode(resp))
+
+    def get_history(
+            self,
+            arn: str
+    ) -> T.Union[T.List[T.Dict[str, _util.JSONable]], None]:
+        """Get a stored execution history.
+
+        Args:
+            arn: execution ARN
+
+        Returns:
+            history events, as provided by AWS API, or ``None`` if not
+                stored
+        """
+
+        data = self._get(arn, "history")
+        return None if data is None else _decode(data)
+
+    def put_history(
+            self,
+            arn: str,
+            history_events: T.List[T.Dict[str, _util.JSONable]]):
+        """Store an execution history, if the execution is finished.
+
+        Args:
+            arn: execution ARN
+            history_events: history events, as provided by AWS API
+        """
+
+        if not history_events:
+            return
+        if history_events[-1]["type"] not in history.FINISHED_EVENT_TYPES:
+            return
+        self._put(arn, "history", _encode(history_events))
+
+    def clear(self):
+        """Remove all stored executions."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM executions")
+
+    def close(self):
+        """Close the cache database."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,223 @@
+"""Bulk export of execution histories.
+
+History events of many executions are streamed, page by page, into
+flat rows with standard columns, then written as Parquet (using Apache
+Arrow record batches) or as newline-delimited JSON. At most one page of
+history and one batch of rows is held in memory at a time. Parquet
+export requires ``pyarrow``.
+"""
+
+import json
+import pathlib
+import typing as T
+import logging as lg
+
+from .. import _util
+from . import history
+
+_logger = lg.getLogger(__name__)
+COLUMNS = (
+    "execution_arn",
+    "event_id",
+    "event_type",
+    "timestamp",
+    "state_name",
+    "previous_event_id",
+    "error")
+pa = None
+pq = None
+
+
+def _import_pyarrow():
+    """Import ``pyarrow`` columnar-data and Parquet modules."""
+    global pa, pq
+    if pa is None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+
+def _iter_history_events(
+        execution
+) -> T.Generator[T.Dict[str, _util.JSONable], None, None]:
+    """Iterate over an execution's history events, page by page.
+
+    Args:
+        execution (sfini.execution.Execution): execution to get history
+            of
+
+    Returns:
+        history events, as provided by AWS API
+    """
+
+    cache = execution.session.execution_cache
+    if cache is not None:
+        history_events = cache.get_history(execution.arn)
+        if history_events is not None:
+            yield from history_events
+            return
+    pages = _util.iter_paginated(
+        execution.session.sfn.get_execution_history,
+        executionArn=execution.arn)
+    for page in pages:
+        yield from page["events"]
+
+
+def _flatten(
+        execution_arn: str,
+        history_event: T.Dict[str, _util.JSONable]
+) -> tuple:
+    """Flatten an history event into a row of standard columns.
+
+    Args:
+        execution_arn: ARN of event's execution
+        history_event: history event, as provided by AWS API
+
+    Returns:
+        event values, in order of ``COLUMNS``
+    """
+
+    details = history_event.get(
+        history._type_keys.get(history_event["type"]),
+        {})
+    return (
+        execution_arn,
+        history_event["id"],
+        history_event["type"],
+        history_event["timestamp"],
+        details.get("name"),
+        history_event.get("previousEventId"),
+        details.get("error"))
+
+
+def iter_rows(executions: T.Iterable) -> T.Generator[tuple, None, None]:
+    """Iterate over executions' history events as flat rows.
+
+    Args:
+        executions (T.Iterable[sfini.execution.Execution]): executions to
+            export, can be lazy (eg
+            ``sfini.state_machine.StateMachine.iter_executions``)
+
+    Returns:
+        event values, in order of ``COLUMNS``
+    """
+
+    for execution in executions:
+        _logger.debug("Exporting history of %s" % execution)
+        for history_event in _iter_history_events(execution):
+            yield _flatten(execution.arn, history_event)
+
+
+def iter_column_batches(
+        executions: T.Iterable,
+        batch_size: int = 10000
+) -> T.Generator[T.Dict[str, list], None, None]:
+    """Iterate over executions' history events in column batches.
+
+    Args:
+        executions (T.Iterable[sfini.execution.Execution]): executions to
+            export, can be lazy
+        batch_size: maximum number of events in each batch
+
+    Returns:
+        event values of each column, keyed by column name
+    """
+
+    batch = [[] for _ in COLUMNS]
+    for row in iter_rows(executions):
+        for column, value in zip(batch, row):
+            column.append(value)
+        if len(batch[0]) >= batch_size:
+            yield dict(zip(COLUMNS, batch))
+            batch = [[] for _ in COLUMNS]
+    if batch[0]:
+        yield dict(zip(COLUMNS, batch))
+
+
+def _schema():
+    """Get Arrow schema of exported events."""
+    return pa.schema([
+        ("execution_arn", pa.string()),
+        ("event_id", pa.int64()),
+        ("event_type", pa.string()),
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("state_name", pa.string()),
+        ("previous_event_id", pa.int64()),
+        ("error", pa.string())])
+
+
+def iter_record_batches(
+        executions: T.Iterable,
+        batch_size: int = 10000
+) -> T.Generator["pa.RecordBatch", None, None]:
+    """Iterate over executions' history events as Arrow record batches.
+
+    Args:
+        executions (T.Iterable[sfini.execution.Execution]): executions to
+            export, can be lazy
+        batch_size: maximum number of events in each batch
+
+    Returns:
+        events, with columns ``COLUMNS``
+    """
+
+    _import_pyarrow()
+    schema = _schema()
+    for batch in iter_column_batches(executions, batch_size=batch_size):
+        yield pa.RecordBatch.from_pydict(batch, schema=schema)
+
+
+def write_parquet(
+        executions: T.Iterable,
+        path: T.Union[str, pathlib.Path],
+        batch_size: int = 10000
+) -> int:
+    """Export executions' history events to a Parquet file.
+
+    Each batch is written as a row group.
+
+    Args:
+        executions (T.Iterable[sfini.execution.Execution]): executions to
+            export, can be lazy
+        path: Parquet file path
+        batch_size: maximum number of events in each row group
+
+    Returns:
+        number of events exported
+    """
+
+    _import_pyarrow()
+    n_events = 0
+    with pq.ParquetWriter(str(path), _schema()) as writer:
+        for batch in iter_record_batches(executions, batch_size=batch_size):
+            writer.write_batch(batch)
+            n_events += batch.num_rows
+    _logger.info("Exported %d events to '%s'" % (n_events, path))
+    return n_events
+
+
+def write_ndjson(
+        executions: T.Iterable,
+        path: T.Union[str, pathlib.Path]
+) -> int:
+    """Export executions' history events to a newline-delimited JSON file.
+
+    Time-stamps are written in ISO 8601 format.
+
+    Args:
+        executions (T.Iterable[sfini.execution.Execution]): executions to
+            export, can be lazy
+        path: JSON file path
+
+    Returns:
+        number of events exported
+    """
+
+    n_events = 0
+    with open(str(path), "w") as f:
+        for row in iter_rows(executions):
+            record = dict(zip(COLUMNS, row))
+            record["timestamp"] = record["timestamp"].isoformat()
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            n_events += 1
+    _logger.info("Exported %d events to '%s'" % (n_events, path))
+    return n_events
@@ -12,6 +12,11 @@ from .. import _util
 
 _logger = lg.getLogger(__name__)
 _default = _util.DefaultParameter()
+FINISHED_EVENT_TYPES = (
+    "ExecutionSucceeded",
+    "ExecutionFailed",
+    "ExecutionAborted",
+    "ExecutionTimedOut")
 _type_keys = {
     "ActivityFailed": "activityFailedEventDetails",
     "ActivityScheduleFailed": "activityScheduleFailedEventDetails",
@@ -508,3 +513,17 @@ def parse_history(
         event = eclass.from_history_event(history_event)
         events.append(event)
     return events
+
+
+def format_event(event: Event) -> str:
+    """Format an history event for printing.
+
+    Args:
+        event: execution history event
+
+    Returns:
+        event and its details, formatted
+    """
+
+    ds = event.details_str
+    return ("%s:\n  %s" % (event, ds)) if ds else str(event)
@@ -0,0 +1,387 @@
+"""Local index of state-machine executions.
+
+Executions listed from AWS Step Functions are stored in a local SQLite
+database, which is then incrementally updated. Query the index to get
+execution counts and durations without listing every execution again.
+"""
+
+import sqlite3
+import pathlib
+import datetime
+import threading
+import typing as T
+import logging as lg
+
+from botocore import exceptions as bc_exc
+
+from .. import _util
+
+_logger = lg.getLogger(__name__)
+_schema = (
+    """
+    CREATE TABLE IF NOT EXISTS executions (
+        arn TEXT PRIMARY KEY,
+        state_machine_arn TEXT NOT NULL,
+        name TEXT NOT NULL,
+        status TEXT NOT NULL,
+        start REAL NOT NULL,
+        stop REAL,
+        duration REAL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS executions_start
+    ON executions (state_machine_arn, start)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS executions_status_start
+    ON executions (state_machine_arn, status, start)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS executions_duration
+    ON executions (state_machine_arn, duration)
+    """)
+_columns = "arn, name, status, start, stop, duration"
+
+
+def _timestamp(dt: T.Union[datetime.datetime, None]) -> T.Union[float, None]:
+    """Convert a time to a POSIX time-stamp."""
+    return None if dt is None else dt.timestamp()
+
+
+def _datetime(ts: T.Union[float, None]) -> T.Union[datetime.datetime, None]:
+    """Convert a POSIX time-stamp to an aware time."""
+    tz = datetime.timezone.utc
+    return None if ts is None else datetime.datetime.fromtimestamp(ts, tz=tz)
+
+
+def _item_row(
+        item: T.Dict[str, _util.JSONable]
+) -> T.Tuple[
+        str,
+        str,
+        str,
+        str,
+        float,
+        T.Union[float, None],
+        T.Union[float, None]]:
+    """Convert an execution list-item or description to a database row."""
+    start = _timestamp(item["startDate"])
+    stop = _timestamp(item.get("stopDate"))
+    duration = None if stop is None else stop - start
+    return (
+        item["executionArn"],
+        item["stateMachineArn"],
+        item["name"],
+        item["status"],
+        start,
+        stop,
+        duration)
+
+
+class ExecutionIndex:
+    """Local SQLite index of a state-machine's executions.
+
+    Call ``sync`` to update the index from AWS Step Functions. Safe to
+    share between threads.
+
+    Args:
+        state_machine (sfini.state_machine.StateMachine): state-machine
+            to index executions of
+        path: database file path, or ':memory:' for a temporary index
+    """
+
+    def __init__(self, state_machine, path: T.Union[str, pathlib.Path]):
+        self.state_machine = state_machine
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(path),
+            check_same_thread=False)
+        with self._connection:
+            [self._connection.execute(s) for s in _schema]
+
+    def __str__(self):
+        return "'%s' execution index of %s" % (self.path, self.state_machine)
+
+    __repr__ = _util.easy_repr
+
+    def _is_known(self, arn: str) -> bool:
+        """Check if an execution is in the index.
+
+        Args:
+            arn: execution ARN
+
+        Returns:
+            if execution is indexed
+        """
+
+        query = "SELECT 1 FROM executions WHERE arn = ?"
+        return self._connection.execute(query, (arn,)).fetchone() is not None
+
+    def _insert(self, items: T.List[T.Dict[str, _util.JSONable]]):
+        """Add executions to the index, replacing existing entries.
+
+        Args:
+            items: execution list-items or descriptions
+        """
+
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [_item_row(item) for item in items])
+
+    def _sync_new(self) -> int:
+        """Add executions newer than the newest indexed execution.
+
+        Returns:
+            number of executions added
+        """
+
+        pages = _util.iter_paginated(
+            self.state_machine.session.sfn.list_executions,
+            stateMachineArn=self.state_machine.arn)
+        n_added = 0
+        for page in pages:
+            items = []
+            for item in page["executions"]:
+                if self._is_known(item["executionArn"]):
+                    break
+                items.append(item)
+            else:
+                self._insert(items)
+                n_added += len(items)
+                continue
+            self._insert(items)
+            n_added += len(items)
+            break
+        return n_added
+
+    def _sync_running(self) -> int:
+        """Update indexed running executions which have since finished.
+
+        Executions which no longer exist (eg purged after their retention
+        period) are removed from the index.
+
+        Returns:
+            number of executions updated
+        """
+
+        rows = self._connection.execute(
+            "SELECT arn FROM executions "
+            "WHERE state_machine_arn = ? AND status = 'RUNNING'",
+            (self.state_machine.arn,))
+        indexed_running = {arn for arn, in rows}
+        if not indexed_running:
+            return 0
+
+        resp = _util.collect_paginated(
+            self.state_machine.session.sfn.list_executions,
+            stateMachineArn=self.state_machine.arn,
+            statusFilter="RUNNING")
+        running = {item["executionArn"] for item in resp["executions"]}
+        finished = indexed_running - running
+        describe = self.state_machine.session.sfn.describe_execution
+        items = []
+        for arn in sorted(finished):
+            try:
+                items.append(describe(executionArn=arn))
+            except bc_exc.ClientError as e:
+                if e.response["Error"]["Code"] != "ExecutionDoesNotExist":
+                    raise
+                _logger.debug("Removing missing execution '%s'" % arn)
+                self._connection.execute(
+                    "DELETE FROM executions WHERE arn = ?",
+                    (arn,))
+        self._insert(items)
+        return len(items)
+
+    def sync(self):
+        """Update the index from AWS Step Functions.
+
+        Executions are listed newest-first, stopping at the newest
+        already-indexed execution, then indexed executions which were
+        running are updated. The update is applied atomically.
+        """
+
+        _logger.info("Syncing %s" % self)
+        with self._lock, self._connection:
+            n_added = self._sync_new()
+            n_updated = self._sync_running()
+        fmt = "Added %d and updated %d executions in %s"
+        _logger.info(fmt % (n_added, n_updated, self))
+
+    def _where(
+            self,
+            status: str = None,
+            since: datetime.datetime = None,
+            until: datetime.datetime = None,
+            min_duration: float = None,
+            max_duration: float = None
+    ) -> T.Tuple[str, T.List[T.Union[str, float]]]:
+        """Build query filter.
+
+        Args:
+            status: only include executions with this status
+            since: only include executions started at or after this time
+            until: only include executions started before this time
+            min_duration: only include executions which ran for at least
+                this long (seconds)
+            max_duration: only include executions which ran for at most
+                this long (seconds)
+
+        Returns:
+            query 'WHERE' clause and its parameters
+        """
+
+        clauses = ["state_machine_arn = ?"]
+        params = [self.state_machine.arn]
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("start >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("start < ?")
+            params.append(_timestamp(until))
+        if min_duration is not None:
+            clauses.append("duration >= ?")
+            params.append(min_duration)
+        if max_duration is not None:
+            clauses.append("duration <= ?")
+            params.append(max_duration)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def count(
+            self,
+            status: str = None,
+            since: datetime.datetime = None,
+            until: datetime.datetime = None
+    ) -> int:
+        """Count indexed executions.
+
+        Args:
+            status: only count executions with this status
+            since: only count executions started at or after this time
+            until: only count executions started before this time
+
+        Returns:
+            number of executions
+        """
+
+        where, params = self._where(status=status, since=since, until=until)
+        query = "SELECT count(*) FROM executions" + where
+        with self._lock:
+            return self._connection.execute(query, params).fetchone()[0]
+
+    def durations(
+            self,
+            status: str = None,
+            since: datetime.datetime = None,
+            until: datetime.datetime = None
+    ) -> T.List[float]:
+        """Get durations of indexed finished executions, in sorted order.
+
+        Args:
+            status: only include executions with this status
+            since: only include executions started at or after this time
+            until: only include executions started before this time
+
+        Returns:
+            execution durations (seconds)
+        """
+
+        where, params = self._where(status=status, since=since, until=until)
+        query = (
+            "SELECT duration FROM executions" + where +
+            " AND duration IS NOT NULL ORDER BY duration")
+        with self._lock:
+            return [d for d, in self._connection.execute(query, params)]
+
+    def median_duration(
+            self,
+            status: str = None,
+            since: datetime.datetime = None,
+            until: datetime.datetime = None
+    ) -> T.Union[float, None]:
+        """Get median duration of indexed finished executions.
+
+        Args:
+            status: only include executions with this status
+            since: only include executions started at or after this time
+            until: only include executions started before this time
+
+        Returns:
+            median execution duration (seconds), or ``None`` if there are
+                no matching finished executions
+        """
+
+        where, params = self._where(status=status, since=since, until=until)
+        where += " AND duration IS NOT NULL"
+        count_query = "SELECT count(*) FROM executions" + where
+        query = (
+            "SELECT duration FROM executions" + where +
+            " ORDER BY duration LIMIT ? OFFSET ?")
+        with self._lock:
+            n = self._connection.execute(count_query, params).fetchone()[0]
+            if n == 0:
+                return None
+            limit = 2 - n % 2
+            offset = (n - 1) // 2
+            rows = self._connection.execute(query, params + [limit, offset])
+            middle = [d for d, in rows]
+        return sum(middle) / len(middle)
+
+    def query(
+            self,
+            status: str = None,
+            since: datetime.datetime = None,
+            until: datetime.datetime = None,
+            min_duration: float = None,
+            max_duration: float = None,
+            limit: int = None
+    ) -> T.List[T.Dict[str, T.Any]]:
+        """Get indexed executions, newest first.
+
+        Args:
+            status: only include executions with this status
+            since: only include executions started at or after this time
+            until: only include executions started before this time
+            min_duration: only include executions which ran for at least
+                this long (seconds)
+            max_duration: only include executions which ran for at most
+                this long (seconds)
+            limit: maximum number of executions to get, default: no limit
+
+        Returns:
+            executions' ARN, name, status, start-date, stop-date and
+                duration (seconds)
+        """
+
+        where, params = self._where(
+            status=status,
+            since=since,
+            until=until,
+            min_duration=min_duration,
+            max_duration=max_duration)
+        query = "SELECT %s FROM executions" % _columns + where
+        query += " ORDER BY start DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [
+            {
+                "arn": arn,
+                "name": name,
+                "status": status_,
+                "start_date": _datetime(start),
+                "stop_date": _datetime(stop),
+                "duration": duration}
+            for arn, name, status_, start, stop, duration in rows]
+
+    def close(self):
+        """Close the index database."""
+        with self._lock:
+            self._connection.close()
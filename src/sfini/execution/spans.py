@@ -0,0 +1,370 @@
+"""Execution history spans, for latency analysis.
+
+Links execution history events to their causes, and pairs events into
+spans: state spans (state entered to exited) and task spans (task
+scheduled, started and finished). Use ``HistoryIndex`` to find which
+states dominate an execution's latency.
+"""
+
+import datetime
+import typing as T
+import logging as lg
+
+from .. import _util
+from . import history
+
+_logger = lg.getLogger(__name__)
+_task_started_types = ("ActivityStarted", "LambdaFunctionStarted")
+_task_finished_types = (
+    "ActivityFailed",
+    "ActivitySucceeded",
+    "ActivityTimedOut",
+    "LambdaFunctionFailed",
+    "LambdaFunctionSucceeded",
+    "LambdaFunctionTimedOut")
+
+
+def _seconds_between(
+        start: datetime.datetime,
+        end: datetime.datetime
+) -> T.Union[float, None]:
+    """Get time between time-stamps, or ``None`` if either is unknown."""
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds()
+
+
+class StateSpan:
+    """Time spent in a state.
+
+    Args:
+        entered: state-enter event
+        exited: state-exit event, ``None`` if the state didn't exit
+
+    Attributes:
+        previous: span of state executed before this state in the same
+            branch, ``None`` if first state of branch
+        parent: span of 'Parallel' state containing this state, ``None``
+            if not in a branch
+        children: spans of states in this state's branches
+        tasks: task attempts of this state, in order of scheduling
+    """
+
+    def __init__(
+            self,
+            entered: history.StateEntered,
+            exited: history.StateExited = None):
+        self.entered = entered
+        self.exited = exited
+        self.previous: T.Union["StateSpan", None] = None
+        self.parent: T.Union["StateSpan", None] = None
+        self.children: T.List["StateSpan"] = []
+        self.tasks: T.List["TaskSpan"] = []
+
+    def __str__(self):
+        return "%s (%s seconds)" % (self.state_name, self.duration)
+
+    __repr__ = _util.easy_repr
+
+    @property
+    def state_name(self) -> str:
+        """State name."""
+        return self.entered.state_name
+
+    @property
+    def duration(self) -> T.Union[float, None]:
+        """Wall time spent in state (seconds), if state exited."""
+        exit_time = None if self.exited is None else self.exited.timestamp
+        return _seconds_between(self.entered.timestamp, exit_time)
+
+
+class TaskSpan:
+    """Time spent waiting for and executing a task.
+
+    Args:
+        state_name: name of task's state
+        scheduled: task-schedule event
+        started: task-start event, ``None`` if task didn't start
+        finished: task-finish event, ``None`` if task didn't finish
+
+    Attributes:
+        state_span: span of task's state, if known
+    """
+
+    def __init__(
+            self,
+            state_name: T.Union[str, None],
+            scheduled: history.LambdaFunctionScheduled,
+            started: history.Event = None,
+            finished: history.Event = None):
+        self.state_name = state_name
+        self.scheduled = scheduled
+        self.started = started
+        self.finished = finished
+        self.state_span: T.Union[StateSpan, None] = None
+
+    def __str__(self):
+        fmt = "%s (queued %s seconds, executed %s seconds)"
+        return fmt % (self.state_name, self.queue_time, self.execution_time)
+
+    __repr__ = _util.easy_repr
+
+    @property
+    def resource(self) -> str:
+        """Task resource ARN."""
+        return self.scheduled.resource
+
+    @property
+    def queue_time(self) -> T.Union[float, None]:
+        """Time from task being scheduled to started (seconds)."""
+        start_time = None if self.started is None else self.started.timestamp
+        return _seconds_between(self.scheduled.timestamp, start_time)
+
+    @property
+    def execution_time(self) -> T.Union[float, None]:
+        """Time from task being started to finished (seconds)."""
+        if self.started is None or self.finished is None:
+            return None
+        return _seconds_between(
+            self.started.timestamp,
+            self.finished.timestamp)
+
+
+class HistoryIndex:
+    """Index of an execution's history, linking events into spans.
+
+    Built in one pass over the history.
+
+    Args:
+        events: execution history events, in order of occurrence
+
+    Attributes:
+        state_spans: time spent in states, in order of entering
+        task_spans: time spent on tasks, in order of scheduling
+    """
+
+    def __init__(self, events: T.List[history.Event]):
+        self.events = events
+        self._events_by_id: T.Dict[int, history.Event] = {}
+        self._effects: T.Dict[int, T.List[history.Event]] = {}
+        self._spans_by_event_id: T.Dict[int, StateSpan] = {}
+        self.state_spans: T.List[StateSpan] = []
+        self.task_spans: T.List[TaskSpan] = []
+        self._build()
+
+    def __str__(self):
+        fmt = "history index (%d events, %d state spans, %d task spans)"
+        return fmt % (
+            len(self.events),
+            len(self.state_spans),
+            len(self.task_spans))
+
+    __repr__ = _util.easy_repr
+
+    def _find_previous(
+            self,
+            entered: history.StateEntered
+    ) -> T.Tuple[T.Union[StateSpan, None], T.Union[StateSpan, None]]:
+        """Find the span preceding a state, following causal events.
+
+        Args:
+            entered: state-enter event
+
+        Returns:
+            previous span in branch, and containing 'Parallel' state span
+        """
+
+        event = self.cause(entered)
+        while event is not None:
+            if event.event_type == "ParallelStateStarted":
+                parent_id = event.previous_event_id
+                return None, self._spans_by_event_id.get(parent_id)
+            span = self._spans_by_event_id.get(event.event_id)
+            if span is not None:
+                return span, span.parent
+            event = self.cause(event)
+        return None, None
+
+    def _find_state(
+            self,
+            event: history.Event
+    ) -> T.Union[StateSpan, None]:
+        """Find the span of the state an event occurred in.
+
+        Args:
+            event: event in a state, eg task-schedule event
+
+        Returns:
+            state span, or ``None`` if not found
+        """
+
+        while event is not None:
+            if isinstance(event, history.StateEntered):
+                return self._spans_by_event_id.get(event.event_id)
+            event = self.cause(event)
+        return None
+
+    def _build(self):
+        """Index events and build spans."""
+        open_states: T.Dict[str, T.List[StateSpan]] = {}
+        tasks_by_event_id: T.Dict[int, TaskSpan] = {}
+
+        for event in self.events:
+            self._events_by_id[event.event_id] = event
+            if event.previous_event_id is not None:
+                effects = self._effects.setdefault(event.previous_event_id, [])
+                effects.append(event)
+
+            if isinstance(event, history.StateEntered):
+                span = StateSpan(event)
+                span.previous, span.parent = self._find_previous(event)
+                if span.parent is not None:
+                    span.parent.children.append(span)
+                self._spans_by_event_id[event.event_id] = span
+                open_states.setdefault(event.state_name, []).append(span)
+                self.state_spans.append(span)
+
+            elif isinstance(event, history.StateExited):
+                spans = open_states.get(event.state_name)
+                if not spans:
+                    fmt = "No state-enter event for exit event '%s'"
+                    _logger.warning(fmt % event)
+                    continue
+                span = spans.pop()
+                span.exited = event
+                self._spans_by_event_id[event.event_id] = span
+
+            elif isinstance(event, history.LambdaFunctionScheduled):
+                state_span = self._find_state(event)
+                state_name = None if state_span is None else (
+                    state_span.state_name)
+                task = TaskSpan(state_name, event)
+                task.state_span = state_span
+                if state_span is not None:
+                    state_span.tasks.append(task)
+                tasks_by_event_id[event.event_id] = task
+                self.task_spans.append(task)
+
+            elif event.previous_event_id in tasks_by_event_id:
+                task = tasks_by_event_id[event.previous_event_id]
+                if event.event_type in _task_started_types:
+                    task.started = event
+                    tasks_by_event_id[event.event_id] = task
+                elif event.event_type in _task_finished_types:
+                    task.finished = event
+
+    def cause(self, event: history.Event) -> T.Union[history.Event, None]:
+        """Get the event which caused an event.
+
+        Args:
+            event: event to get cause of
+
+        Returns:
+            causal event, or ``None`` if event has no cause
+        """
+
+        return self._events_by_id.get(event.previous_event_id)
+
+    def effects(self, event: history.Event) -> T.List[history.Event]:
+        """Get the events caused by an event.
+
+        Args:
+            event: event to get effects of
+
+        Returns:
+            events with the given event as their cause
+        """
+
+        return list(self._effects.get(event.event_id, []))
+
+    def state_durations(self) -> T.Dict[str, float]:
+        """Total wall time spent in each state.
+
+        States executed multiple times (eg in loops) are summed. Only
+        states which exited are included.
+
+        Returns:
+            time spent (seconds), keyed by state name
+        """
+
+        durations = {}
+        for span in self.state_spans:
+            if span.duration is not None:
+                durations.setdefault(span.state_name, 0.0)
+                durations[span.state_name] += span.duration
+        return durations
+
+    def task_queue_times(self) -> T.Dict[str, float]:
+        """Total time tasks waited to be started, for each state.
+
+        Returns:
+            time waiting (seconds), keyed by task state name
+        """
+
+        times = {}
+        for task in self.task_spans:
+            if task.queue_time is not None:
+                times.setdefault(task.state_name, 0.0)
+                times[task.state_name] += task.queue_time
+        return times
+
+    def task_execution_times(self) -> T.Dict[str, float]:
+        """Total time tasks took to execute, for each state.
+
+        Returns:
+            time executing (seconds), keyed by task state name
+        """
+
+        times = {}
+        for task in self.task_spans:
+            if task.execution_time is not None:
+                times.setdefault(task.state_name, 0.0)
+                times[task.state_name] += task.execution_time
+        return times
+
+    @staticmethod
+    def _end_time(span: StateSpan) -> datetime.datetime:
+        """Get time span ended, or started if it didn't end."""
+        return (span.exited or span.entered).timestamp
+
+    def _path_to(
+            self,
+            span: StateSpan,
+            has_next: T.Set[int]
+    ) -> T.List[StateSpan]:
+        """Get critical path ending at a span, within its branch.
+
+        Args:
+            span: final span of path
+            has_next: identities of spans which have a following span
+
+        Returns:
+            spans on critical path, in order of occurrence
+        """
+
+        path = []
+        while span is not None:
+            if span.children:
+                ends = [c for c in span.children if id(c) not in has_next]
+                last = max(ends, key=self._end_time)
+                path.extend(self._path_to(last, has_next)[::-1])
+            path.append(span)
+            span = span.previous
+        return path[::-1]
+
+    def critical_path(self) -> T.List[StateSpan]:
+        """Get the chain of state spans which determined execution time.
+
+        For 'Parallel' states, the path continues into the branch which
+        finished last (listed after the 'Parallel' state).
+
+        Returns:
+            spans on critical path, in order of occurrence
+        """
+
+        top_level = [s for s in self.state_spans if s.parent is None]
+        if not top_level:
+            return []
+        last = max(top_level, key=self._end_time)
+        has_next = {id(s.previous) for s in self.state_spans}
+        return self._path_to(last, has_next)
@@ -4,6 +4,7 @@ import typing as T
 import logging as lg
 
 from .. import _util
+from .. import _jsonpath
 
 _logger = lg.getLogger(__name__)
 _default = _util.DefaultParameter()
@@ -18,6 +19,21 @@ STATES_ERRORS = (
     "NoChoiceMatched")
 
 
+def _validate_path(path: T.Union[str, None], reference: bool = True):
+    """Validate a state's path, if provided.
+
+    Args:
+        path: path to validate
+        reference: path must be a reference path
+
+    Raises:
+        ValueError: invalid path
+    """
+
+    if isinstance(path, str):
+        _jsonpath.validate(path, reference=reference)
+
+
 class State:
     """Abstract state.
 
@@ -35,6 +51,8 @@ class State:
             comment: str = _default,
             input_path: T.Union[str, None] = _default,
             output_path: T.Union[str, None] = _default):
+        _validate_path(input_path, reference=False)
+        _validate_path(output_path, reference=False)
         self.name = name
         self.comment = comment
         self.input_path = input_path
@@ -46,10 +64,21 @@ class State:
 
     __repr__ = _util.easy_repr
 
+    def _get_next_states(self) -> T.List["State"]:
+        """Get the states this state can transition to.
+
+        Returns:
+            next states, in definition order
+        """
+
+        return []
+
     def add_to(self, states):
         """Add this state to a state-machine definition.
 
-        Any child states will also be added to the definition.
+        Any child states will also be added to the definition, in
+        depth-first order. The state graph is walked iteratively, so long
+        chains of states don't reach the recursion limit.
 
         Args:
             states (dict[str, State]): state-machine states
@@ -59,6 +88,13 @@ class State:
         if states.get(self.name, self) != self:
             raise ValueError("State name '%s' already registered" % self.name)
         states[self.name] = self
+        stack = self._get_next_states()[::-1]
+        while stack:
+            state = stack.pop()
+            if state.name in states:
+                continue
+            states[state.name] = state
+            stack.extend(state._get_next_states()[::-1])
 
     def to_dict(self) -> T.Dict[str, _util.JSONable]:
         """Convert this state to a definition dictionary.
@@ -104,10 +140,11 @@ class HasNext(State):
             output_path=output_path)
         self.next: T.Union[State, None] = None
 
-    def add_to(self, states):
-        super().add_to(states)
-        if self.next is not None and self.next.name not in states:
-            self.next.add_to(states)
+    def _get_next_states(self):
+        next_states = super()._get_next_states()
+        if self.next is not None:
+            next_states.append(self.next)
+        return next_states
 
     def goes_to(self, state: State):
         """Set next state after this state finishes.
@@ -158,6 +195,7 @@ class HasResultPath(State):
             comment=comment,
             input_path=input_path,
             output_path=output_path)
+        _validate_path(result_path)
         self.result_path = result_path
 
     def to_dict(self):
@@ -285,11 +323,10 @@ class CanCatch(State):
             output_path=output_path)
         self.catchers: T.List[T.Tuple[T.Sequence[str], T.Dict[str, ...]]] = []
 
-    def add_to(self, states):
-        super().add_to(states)
-        for _, policy in self.catchers:
-            if policy["next_state"].name not in states:
-                policy["next_state"].add_to(states)
+    def _get_next_states(self):
+        next_states = super()._get_next_states()
+        next_states.extend(p["next_state"] for _, p in self.catchers)
+        return next_states
 
     def catch(
             self,
@@ -308,6 +345,7 @@ class CanCatch(State):
         if any(any(e in excs_ for e in errors) for excs_, _ in self.catchers):
             fmt = "Handler has already accounted-for errors: %s"
             _logger.warning(fmt % errors)
+        _validate_path(result_path)
         policy = {"next_state": next_state, "result_path": result_path}
         self.catchers.append((errors, policy))
 
@@ -5,10 +5,19 @@ import typing as T
 import logging as lg
 
 from . import _base
+from . import choice
 from .. import _util
 
 _logger = lg.getLogger(__name__)
 _default = _util.DefaultParameter()
+_interpreter = None
+
+
+def _import_interpreter():
+    """Import local interpreter, which imports execution modules."""
+    global _interpreter
+    if _interpreter is None:
+        from .. import _interpreter
 
 
 class Succeed(_base.State):
@@ -247,13 +256,12 @@ class Choice(_base.State):
         self.choices = []
         self.default: T.Union[_base.State, None] = None
 
-    def add_to(self, states):
-        super().add_to(states)
-        for rule in self.choices:
-            if rule.next_state.name not in states:
-                rule.next_state.add_to(states)
-        if self.default is not None and self.default.name not in states:
-            self.default.add_to(states)
+    def _get_next_states(self):
+        next_states = super()._get_next_states()
+        next_states.extend(rule.next_state for rule in self.choices)
+        if self.default is not None:
+            next_states.append(self.default)
+        return next_states
 
     def add(self, rule):
         """Add a choice-rule.
@@ -308,6 +316,49 @@ class Choice(_base.State):
             defn["Default"] = self.default.name
         return defn
 
+    def compile(
+            self
+    ) -> T.Callable[[_util.JSONable], T.Union[_base.State, None]]:
+        """Compile this state's choice-rules, for local evaluation.
+
+        Runs of consecutive numeric or string comparisons on the same
+        variable with the same operator are evaluated with a hash lookup
+        (equality) or bisection (ranges), rather than rule-by-rule.
+
+        Returns:
+            function of (effective) state input, returning the next state
+                to execute, or ``None`` if no rules match and there is no
+                default
+        """
+
+        states = {r.next_state.name: r.next_state for r in self.choices}
+        if self.default is not None:
+            states[self.default.name] = self.default
+        _import_interpreter()
+        choose_name = _interpreter.compile_choices(self.to_dict())
+
+        def choose(data):
+            next_name = choose_name(data)
+            return None if next_name is None else states[next_name]
+        return choose
+
+    def find_shadowed_rules(
+            self
+    ) -> T.List[T.Tuple[choice.ChoiceRule, choice.ChoiceRule]]:
+        """Find choice-rules which can never be matched.
+
+        Consecutive numeric or string comparisons on the same variable
+        with the same operator are checked for rules whose values are all
+        matched by an earlier rule (eg repeated ``StringEquals`` values).
+
+        Returns:
+            unreachable rules, each with the earlier rule which shadows it
+        """
+
+        _import_interpreter()
+        shadowed = _interpreter.find_shadowed_rules(self.to_dict())
+        return [(self.choices[j], self.choices[k]) for j, k in shadowed]
+
 
 class Task(
         _base.HasResultPath,
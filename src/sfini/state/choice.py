@@ -10,8 +10,17 @@ import typing as T
 import logging as lg
 
 from .. import _util
+from .. import _jsonpath
 
 _logger = lg.getLogger(__name__)
+_interpreter = None
+
+
+def _import_interpreter():
+    """Import local interpreter, which imports execution modules."""
+    global _interpreter
+    if _interpreter is None:
+        from .. import _interpreter
 
 
 class ChoiceRule:
@@ -53,6 +62,19 @@ class ChoiceRule:
             defn["Next"] = self.next_state.name
         return defn
 
+    def compile(self) -> T.Callable[[_util.JSONable], bool]:
+        """Compile this rule into a predicate, for local evaluation.
+
+        The variable path is parsed and any comparison time is converted
+        once, here, so the predicate is cheap to call repeatedly.
+
+        Returns:
+            predicate on state input, true if this rule matches
+        """
+
+        _import_interpreter()
+        return _interpreter.compile_rule(self.to_dict())
+
 
 class Comparison(ChoiceRule):
     """Compare variable value.
@@ -71,6 +93,7 @@ class Comparison(ChoiceRule):
             comparison_value,
             next_state=None):
         super().__init__(next_state)
+        _jsonpath.validate(variable_path, reference=False)
         self.variable_path = variable_path
         self.comparison_value = comparison_value
 
@@ -7,16 +7,87 @@ the workflow over some given data.
 
 import json
 import uuid
+import hashlib
 import datetime
 import typing as T
 import logging as lg
 
+from botocore import exceptions as bc_exc
+
 from . import _util
+from . import activity as sfini_activity
 from . import execution as sfini_execution
 from . import state as sfini_state
 
 _logger = lg.getLogger(__name__)
 _default = _util.DefaultParameter()
+_interpreter = None
+_pausing_state_types = (
+    sfini_state.Task,
+    sfini_state.Wait,
+    sfini_state.Parallel)
+
+
+def _import_interpreter():
+    """Import local interpreter, which imports execution modules."""
+    global _interpreter
+    if _interpreter is None:
+        from . import _interpreter
+
+
+def _find_loops(graph: T.Dict[str, T.List[str]]) -> T.List[T.List[str]]:
+    """Find loops in a directed graph.
+
+    Uses Tarjan's strongly-connected components algorithm, iteratively,
+    in linear time.
+
+    Args:
+        graph: node successors, by node
+
+    Returns:
+        nodes of each loop (strongly-connected component with a cycle)
+    """
+
+    indices = {}
+    low_links = {}
+    on_stack = set()
+    stack = []
+    loops = []
+    for root in graph:
+        if root in indices:
+            continue
+        indices[root] = low_links[root] = len(indices)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in indices:
+                    indices[successor] = low_links[successor] = len(indices)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph[successor])))
+                    break
+                if successor in on_stack:
+                    low_links[node] = min(low_links[node], indices[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[node])
+                if low_links[node] != indices[node]:
+                    continue
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in graph[node]:
+                    loops.append(component[::-1])
+    return loops
 
 
 class StateMachine:
@@ -32,6 +103,7 @@ class StateMachine:
     """
 
     _execution_class = sfini_execution.Execution
+    _stop_progress_interval = 100
 
     def __init__(
             self,
@@ -83,17 +155,200 @@ class StateMachine:
             defn["TimeoutSeconds"] = self.timeout
         return defn
 
+    def _get_callable_activities(
+            self
+    ) -> T.Dict[str, sfini_activity.CallableActivity]:
+        """Find activities implementing this state-machine's tasks.
+
+        Returns:
+            callable task activities (including those in branches of
+                'Parallel' states), by ARN
+        """
+
+        activities = {}
+        for state in self.states.values():
+            if isinstance(state, sfini_state.Task):
+                if isinstance(state.resource, sfini_activity.CallableActivity):
+                    activities[state.resource.arn] = state.resource
+            elif isinstance(state, sfini_state.Parallel):
+                for branch in state.branches:
+                    activities.update(branch._get_callable_activities())
+        return activities
+
+    def run_locally(
+            self,
+            execution_input: _util.JSONable,
+            time_scale: float = 1.0
+    ) -> _util.JSONable:
+        """Run an execution in-process, without AWS SFN.
+
+        The state-machine definition is interpreted locally, with tasks
+        run by calling their activity directly. Tasks with any other
+        resource (eg Lambda functions) fail with 'States.Runtime'. Task
+        time-outs and heartbeats are not enforced.
+
+        Args:
+            execution_input: input to first state in state-machine
+            time_scale: multiplier of 'Wait' state and retry times, eg
+                ``0.0`` to not wait at all
+
+        Returns:
+            execution output
+
+        Raises:
+            sfini._interpreter.StatesError: execution failed or timed-out,
+                with the error's ``error`` and ``cause``
+        """
+
+        _logger.info("Running '%s' locally with: %s" % (self, execution_input))
+        _import_interpreter()
+        interpreter = _interpreter.LocalInterpreter(
+            self.to_dict(),
+            self._get_callable_activities(),
+            time_scale=time_scale)
+        return interpreter.run(execution_input)
+
+    def _iter_branch_state_names(self) -> T.Iterable[str]:
+        """Iterate over names of states in 'Parallel' state branches."""
+        for state in self.states.values():
+            if isinstance(state, sfini_state.Parallel):
+                for branch in state.branches:
+                    yield from branch.states
+                    yield from branch._iter_branch_state_names()
+
+    def _find_problems(self, check_names: bool = True) -> T.List[str]:
+        """Find problems in this state-machine's states.
+
+        Args:
+            check_names: check for state names repeated in 'Parallel'
+                state branches (done once, at the top level, for all
+                nested branches)
+
+        Returns:
+            problem descriptions
+        """
+
+        problems = []
+        graph = {}
+        for name, state in self.states.items():
+            graph[name] = []
+            for next_state in state._get_next_states():
+                if self.states.get(next_state.name) is not next_state:
+                    fmt = "State '%s' goes to '%s', which isn't in definition"
+                    problems.append(fmt % (name, next_state.name))
+                else:
+                    graph[name].append(next_state.name)
+            if isinstance(state, sfini_state.Choice):
+                if not state.choices and state.default is None:
+                    problems.append("Choice '%s' has no next path" % name)
+                elif state.choices:
+                    for rule, shadow in state.find_shadowed_rules():
+                        fmt = "Choice '%s' rule '%s' is shadowed by '%s'"
+                        problems.append(fmt % (name, rule, shadow))
+            elif isinstance(state, sfini_state.Parallel):
+                for j, branch in enumerate(state.branches):
+                    branch_problems = branch._find_problems(check_names=False)
+                    for problem in branch_problems:
+                        fmt = "Parallel '%s' branch %d: %s"
+                        problems.append(fmt % (name, j, problem))
+
+        if self.start_state not in self.states:
+            fmt = "Start state '%s' isn't in definition"
+            problems.append(fmt % self.start_state)
+        else:
+            reached = {self.start_state}
+            to_visit = [self.start_state]
+            while to_visit:
+                for next_name in graph[to_visit.pop()]:
+                    if next_name not in reached:
+                        reached.add(next_name)
+                        to_visit.append(next_name)
+            for name in self.states:
+                if name not in reached:
+                    problems.append("State '%s' is unreachable" % name)
+
+        transient = {
+            name for name, state in self.states.items()
+            if not isinstance(state, _pausing_state_types)}
+        transient_graph = {
+            name: [n for n in next_names if n in transient]
+            for name, next_names in graph.items() if name in transient}
+        for loop in _find_loops(transient_graph):
+            fmt = "Loop without 'Wait' or 'Task' state: %s"
+            problems.append(fmt % ", ".join("'%s'" % n for n in loop))
+
+        if not check_names:
+            return problems
+        seen_names = set(self.states)
+        for name in self._iter_branch_state_names():
+            if name in seen_names:
+                fmt = "State name '%s' is used more than once"
+                problems.append(fmt % name)
+            seen_names.add(name)
+        return problems
+
+    def validate(self):
+        """Statically validate this state-machine.
+
+        In one pass over the states and their transitions, checks for:
+        unreachable states, transitions to states not in the definition,
+        'Choice' states without a next path (or with rules which can never
+        be matched), loops without any 'Wait', 'Task' or 'Parallel' state
+        (which burn state transitions), and state names repeated in
+        'Parallel' state branches. Branches are validated too.
+
+        Raises:
+            ValueError: invalid state-machine, with all problems found
+        """
+
+        problems = self._find_problems()
+        if problems:
+            fmt = "State-machine %s is invalid:\n  %s"
+            raise ValueError(fmt % (self, "\n  ".join(problems)))
+
     def is_registered(self) -> bool:
         """See if this state-machine is registered with AWS SFN.
 
+        Uses the session's snapshot of registered state-machines.
+
         Returns:
             if this state-machine is registered
         """
 
         _logger.debug("Testing for registration of '%s' on SFN" % self)
-        resp = _util.collect_paginated(self.session.sfn.list_state_machines)
-        arns = {sm["stateMachineArn"] for sm in resp["stateMachines"]}
-        return self.arn in arns
+        return self.arn in self.session.state_machine_registry
+
+    @staticmethod
+    def _hash_definition(definition: T.Dict[str, _util.JSONable]) -> str:
+        """Generate a canonical fingerprint of a state-machine definition.
+
+        Args:
+            definition: state-machine definition
+
+        Returns:
+            hash of definition, independent of key-order and formatting
+        """
+
+        defn_str = json.dumps(
+            definition,
+            sort_keys=True,
+            separators=(",", ":"))
+        return hashlib.sha256(defn_str.encode("utf-8")).hexdigest()
+
+    def _describe(self) -> T.Union[T.Dict[str, _util.JSONable], None]:
+        """Describe this state-machine in AWS SFN.
+
+        Returns:
+            state-machine description, or ``None`` if not registered
+        """
+
+        try:
+            return self.session.sfn.describe_state_machine(
+                stateMachineArn=self.arn)
+        except bc_exc.ClientError as e:
+            if e.response["Error"]["Code"] != "StateMachineDoesNotExist":
+                raise
+        return None
 
     def _sfn_create(self, role_arn: str):
         """Create this state-machine in AWS SFN.
@@ -108,6 +363,10 @@ class StateMachine:
             definition=json.dumps(self.to_dict(), indent=4),
             roleArn=role_arn)
         assert resp["stateMachineArn"] == self.arn
+        self.session.state_machine_registry.add({
+            "stateMachineArn": self.arn,
+            "name": self.name,
+            "creationDate": resp["creationDate"]})
         fmt = "State-machine '%s' registered with ARN '%s' at %s"
         _logger.info(fmt % (self, self.arn, resp["creationDate"]))
 
@@ -129,6 +388,9 @@ class StateMachine:
     def register(self, role_arn: str = None, allow_update: bool = False):
         """Register state-machine with AWS SFN.
 
+        When updating, the existing state-machine is only updated if its
+        definition (compared by fingerprint) or role differs.
+
         Args:
             role_arn: state-machine IAM role ARN
             allow_update: allow overwriting of an existing state-machine with
@@ -136,15 +398,25 @@ class StateMachine:
         """
 
         _util.assert_valid_name(self.name)
-        if allow_update and self.is_registered():
+        deployed = self._describe() if allow_update else None
+        if deployed is None:
+            self._sfn_create(role_arn or self.default_role_arn)
+            return
+
+        deployed_hash = self._hash_definition(
+            json.loads(deployed["definition"]))
+        defn_changed = deployed_hash != self._hash_definition(self.to_dict())
+        role_changed = role_arn not in (None, deployed["roleArn"])
+        if defn_changed or role_changed:
             self._sfn_update(role_arn)
         else:
-            self._sfn_create(role_arn or self.default_role_arn)
+            _logger.info("'%s' is unchanged on SFN, not updating" % self)
 
     def deregister(self):
         """Remove state-machine from AWS SFN."""
         _logger.info("Deleting state-machine '%s' from SFN" % self)
         self.session.sfn.delete_state_machine(stateMachineArn=self.arn)
+        self.session.state_machine_registry.remove(self.arn)
 
     def start_execution(
             self,
@@ -172,6 +444,76 @@ class StateMachine:
         execution.start()
         return execution
 
+    def _hash_execution_name(self, execution_input: _util.JSONable) -> str:
+        """Generate an execution name deterministically from its input.
+
+        Args:
+            execution_input: input to first state in state-machine
+
+        Returns:
+            execution name: state-machine name and hash of input
+        """
+
+        input_str = json.dumps(
+            execution_input,
+            sort_keys=True,
+            separators=(",", ":"))
+        digest = hashlib.sha256(input_str.encode("utf-8")).hexdigest()[:32]
+        prefix = self.name[:_util.MAX_NAME_LENGTH - len(digest) - 1]
+        return prefix + "_" + digest
+
+    def start_executions(
+            self,
+            execution_inputs: T.Iterable[_util.JSONable],
+            concurrency: int = 10,
+            name_fn: T.Callable[[_util.JSONable], str] = None,
+            max_rate: float = 100.0
+    ) -> T.List[_execution_class]:
+        """Start many executions concurrently.
+
+        Execution names are generated from execution input, and executions
+        which already exist are treated as started, so re-running an
+        interrupted batch skips executions already started.
+
+        Args:
+            execution_inputs: inputs to first state in state-machine, one
+                for each execution
+            concurrency: maximum number of concurrent requests
+            name_fn: execution name generator, passed execution input,
+                default: state-machine name and hash of input
+            max_rate: maximum number of executions started per second
+
+        Returns:
+            started executions, in order of input
+        """
+
+        _logger.info("Starting executions of '%s'" % self)
+        name_fn = name_fn or self._hash_execution_name
+        limiter = _util.RateLimiter(max_rate, burst=concurrency)
+        self.session.reserve_connections(concurrency)
+        arn = self.arn
+
+        def _start(execution_input):
+            execution = self._execution_class(
+                name_fn(execution_input),
+                arn,
+                execution_input,
+                session=self.session)
+
+            def start():
+                limiter.acquire()
+                execution.start(allow_existing=True)
+
+            _util.call_with_retries(start)
+            return execution
+
+        executions = list(_util.map_concurrent(
+            _start,
+            execution_inputs,
+            max_workers=concurrency))
+        _logger.info("Started %d executions" % len(executions))
+        return executions
+
     def _build_executions(
             self,
             items: T.List[T.Dict[str, _util.JSONable]]
@@ -201,11 +543,15 @@ class StateMachine:
             _logger.debug(fmt % (execution, item.get("stopDate")))
         return executions
 
-    def list_executions(self, status: str = None) -> T.List[_execution_class]:
-        """List all executions of this state-machine.
+    def iter_executions(
+            self,
+            status: str = None
+    ) -> T.Generator[_execution_class, None, None]:
+        """Iterate over executions of this state-machine.
 
-        This state-machine is manually attached to the ``state_machine``
-        attribute of the resultant executions here.
+        Executions are listed page-by-page as they're consumed, newest
+        first. This state-machine is manually attached to the
+        ``state_machine`` attribute of the resultant executions here.
 
         Args:
             status: only list executions with this status. Choose from
@@ -222,8 +568,68 @@ class StateMachine:
         if status is not None:
             kwargs["statusFilter"] = status
         fn = self.session.sfn.list_executions
-        resp = _util.collect_paginated(fn, **kwargs)
-        return self._build_executions(resp["executions"])
+        for resp in _util.iter_paginated(fn, **kwargs):
+            yield from self._build_executions(resp["executions"])
+
+    def list_executions(self, status: str = None) -> T.List[_execution_class]:
+        """List all executions of this state-machine.
+
+        This state-machine is manually attached to the ``state_machine``
+        attribute of the resultant executions here.
+
+        Args:
+            status: only list executions with this status. Choose from
+                'RUNNING', 'SUCCEEDED', 'FAILED', 'TIMED_OUT' or 'ABORTED'
+
+        Returns:
+            executions of this state-machine
+        """
+
+        return list(self.iter_executions(status=status))
+
+    def stop_executions(
+            self,
+            error_code: str = _default,
+            details: str = _default,
+            concurrency: int = 10,
+            callback: T.Callable[[_execution_class], None] = None
+    ) -> T.List[_execution_class]:
+        """Stop all running executions of this state-machine.
+
+        Running executions are listed and stopped concurrently, with
+        retries when requests are throttled.
+
+        Args:
+            error_code: stop reason identification
+            details: stop reason
+            concurrency: maximum number of concurrent stop requests
+            callback: called with each execution after it's stopped, eg
+                for progress reporting
+
+        Returns:
+            stopped executions
+        """
+
+        _logger.info("Stopping executions of '%s'" % self)
+        self.session.reserve_connections(concurrency)
+
+        def _stop(execution):
+            _util.call_with_retries(
+                execution.stop,
+                error_code=error_code,
+                details=details)
+            return execution
+
+        executions = []
+        execs = self.iter_executions(status="RUNNING")
+        for execution in _util.map_concurrent(_stop, execs, concurrency):
+            executions.append(execution)
+            if callback is not None:
+                callback(execution)
+            if len(executions) % self._stop_progress_interval == 0:
+                _logger.info("Stopped %d executions" % len(executions))
+        _logger.info("Stopped %d executions of '%s'" % (len(executions), self))
+        return executions
 
 
 def construct_state_machine(
@@ -203,7 +203,7 @@ class Worker:
         while not self._request_finish:
             fmt = "Polling for activity '%s' executions"
             _logger.debug(fmt % self.activity)
-            resp = self.session.sfn.get_activity_task(
+            resp = self.session.sfn_long_poll.get_activity_task(
                 activityArn=self.activity.arn,
                 workerName=self.name)
             if resp.get("taskToken", None) is not None:
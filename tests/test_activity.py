@@ -7,12 +7,19 @@ import sfini
 from sfini import _util as sfini_util
 import datetime
 import inspect
+import sys
+from botocore import exceptions as bc_exc
 
 
 @pytest.fixture
 def session_mock():
     """AWS session mock."""
-    return mock.Mock(autospec=sfini.AWSSession)
+    session = mock.Mock(autospec=sfini.AWSSession)
+    session.activity_registry = sfini_util.Registry(
+        session.sfn.list_activities,
+        "activities",
+        "activityArn")
+    return session
 
 
 class TestActivity:
@@ -43,6 +50,10 @@ class TestActivity:
         # Check result
         session_mock.sfn.create_activity.assert_called_once_with(name="spam")
         avn_mock.assert_called_once_with("spam")
+        session_mock.sfn.list_activities.return_value = {"activities": []}
+        assert "spam:arn" not in session_mock.activity_registry
+        activity.register()
+        assert "spam:arn" in session_mock.activity_registry
 
     @pytest.mark.parametrize(
         ("names", "exp"),
@@ -61,9 +72,13 @@ class TestActivity:
     def test_deregister(self, activity, session_mock):
         """Activity de-registration."""
         activity.arn = "spam:arn"
+        session_mock.sfn.list_activities.return_value = {
+            "activities": [{"name": "spam", "activityArn": "spam:arn"}]}
+        assert activity.is_registered()
         activity.deregister()
         session_mock.sfn.delete_activity.assert_called_once_with(
             activityArn=activity.arn)
+        assert not activity.is_registered()
 
 
 class TestCallableActivity:
@@ -346,15 +361,25 @@ class TestActivityRegistration:
             name="bla",
             heartbeat=42)
 
-    def test_register(self, activities):
+    def test_register(self, activities, session_mock):
         """Activity group registration."""
         activities.activities = {
             "spambla": mock.Mock(spec=tscr.Activity),
             "spamfoo": mock.Mock(spec=tscr.Activity),
             "bar": mock.Mock(spec=tscr.Activity)}
-        activities.register()
-        for activity in activities.activities.values():
-            activity.register.assert_called_once_with()
+        for name, activity in activities.activities.items():
+            activity.arn = name + ":arn"
+        session_mock.sfn.list_activities.return_value = {
+            "activities": [{"name": "spamfoo", "activityArn": "spamfoo:arn"}]}
+        exc = bc_exc.ClientError(
+            {"Error": {"Code": "ThrottlingException"}},
+            "CreateActivity")
+        activities.activities["bar"].register.side_effect = [exc, None]
+        activities.register(concurrency=2)
+        activities.activities["spambla"].register.assert_called_once_with()
+        activities.activities["spamfoo"].register.assert_not_called()
+        assert activities.activities["bar"].register.call_count == 2
+        session_mock.sfn.list_activities.assert_called_once_with()
 
     def test_list_activities(self, activities, session_mock):
         """Activity group listing."""
@@ -374,7 +399,7 @@ class TestActivityRegistration:
                     "name": "another",
                     "activityArn": "another:arn",
                     "creationDate": now - datetime.timedelta(days=1)}]}
-        session_mock.sfn.list_activities = mock.Mock(return_value=resp)
+        session_mock.sfn.list_activities.return_value = resp
         activities.activities = {
             "spambla": mock.Mock(spec=tscr.Activity),
             "bar": mock.Mock(spec=tscr.Activity)}
@@ -397,11 +422,11 @@ class TestActivityRegistration:
         activity_items = [
             ("spamfoo", "spamfoo:arn", now - datetime.timedelta(minutes=1)),
             ("bar", "bar:arn", now - datetime.timedelta(minutes=2))]
-        exp_da_calls = [
-            mock.call.delete_activity(activityArn="spamfoo:arn"),
-            mock.call.delete_activity(activityArn="bar:arn")]
-        activities._deregister_activities(activity_items)
-        assert session_mock.sfn.method_calls == exp_da_calls
+        activities._deregister_activities(activity_items, concurrency=2)
+        calls = session_mock.sfn.delete_activity.call_args_list
+        assert len(calls) == 2
+        assert sorted(c[1]["activityArn"] for c in calls) == [
+            "bar:arn", "spamfoo:arn"]
 
     def test_deregister(self, activities):
         """Activity group de-registration."""
@@ -414,8 +439,126 @@ class TestActivityRegistration:
         activities._deregister_activities = mock.Mock()
 
         # Run function
-        activities.deregister()
+        activities.deregister(concurrency=3)
 
         # Check result
         activities._list_activities.assert_called_once_with()
-        activities._deregister_activities.assert_called_once_with(acts)
+        activities._deregister_activities.assert_called_once_with(
+            acts,
+            concurrency=3)
+
+
+def test_import_reference():
+    """Object import by reference."""
+    assert tscr._import_reference("os.path:join.__name__") == "join"
+    with pytest.raises(ValueError):
+        tscr._import_reference("os.path.join")
+
+
+def test_iter_entry_points():
+    """Installed entry-points iteration."""
+    assert list(tscr._iter_entry_points("sfini.test.missing")) == []
+
+
+class TestLazyActivityRegistration:
+    """Test ``sfini.activity.LazyActivityRegistration``."""
+    @pytest.fixture
+    def module_name(self, tmp_path, monkeypatch):
+        """Name of an importable activities module."""
+        (tmp_path / "sfini_test_acts.py").write_text(
+            "import sfini\n"
+            "def bla(data):\n"
+            "    return data * 2\n"
+            "activities = sfini.ActivityRegistration(prefix='spam')\n"
+            "@activities.activity('foo')\n"
+            "def foo(data):\n"
+            "    return data + 1\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield "sfini_test_acts"
+        sys.modules.pop("sfini_test_acts", None)
+
+    @pytest.fixture
+    def activities(self, session_mock, module_name):
+        """A LazyActivityRegistration instance."""
+        activities = tscr.LazyActivityRegistration(
+            prefix="spam",
+            session=session_mock)
+        activities.add_reference("bla", module_name + ":bla")
+        activities.add_reference("foo", module_name + ":foo")
+        return activities
+
+    def test_lazy(self, activities, session_mock, module_name):
+        """Activities are imported on access."""
+        assert list(activities.activities) == ["spambla", "spamfoo"]
+        assert "spambla" in activities.activities
+        assert module_name not in sys.modules
+
+        res = activities.activities["spambla"]
+        assert module_name in sys.modules
+        assert isinstance(res, tscr.CallableActivity)
+        assert res.name == "spambla"
+        assert res.session is session_mock
+        assert res.call_with(3) == 6
+        assert activities.activities["spambla"] is res
+
+        res = activities.activities["spamfoo"]
+        assert res is sys.modules[module_name].foo
+
+    def test_name_mismatch(self, activities, module_name):
+        """Referenced activity must have matching name."""
+        activities.add_reference("eggs", module_name + ":foo")
+        with pytest.raises(ValueError):
+            _ = activities.activities["spameggs"]
+
+    def test_add_reference_invalid(self, activities):
+        """Invalid or duplicate references are rejected."""
+        with pytest.raises(ValueError):
+            activities.add_reference("bla", "spam:eggs")
+        with pytest.raises(ValueError):
+            activities.add_reference("eggs", "spam.eggs")
+
+    def test_decorate(self, activities):
+        """Decorated activities are added alongside references."""
+        @activities.activity("eggs")
+        def eggs(data):
+            return data
+
+        assert list(activities.activities) == [
+            "spambla", "spamfoo", "spameggs"]
+        assert activities.activities["spameggs"] is eggs
+
+    def test_register(self, activities, session_mock, module_name):
+        """Registration doesn't import activities."""
+        session_mock.sfn.list_activities.return_value = {"activities": []}
+        session_mock.sfn.create_activity.side_effect = lambda name: {
+            "activityArn": tscr.Activity(name, session=session_mock).arn,
+            "creationDate": None}
+        activities.register()
+        assert module_name not in sys.modules
+        calls = session_mock.sfn.create_activity.call_args_list
+        assert sorted(c[1]["name"] for c in calls) == ["spambla", "spamfoo"]
+
+    def test_from_manifest(self, tmp_path, session_mock, module_name):
+        """Activities from a JSON manifest."""
+        path = tmp_path / "activities.json"
+        path.write_text('{"bla": "%s:bla"}' % module_name)
+        res = tscr.LazyActivityRegistration.from_manifest(
+            str(path),
+            prefix="spam",
+            session=session_mock)
+        assert res.activities.references == {"spambla": module_name + ":bla"}
+
+    def test_from_entry_points(self, session_mock):
+        """Activities from installed entry-points."""
+        entry_points = [("bla", "spam.eggs:bla"), ("foo", "spam:foo")]
+        iep_mock = mock.Mock(return_value=entry_points)
+        with mock.patch.object(tscr, "_iter_entry_points", iep_mock):
+            res = tscr.LazyActivityRegistration.from_entry_points(
+                "spam.activities",
+                prefix="spam",
+                session=session_mock)
+        iep_mock.assert_called_once_with("spam.activities")
+        assert res.activities.references == {
+            "spambla": "spam.eggs:bla",
+            "spamfoo": "spam:foo"}
+        assert res.session is session_mock
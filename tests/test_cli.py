@@ -9,6 +9,7 @@ import io
 import json
 import sys
 import pathlib
+import datetime
 from sfini import _util as sfini_util
 import logging as lg
 
@@ -25,6 +26,36 @@ def activities():
     return mock.Mock(autospec=sfini.ActivityRegistration)
 
 
+class TestParseSince:
+    """Test ``sfini._cli._parse_since``."""
+    @pytest.mark.parametrize(
+        ("value", "exp_seconds"),
+        [("30s", 30), ("1.5m", 90), ("2h", 7200), ("1d", 86400)])
+    def test_relative(self, value, exp_seconds):
+        """Time relative to now."""
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        res = tscr._parse_since(value)
+        assert abs((now - res).total_seconds() - exp_seconds) < 5.0
+
+    @pytest.mark.parametrize(
+        ("value", "exp"),
+        [
+            ("2019-07-01", datetime.datetime(2019, 7, 1)),
+            ("2019-07-01T12:30", datetime.datetime(2019, 7, 1, 12, 30)),
+            (
+                "2019-07-01T12:30:15",
+                datetime.datetime(2019, 7, 1, 12, 30, 15))])
+    def test_absolute(self, value, exp):
+        """Absolute local time."""
+        assert tscr._parse_since(value) == exp.astimezone()
+
+    @pytest.mark.parametrize("value", ["spam", "2h30m", "2019-07-01 12"])
+    def test_invalid(self, value):
+        """Invalid time."""
+        with pytest.raises(argparse.ArgumentTypeError):
+            tscr._parse_since(value)
+
+
 class TestCLI:
     """Test ``sfini._cli.CLI``."""
     @pytest.fixture
@@ -92,6 +123,7 @@ class TestCLI:
             args_ = argparse.Namespace(
                 state_machine_only=state_machine_only,
                 activities_only=activities_only,
+                jobs=3,
                 command="register")
             if toggle_state_machine:
                 args_.allow_update = allow_update
@@ -103,6 +135,7 @@ class TestCLI:
             return argparse.Namespace(
                 state_machine_only=state_machine_only,
                 activities_only=activities_only,
+                jobs=3,
                 command="deregister")
 
         @pytest.fixture()
@@ -121,7 +154,7 @@ class TestCLI:
             """Expected activity registration method calls in registration."""
             if state_machine_only or not toggle_activities:
                 return []
-            return [mock.call.register()]
+            return [mock.call.register(concurrency=3)]
 
         @pytest.fixture()
         def exp_sm_dereg_calls(self, toggle_state_machine, activities_only):
@@ -135,7 +168,7 @@ class TestCLI:
             """Expected activity registration method calls in dereg."""
             if state_machine_only or not toggle_activities:
                 return []
-            return [mock.call.deregister()]
+            return [mock.call.deregister(concurrency=3)]
 
         @pytest.mark.parametrize(
             ("toggle_state_machine", "toggle_activities"),
@@ -251,6 +284,46 @@ class TestCLI:
             execution_mock.wait.assert_called_once_with()
             assert output_stream.getvalue() == "spam-output\n"
 
+    def test_stop(self, cli, state_machine):
+        """Running execution stopping."""
+        # Setup environment
+        output_stream = io.StringIO()
+        execs = [mock.Mock(spec=sfini.execution.Execution) for _ in range(3)]
+        for j, execution in enumerate(execs):
+            type(execution).__str__ = mock.Mock(return_value="exec%s" % j)
+
+        def stop_executions(callback, **_):
+            [callback(e) for e in execs]
+            return execs
+
+        state_machine.stop_executions.side_effect = stop_executions
+
+        # Build input
+        args = argparse.Namespace(
+            error="spam-error",
+            cause="bla-cause",
+            jobs=4,
+            command="stop")
+
+        # Build expectation
+        exp_output = (
+            "Stopped execution 'exec0'\n"
+            "Stopped execution 'exec1'\n"
+            "Stopped execution 'exec2'\n"
+            "Stopped 3 executions\n")
+
+        # Run function
+        with mock.patch.object(sys, "stdout", output_stream):
+            cli._stop(args)
+
+        # Check result
+        assert output_stream.getvalue() == exp_output
+        state_machine.stop_executions.assert_called_once_with(
+            error_code="spam-error",
+            details="bla-cause",
+            concurrency=4,
+            callback=mock.ANY)
+
     def test_worker(self, cli, activities):
         """Worker running."""
         # Setup environment
@@ -278,13 +351,21 @@ class TestCLI:
         # Setup environment
         output_stream = io.StringIO()
         execs = [mock.Mock(spec=sfini.execution.Execution) for _ in range(4)]
-        state_machine.list_executions.return_value = execs
+        state_machine.iter_executions.return_value = iter(execs)
         for j, execution in enumerate(execs):
             execution.format_history.return_value = "spam\n  %d" % j
             type(execution).__str__ = mock.Mock(return_value="exec%s" % j)
 
         # Build input
-        args = argparse.Namespace(status="spam-status", command="executions")
+        args = argparse.Namespace(
+            status="spam-status",
+            cache=None,
+            follow=False,
+            summary=False,
+            jobs=1,
+            limit=None,
+            since=None,
+            command="executions")
 
         # Build expectation
         exp_output = (
@@ -300,6 +381,144 @@ class TestCLI:
         # Check result
         assert output_stream.getvalue() == exp_output
 
+    def test_executions_concurrent(self, cli, state_machine):
+        """Concurrent, bounded execution listing."""
+        # Setup environment
+        output_stream = io.StringIO()
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        execs = [mock.Mock(spec=sfini.execution.Execution) for _ in range(8)]
+        state_machine.iter_executions.return_value = iter(execs)
+        for j, execution in enumerate(execs):
+            execution.start_date = now - datetime.timedelta(minutes=j)
+            execution.format_history.return_value = "spam%d" % j
+            type(execution).__str__ = mock.Mock(return_value="exec%s" % j)
+
+        # Build input
+        args = argparse.Namespace(
+            status="FAILED",
+            cache=None,
+            follow=False,
+            summary=False,
+            jobs=3,
+            limit=4,
+            since=now - datetime.timedelta(minutes=2.5),
+            command="executions")
+
+        # Build expectation
+        exp_output = "".join(
+            "\nExecution 'exec%d':\nspam%d\n" % (j, j)
+            for j in range(3))
+
+        # Run function
+        with mock.patch.object(sys, "stdout", output_stream):
+            cli._executions(args)
+
+        # Check result
+        assert output_stream.getvalue() == exp_output
+        state_machine.iter_executions.assert_called_once_with(status="FAILED")
+        for execution in execs[3:]:
+            execution.format_history.assert_not_called()
+
+    def test_executions_follow(self, cli, state_machine):
+        """Execution history following."""
+        # Setup environment
+        output_stream = io.StringIO()
+        execs = [mock.Mock(spec=sfini.execution.Execution) for _ in range(2)]
+        state_machine.iter_executions.return_value = iter(execs)
+        for j, execution in enumerate(execs):
+            events = [
+                sfini.execution.history.Event("now", "spam%d" % j, k)
+                for k in range(2)]
+            execution.follow.return_value = iter(events)
+            type(execution).__str__ = mock.Mock(return_value="exec%s" % j)
+
+        # Build input
+        args = argparse.Namespace(
+            status="RUNNING",
+            cache=None,
+            follow=True,
+            summary=False,
+            jobs=1,
+            limit=None,
+            since=None,
+            command="executions")
+
+        # Build expectation
+        exp_output = (
+            "\nExecution 'exec0':\nspam0 [0] @ now\nspam0 [1] @ now\n"
+            "\nExecution 'exec1':\nspam1 [0] @ now\nspam1 [1] @ now\n")
+
+        # Run function
+        with mock.patch.object(sys, "stdout", output_stream):
+            cli._executions(args)
+
+        # Check result
+        assert output_stream.getvalue() == exp_output
+        for execution in execs:
+            execution.follow.assert_called_once_with()
+            execution.format_history.assert_not_called()
+
+    def test_executions_summary(self, cli, state_machine):
+        """Execution summary listing."""
+        # Setup environment
+        output_stream = io.StringIO()
+        execs = [mock.Mock(spec=sfini.execution.Execution) for _ in range(2)]
+        state_machine.iter_executions.return_value = iter(execs)
+        for j, execution in enumerate(execs):
+            execution.format_summary.return_value = "spam\n  %d" % j
+            type(execution).__str__ = mock.Mock(return_value="exec%s" % j)
+
+        # Build input
+        args = argparse.Namespace(
+            status=None,
+            cache=None,
+            follow=False,
+            summary=True,
+            jobs=1,
+            limit=None,
+            since=None,
+            command="executions")
+
+        # Build expectation
+        exp_output = (
+            "\nExecution 'exec0':\nspam\n  0\n"
+            "\nExecution 'exec1':\nspam\n  1\n")
+
+        # Run function
+        with mock.patch.object(sys, "stdout", output_stream):
+            cli._executions(args)
+
+        # Check result
+        assert output_stream.getvalue() == exp_output
+        for execution in execs:
+            execution.format_history.assert_not_called()
+
+    def test_executions_cache(self, cli, state_machine, tmpdir):
+        """Execution listing with an execution cache."""
+        # Setup environment
+        state_machine.session = mock.Mock(spec=sfini.AWSSession)
+        state_machine.iter_executions.return_value = iter([])
+        path = str(tmpdir.join("cache.sqlite"))
+
+        # Build input
+        args = argparse.Namespace(
+            status=None,
+            cache=path,
+            follow=False,
+            summary=False,
+            jobs=1,
+            limit=None,
+            since=None,
+            command="executions")
+
+        # Run function
+        cli._executions(args)
+
+        # Check result
+        cache = state_machine.session.execution_cache
+        assert isinstance(cache, sfini.execution.cache.ExecutionCache)
+        assert cache.path == path
+
     class TestDelegate:
         @pytest.mark.parametrize(
             ("command", "mock_call_method"),
@@ -307,6 +526,7 @@ class TestCLI:
                 ("register", mock.call._register),
                 ("deregister", mock.call._deregister),
                 ("start", mock.call._start),
+                ("stop", mock.call._stop),
                 ("worker", mock.call._worker),
                 ("executions", mock.call._executions)])
         def test_command(self, cli, command, mock_call_method):
@@ -315,6 +535,7 @@ class TestCLI:
             cli._register = mock.Mock()
             cli._deregister = mock.Mock()
             cli._start = mock.Mock()
+            cli._stop = mock.Mock()
             cli._worker = mock.Mock()
             cli._executions = mock.Mock()
 
@@ -322,6 +543,7 @@ class TestCLI:
             manager.attach_mock(cli._register, "_register")
             manager.attach_mock(cli._deregister, "_deregister")
             manager.attach_mock(cli._start, "_start")
+            manager.attach_mock(cli._stop, "_stop")
             manager.attach_mock(cli._worker, "_worker")
             manager.attach_mock(cli._executions, "_executions")
 
@@ -377,6 +599,22 @@ class TestCLI:
             # Check result
             sl_mock.assert_called_once_with(level=level)
 
+        def test_reserve_connections(self, cli, state_machine, activities):
+            """Client connections are reserved for concurrent jobs."""
+            cli._stop = mock.Mock()
+            state_machine.session = mock.Mock(spec=sfini.AWSSession)
+            args = argparse.Namespace(
+                verbose=0,
+                quiet=0,
+                jobs=42,
+                command="stop")
+            with mock.patch.object(sfini_util, "setup_logging"):
+                cli._delegate(args)
+            state_machine.session.reserve_connections.assert_called_once_with(
+                42)
+            activities.session.reserve_connections.assert_called_once_with(42)
+            cli._stop.assert_called_once_with(args)
+
     def test_parse_args(self, cli):
         """Command-line argument parsing and command execution."""
         # Setup environment
@@ -0,0 +1,296 @@
+"""Test ``sfini.emulator``."""
+
+from sfini import emulator as tscr
+import pytest
+import sfini
+import json
+import time
+import threading
+from unittest import mock
+from botocore import exceptions as bc_exc
+
+_definition = {
+    "StartAt": "t",
+    "States": {
+        "t": {
+            "Type": "Task",
+            "Resource": "arn:aws:states:us-east-1:123456789012:activity:spam",
+            "ResultPath": "$.res",
+            "End": True}}}
+
+
+@pytest.fixture
+def emulator():
+    """An example Emulator instance."""
+    return tscr.Emulator(poll_timeout=0.05, time_scale=0.0)
+
+
+def _error_code(exc_info) -> str:
+    """Get AWS API error code."""
+    return exc_info.value.response["Error"]["Code"]
+
+
+def test_paginate():
+    """Response pagination."""
+    items = list(range(5))
+    resp = tscr._paginate(items, "spam", maxResults=2)
+    assert resp == {"spam": [0, 1], "nextToken": "2"}
+    resp = tscr._paginate(items, "spam", maxResults=2, nextToken="4")
+    assert resp == {"spam": [4]}
+
+
+class TestEmulator:
+    """Test ``sfini.emulator.Emulator``."""
+    def test_str(self, emulator):
+        """Emulator string representation."""
+        assert str(emulator) == "SFN emulator (us-east-1, 123456789012)"
+
+    def test_activities(self, emulator):
+        """Activity management."""
+        resp = emulator.create_activity(name="spam")
+        arn = "arn:aws:states:us-east-1:123456789012:activity:spam"
+        assert resp["activityArn"] == arn
+        assert emulator.create_activity(name="spam") == resp
+        emulator.create_activity(name="eggs")
+        resp = emulator.list_activities(maxResults=1)
+        assert [a["name"] for a in resp["activities"]] == ["spam"]
+        resp = emulator.list_activities(nextToken=resp["nextToken"])
+        assert [a["name"] for a in resp["activities"]] == ["eggs"]
+        assert emulator.describe_activity(activityArn=arn)["name"] == "spam"
+        emulator.delete_activity(activityArn=arn)
+        with pytest.raises(bc_exc.ClientError) as e:
+            emulator.describe_activity(activityArn=arn)
+        assert _error_code(e) == "ActivityDoesNotExist"
+
+    def test_get_activity_task_timeout(self, emulator):
+        """Polling with no tasks returns no task."""
+        arn = emulator.create_activity(name="spam")["activityArn"]
+        t = time.monotonic()
+        assert emulator.get_activity_task(activityArn=arn) == {}
+        assert time.monotonic() - t >= 0.05
+
+    def test_state_machines(self, emulator):
+        """State-machine management."""
+        resp = emulator.create_state_machine(
+            name="sm",
+            definition="{}",
+            roleArn="role:arn")
+        arn = "arn:aws:states:us-east-1:123456789012:stateMachine:sm"
+        assert resp["stateMachineArn"] == arn
+        with pytest.raises(bc_exc.ClientError) as e:
+            emulator.create_state_machine(
+                name="sm",
+                definition="[]",
+                roleArn="role:arn")
+        assert _error_code(e) == "StateMachineAlreadyExists"
+        emulator.update_state_machine(stateMachineArn=arn, definition="[]")
+        resp = emulator.describe_state_machine(stateMachineArn=arn)
+        assert resp["definition"] == "[]"
+        assert resp["roleArn"] == "role:arn"
+        resp = emulator.list_state_machines()
+        assert [sm["name"] for sm in resp["stateMachines"]] == ["sm"]
+        emulator.delete_state_machine(stateMachineArn=arn)
+        with pytest.raises(bc_exc.ClientError) as e:
+            emulator.start_execution(stateMachineArn=arn)
+        assert _error_code(e) == "StateMachineDoesNotExist"
+
+    def _run_worker(self, emulator, activity_arn, fn):
+        """Complete one activity task in a thread."""
+        def run():
+            resp = {}
+            while "taskToken" not in resp:
+                resp = emulator.get_activity_task(
+                    activityArn=activity_arn,
+                    workerName="w")
+            try:
+                output = fn(json.loads(resp["input"]))
+            except Exception as e:
+                emulator.send_task_failure(
+                    taskToken=resp["taskToken"],
+                    error=type(e).__name__,
+                    cause=str(e))
+            else:
+                emulator.send_task_heartbeat(taskToken=resp["taskToken"])
+                emulator.send_task_success(
+                    taskToken=resp["taskToken"],
+                    output=json.dumps(output))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def _wait(self, emulator, arn):
+        """Wait for an execution to finish."""
+        for _ in range(500):
+            resp = emulator.describe_execution(executionArn=arn)
+            if resp["status"] != "RUNNING":
+                return resp
+            time.sleep(0.01)
+        raise AssertionError("Execution didn't finish")
+
+    @pytest.fixture
+    def state_machine_arn(self, emulator):
+        """Registered example state-machine's ARN."""
+        emulator.create_activity(name="spam")
+        return emulator.create_state_machine(
+            name="sm",
+            definition=json.dumps(_definition),
+            roleArn="role:arn")["stateMachineArn"]
+
+    def test_execution(self, emulator, state_machine_arn):
+        """Execution is run, with tasks dispatched to workers."""
+        activity_arn = _definition["States"]["t"]["Resource"]
+        thread = self._run_worker(emulator, activity_arn, lambda x: x["a"])
+        resp = emulator.start_execution(
+            stateMachineArn=state_machine_arn,
+            name="ex",
+            input='{"a": 42}')
+        arn = "arn:aws:states:us-east-1:123456789012:execution:sm:ex"
+        assert resp["executionArn"] == arn
+        resp = self._wait(emulator, arn)
+        thread.join()
+        assert resp["status"] == "SUCCEEDED"
+        assert json.loads(resp["output"]) == {"a": 42, "res": 42}
+        assert resp["stopDate"] >= resp["startDate"]
+
+        resp = emulator.get_execution_history(executionArn=arn)
+        assert [e["type"] for e in resp["events"]] == [
+            "ExecutionStarted",
+            "TaskStateEntered",
+            "ActivityScheduled",
+            "ActivityStarted",
+            "ActivitySucceeded",
+            "TaskStateExited",
+            "ExecutionSucceeded"]
+        assert resp["events"][3]["activityStartedEventDetails"] == {
+            "workerName": "w"}
+        resp = emulator.get_execution_history(
+            executionArn=arn,
+            reverseOrder=True,
+            maxResults=1)
+        assert resp["events"][0]["type"] == "ExecutionSucceeded"
+
+        resp = emulator.list_executions(stateMachineArn=state_machine_arn)
+        assert [e["name"] for e in resp["executions"]] == ["ex"]
+        resp = emulator.list_executions(
+            stateMachineArn=state_machine_arn,
+            statusFilter="RUNNING")
+        assert resp["executions"] == []
+
+        with pytest.raises(bc_exc.ClientError) as e:
+            emulator.start_execution(
+                stateMachineArn=state_machine_arn,
+                name="ex",
+                input='{"a": 1}')
+        assert _error_code(e) == "ExecutionAlreadyExists"
+
+    def test_execution_task_failed(self, emulator, state_machine_arn):
+        """Task failure fails execution."""
+        activity_arn = _definition["States"]["t"]["Resource"]
+
+        def fail(_):
+            raise ValueError("bla")
+
+        thread = self._run_worker(emulator, activity_arn, fail)
+        arn = emulator.start_execution(
+            stateMachineArn=state_machine_arn)["executionArn"]
+        resp = self._wait(emulator, arn)
+        thread.join()
+        assert resp["status"] == "FAILED"
+        resp = emulator.get_execution_history(executionArn=arn)
+        details = resp["events"][-1]["executionFailedEventDetails"]
+        assert details == {"error": "ValueError", "cause": "bla"}
+
+    def test_execution_missing_resource(self, emulator):
+        """Missing task resource fails execution, even if caught."""
+        definition = json.loads(json.dumps(_definition))
+        definition["States"]["t"]["Catch"] = [{
+            "ErrorEquals": ["States.ALL"],
+            "Next": "s"}]
+        definition["States"]["s"] = {"Type": "Succeed"}
+        state_machine_arn = emulator.create_state_machine(
+            name="sm",
+            definition=json.dumps(definition),
+            roleArn="role:arn")["stateMachineArn"]
+        arn = emulator.start_execution(
+            stateMachineArn=state_machine_arn)["executionArn"]
+        resp = self._wait(emulator, arn)
+        assert resp["status"] == "FAILED"
+        events = emulator.get_execution_history(executionArn=arn)["events"]
+        details = events[-1]["executionFailedEventDetails"]
+        assert details["error"] == "States.Runtime"
+
+    def test_stop_execution(self, emulator, state_machine_arn):
+        """Stopping execution aborts waiting task."""
+        arn = emulator.start_execution(
+            stateMachineArn=state_machine_arn)["executionArn"]
+        resp = emulator.stop_execution(executionArn=arn, error="Spam")
+        exp = emulator.describe_execution(executionArn=arn)
+        assert exp["status"] == "ABORTED"
+        assert exp["stopDate"] == resp["stopDate"]
+        events = emulator.get_execution_history(executionArn=arn)["events"]
+        details = events[-1]["executionAbortedEventDetails"]
+        assert details["error"] == "Spam"
+        activity_arn = _definition["States"]["t"]["Resource"]
+        assert emulator.get_activity_task(activityArn=activity_arn) == {}
+        with pytest.raises(bc_exc.ClientError) as e:
+            emulator.send_task_success(taskToken="spam", output="{}")
+        assert _error_code(e) == "TaskTimedOut"
+
+    def test_task_timeout(self, emulator):
+        """Tasks which aren't started in time time-out."""
+        emulator.create_activity(name="spam")
+        definition = json.loads(json.dumps(_definition))
+        definition["States"]["t"]["TimeoutSeconds"] = 0.01
+        state_machine_arn = emulator.create_state_machine(
+            name="sm",
+            definition=json.dumps(definition),
+            roleArn="role:arn")["stateMachineArn"]
+        arn = emulator.start_execution(
+            stateMachineArn=state_machine_arn)["executionArn"]
+        resp = self._wait(emulator, arn)
+        assert resp["status"] == "FAILED"
+        events = emulator.get_execution_history(executionArn=arn)["events"]
+        assert [e["type"] for e in events[-2:]] == [
+            "ActivityTimedOut",
+            "ExecutionFailed"]
+
+
+def test_session_integration():
+    """Activities, workers and executions run on an emulator session."""
+    emulator = tscr.Emulator(poll_timeout=0.05)
+    session = tscr.EmulatorSession(emulator)
+    assert session.session is None
+    assert session.sfn is emulator
+    assert session.region == "us-east-1"
+    assert session.account_id == "123456789012"
+
+    activities = sfini.ActivityRegistration(prefix="test", session=session)
+
+    @activities.activity("add")
+    def add(data):
+        return data["a"] + data["b"]
+
+    task = sfini.Task("add", add, result_path="$.sum")
+    state_machine = sfini.construct_state_machine(
+        "adding",
+        task,
+        session=session)
+    activities.register()
+    state_machine.register(role_arn="role:arn")
+    assert state_machine.is_registered()
+    update = emulator.update_state_machine
+    with mock.patch.object(emulator, "update_state_machine", wraps=update):
+        state_machine.register(allow_update=True)
+        emulator.update_state_machine.assert_not_called()
+
+    worker = sfini.Worker(add, session=session)
+    worker.start()
+    try:
+        execution = state_machine.start_execution({"a": 3, "b": 42})
+        execution.wait(timeout=10)
+    finally:
+        worker.end()
+        worker.join()
+    assert execution.status == "SUCCEEDED"
+    assert execution.output == {"a": 3, "b": 42, "sum": 45}
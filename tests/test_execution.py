@@ -7,12 +7,15 @@ import sfini
 import datetime
 import json
 from sfini.execution import history
+from botocore import exceptions as bc_exc
 
 
 @pytest.fixture
 def session():
     """AWS session mock."""
-    return mock.MagicMock(autospec=sfini.AWSSession)
+    session = mock.MagicMock(autospec=sfini.AWSSession)
+    session.execution_cache = None
+    return session
 
 
 class TestExecution:
@@ -380,6 +383,42 @@ class TestExecution:
         res_input_str = res_se_call[1]["input"]
         assert json.loads(res_input_str) == eg_input
 
+    class TestStartExisting:
+        """Execution starting when execution already exists."""
+        @staticmethod
+        def _error(code):
+            return bc_exc.ClientError({"Error": {"Code": code}}, "spam")
+
+        def test_allow_existing(self, execution, session):
+            """Existing execution is treated as started."""
+            execution.arn = None
+            execution.state_machine_arn = (
+                "arn:aws:states:spam-region:spamId:stateMachine:bla")
+            error = self._error("ExecutionAlreadyExists")
+            session.sfn.start_execution.side_effect = error
+            execution.start(allow_existing=True)
+            exp_arn = "arn:aws:states:spam-region:spamId:execution:bla:spam"
+            assert execution.arn == exp_arn
+            assert execution._status is None
+
+        def test_disallow_existing(self, execution, session):
+            """Existing execution raises."""
+            execution.arn = None
+            error = self._error("ExecutionAlreadyExists")
+            session.sfn.start_execution.side_effect = error
+            with pytest.raises(bc_exc.ClientError):
+                execution.start()
+            assert execution.arn is None
+
+        def test_other_error(self, execution, session):
+            """Other start errors are raised."""
+            execution.arn = None
+            error = self._error("InvalidName")
+            session.sfn.start_execution.side_effect = error
+            with pytest.raises(bc_exc.ClientError):
+                execution.start(allow_existing=True)
+            assert execution.arn is None
+
     def test_start_default_input(self, execution, session):
         """Execution starting."""
         # Setup environment
@@ -551,6 +590,245 @@ class TestExecution:
             executionArn="spam:arn")
         execution._raise_no_arn.assert_called_once_with()
 
+    class TestFollow:
+        """Execution history following."""
+        @staticmethod
+        def _event(j, event_type="PassStateEntered"):
+            return {
+                "id": j,
+                "type": event_type,
+                "timestamp": datetime.datetime.now(),
+                "stateEnteredEventDetails": {"name": "spam%d" % j}}
+
+        def test_follow(self, execution, session):
+            """New events are yielded until execution finishes."""
+            # Setup environment
+            execution._follow_page_size = 3
+            resps = [
+                {
+                    "events": [self._event(j) for j in (1, 2, 3)],
+                    "nextToken": "a"},
+                {"events": [self._event(4)]},
+                {"events": [self._event(4)]},
+                {
+                    "events": [self._event(j) for j in (4, 5, 6)],
+                    "nextToken": "b"},
+                {"events": [self._event(7, "ExecutionSucceeded")]}]
+            session.sfn.get_execution_history.side_effect = resps
+
+            # Build expectation
+            kw = {"executionArn": "spam:arn", "maxResults": 3}
+            exp_calls = [
+                mock.call(**kw),
+                mock.call(nextToken="a", **kw),
+                mock.call(nextToken="a", **kw),
+                mock.call(nextToken="a", **kw),
+                mock.call(nextToken="b", **kw)]
+
+            # Run function
+            with mock.patch.object(tscr.time, "sleep") as sleep_mock:
+                res = list(execution.follow(poll_interval=0.5))
+
+            # Check result
+            assert [e.event_id for e in res] == list(range(1, 8))
+            assert res[-1].event_type == "ExecutionSucceeded"
+            call_args_list = session.sfn.get_execution_history.call_args_list
+            assert call_args_list == exp_calls
+            assert sleep_mock.call_args_list == [mock.call(0.5)] * 2
+
+        def test_token_expired(self, execution, session):
+            """History is paged from the start when the token expires."""
+            # Setup environment
+            execution._follow_page_size = 2
+            resp = {"Error": {"Code": "InvalidToken"}}
+            resps = [
+                {
+                    "events": [self._event(j) for j in (1, 2)],
+                    "nextToken": "a"},
+                {"events": [self._event(3)]},
+                bc_exc.ClientError(resp, "GetExecutionHistory"),
+                {
+                    "events": [self._event(j) for j in (1, 2)],
+                    "nextToken": "b"},
+                {
+                    "events": [
+                        self._event(3),
+                        self._event(4, "ExecutionSucceeded")]}]
+            session.sfn.get_execution_history.side_effect = resps
+
+            # Build expectation
+            kw = {"executionArn": "spam:arn", "maxResults": 2}
+            exp_calls = [
+                mock.call(**kw),
+                mock.call(nextToken="a", **kw),
+                mock.call(nextToken="a", **kw),
+                mock.call(**kw),
+                mock.call(nextToken="b", **kw)]
+
+            # Run function
+            with mock.patch.object(tscr.time, "sleep"):
+                res = list(execution.follow(poll_interval=0.5))
+
+            # Check result
+            assert [e.event_id for e in res] == [1, 2, 3, 4]
+            call_args_list = session.sfn.get_execution_history.call_args_list
+            assert call_args_list == exp_calls
+
+        def test_finished(self, execution, session):
+            """Finished execution's history is yielded once."""
+            resp = {"events": [self._event(1, "ExecutionFailed")]}
+            session.sfn.get_execution_history.return_value = resp
+            res = list(execution.follow())
+            assert [e.event_id for e in res] == [1]
+            session.sfn.get_execution_history.assert_called_once_with(
+                executionArn="spam:arn",
+                maxResults=100)
+
+    def test_get_last_events(self, execution, session):
+        """Most recent history events querying."""
+        # Setup environment
+        resp = {"events": [{"id": j} for j in (9, 8, 7)], "nextToken": "a"}
+        session.sfn.get_execution_history.return_value = resp
+        events = [mock.Mock(spec=history.Event) for _ in range(3)]
+        ph_mock = mock.Mock(return_value=events)
+
+        # Run function
+        with mock.patch.object(history, "parse_history", ph_mock):
+            res = execution.get_last_events(count=3)
+
+        # Check result
+        assert res == events
+        ph_mock.assert_called_once_with([{"id": j} for j in (7, 8, 9)])
+        session.sfn.get_execution_history.assert_called_once_with(
+            executionArn="spam:arn",
+            reverseOrder=True,
+            maxResults=3)
+
+    class TestFormatSummary:
+        """Execution summary formatting."""
+        @pytest.fixture
+        def now(self):
+            """Current time."""
+            return datetime.datetime.now()
+
+        def test_failed(self, execution, now):
+            """Execution failed."""
+            event = history.Failed(
+                now,
+                "ExecutionFailed",
+                42,
+                error="SpamError",
+                cause="spam spilled")
+            execution.get_last_events = mock.Mock(return_value=[event])
+            exp = (
+                "ExecutionFailed [42] @ %s:\n  error: SpamError\n"
+                "  cause: spam spilled") % now
+            assert execution.format_summary() == exp
+            execution.get_last_events.assert_called_once_with(count=1)
+            assert execution._status == "FAILED"
+            assert execution._stop_date == now
+
+        def test_succeeded(self, execution, now):
+            """Execution succeeded."""
+            event = history.ObjectSucceeded(
+                now,
+                "ExecutionSucceeded",
+                42,
+                output={"foo": [1, 2]})
+            execution.get_last_events = mock.Mock(return_value=[event])
+            exp = "ExecutionSucceeded [42] @ %s\nOutput: " % now
+            exp += "{\"foo\": [1, 2]}"
+            assert execution.format_summary() == exp
+            assert execution._status == "SUCCEEDED"
+            assert execution._output == {"foo": [1, 2]}
+
+        def test_running(self, execution, now):
+            """Execution is running."""
+            event = history.StateEntered(now, "TaskStateEntered", 42, "bla")
+            execution.get_last_events = mock.Mock(return_value=[event])
+            exp = "TaskStateEntered [42] @ %s:\n  name: bla" % now
+            assert execution.format_summary() == exp
+            assert execution._status is None
+
+        def test_running_activity_succeeded(self, execution, now):
+            """Execution is running, after an activity succeeded."""
+            event = history.ObjectSucceeded(
+                now,
+                "ActivitySucceeded",
+                42,
+                output={"foo": [1, 2]})
+            execution.get_last_events = mock.Mock(return_value=[event])
+            execution._update = mock.Mock()
+            assert "Output" not in execution.format_summary()
+            assert execution._status is None
+            with pytest.raises(RuntimeError):
+                _ = execution.output
+
+    class TestCache:
+        """Execution querying with an execution cache."""
+        @pytest.fixture
+        def cache(self, session):
+            """Execution cache mock."""
+            session.execution_cache = mock.Mock(
+                spec=sfini.execution.cache.ExecutionCache)
+            return session.execution_cache
+
+        def test_update_cached(self, execution, session, cache):
+            """Execution description is found in cache."""
+            now = datetime.datetime.now()
+            cache.get_description.return_value = {
+                "executionArn": "spam:arn",
+                "status": "SUCCEEDED",
+                "startDate": now - datetime.timedelta(hours=1),
+                "stopDate": now}
+            execution._update()
+            assert execution._status == "SUCCEEDED"
+            assert execution._stop_date == now
+            cache.get_description.assert_called_once_with("spam:arn")
+            session.sfn.describe_execution.assert_not_called()
+            cache.put_description.assert_not_called()
+
+        def test_update_uncached(self, execution, session, cache):
+            """Execution description is stored in cache."""
+            now = datetime.datetime.now()
+            resp = {
+                "executionArn": "spam:arn",
+                "status": "FAILED",
+                "startDate": now - datetime.timedelta(hours=1),
+                "stopDate": now}
+            session.sfn.describe_execution.return_value = resp
+            cache.get_description.return_value = None
+            execution._update()
+            assert execution._status == "FAILED"
+            session.sfn.describe_execution.assert_called_once_with(
+                executionArn="spam:arn")
+            cache.put_description.assert_called_once_with("spam:arn", resp)
+
+        def test_history_cached(self, execution, session, cache):
+            """Execution history is found in cache."""
+            history_events = [{"id": j} for j in range(4)]
+            cache.get_history.return_value = history_events
+            ph_mock = mock.Mock(return_value=[])
+            with mock.patch.object(history, "parse_history", ph_mock):
+                execution.get_history()
+            ph_mock.assert_called_once_with(history_events)
+            session.sfn.get_execution_history.assert_not_called()
+            cache.put_history.assert_not_called()
+
+        def test_history_uncached(self, execution, session, cache):
+            """Execution history is stored in cache."""
+            history_events = [{"id": j} for j in range(4)]
+            session.sfn.get_execution_history.return_value = {
+                "events": history_events}
+            cache.get_history.return_value = None
+            ph_mock = mock.Mock(return_value=[])
+            with mock.patch.object(history, "parse_history", ph_mock):
+                execution.get_history()
+            ph_mock.assert_called_once_with(history_events)
+            cache.put_history.assert_called_once_with(
+                "spam:arn",
+                history_events)
+
     @pytest.mark.parametrize(
         ("output", "exp_suff"),
         [
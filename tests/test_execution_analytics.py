@@ -0,0 +1,172 @@
+"""Test ``sfini.execution.analytics``."""
+
+from sfini.execution import analytics as tscr
+import pytest
+from unittest import mock
+from sfini.execution import history
+import datetime
+
+np = pytest.importorskip("numpy")
+_t0 = datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)
+
+
+def _event(event_id, event_type, seconds, previous_event_id, **details):
+    """Build an history event."""
+    event = {
+        "id": event_id,
+        "type": event_type,
+        "timestamp": _t0 + datetime.timedelta(seconds=seconds)}
+    if previous_event_id is not None:
+        event["previousEventId"] = previous_event_id
+    details_key = history._type_keys.get(event_type)
+    if details_key is not None:
+        event[details_key] = details
+    return event
+
+
+def _history(offset, task_time, n_failures=0, error="SpamError"):
+    """Build an history of task 'a' then pass 'b'."""
+    history_events = [
+        _event(1, "ExecutionStarted", offset, None),
+        _event(2, "TaskStateEntered", offset, 1, name="a")]
+    t = offset
+    previous_id = 2
+    for _ in range(n_failures):
+        event_id = len(history_events) + 1
+        history_events.extend([
+            _event(event_id, "ActivityScheduled", t, previous_id,
+                   resource="act:arn"),
+            _event(event_id + 1, "ActivityStarted", t, event_id,
+                   workerName="w"),
+            _event(event_id + 2, "ActivityFailed", t + 1, event_id + 1,
+                   error=error)])
+        t += 1
+        previous_id = event_id + 2
+    event_id = len(history_events) + 1
+    history_events.extend([
+        _event(event_id, "ActivityScheduled", t, previous_id,
+               resource="act:arn"),
+        _event(event_id + 1, "ActivityStarted", t, event_id, workerName="w"),
+        _event(event_id + 2, "ActivitySucceeded", t + task_time, event_id + 1),
+        _event(event_id + 3, "TaskStateExited", t + task_time, event_id + 2,
+               name="a"),
+        _event(event_id + 4, "PassStateEntered", t + task_time, event_id + 3,
+               name="b")])
+    return history.parse_history(history_events)
+
+
+@pytest.fixture
+def histories():
+    """Example execution histories."""
+    return [
+        ("arn:1", _history(0, 2.0)),
+        ("arn:2", _history(10, 4.0, n_failures=2)),
+        ("arn:3", _history(3600, 6.0, n_failures=1, error="EggsError")),
+        ("arn:4", _history(3610, 8.0))]
+
+
+class TestHistoryTable:
+    """Test ``sfini.execution.analytics.HistoryTable``."""
+    @pytest.fixture
+    def table(self, histories):
+        """An example HistoryTable instance."""
+        return tscr.HistoryTable.from_histories(histories)
+
+    def test_from_histories(self, table):
+        """Columns are built from histories."""
+        assert table.execution_arns == ["arn:1", "arn:2", "arn:3", "arn:4"]
+        assert table.state_names == ["a", "b"]
+        assert table.error_codes == []
+        np.testing.assert_array_equal(
+            table.execution,
+            [0, 0, 1, 1, 2, 2, 3, 3])
+        np.testing.assert_array_equal(table.state, [0, 1] * 4)
+        np.testing.assert_array_equal(
+            table.duration,
+            [2.0, np.nan, 6.0, np.nan, 7.0, np.nan, 8.0, np.nan])
+        np.testing.assert_array_equal(table.retries, [0, 0, 2, 0, 1, 0, 0, 0])
+        np.testing.assert_array_equal(table.error, [-1] * 8)
+        assert table.start[2] == _t0.timestamp() + 10
+
+    def test_failed_state(self):
+        """State ending in a failed task attempt has error code."""
+        events = history.parse_history([
+            _event(1, "ExecutionStarted", 0, None),
+            _event(2, "TaskStateEntered", 0, 1, name="a"),
+            _event(3, "ActivityScheduled", 0, 2, resource="act:arn"),
+            _event(4, "ActivityStarted", 1, 3, workerName="w"),
+            _event(5, "ActivityFailed", 2, 4, error="SpamError"),
+            _event(6, "TaskStateExited", 2, 5, name="a")])
+        table = tscr.HistoryTable.from_histories([("arn:1", events)])
+        assert table.error_codes == ["SpamError"]
+        np.testing.assert_array_equal(table.error, [0])
+        assert table.failure_counts() == {("a", "SpamError"): 1}
+
+    def test_from_executions(self, histories):
+        """Executions' histories are fetched."""
+        session = mock.Mock()
+        executions = []
+        for arn, events in histories:
+            execution = mock.Mock(arn=arn, session=session)
+            execution.get_history.return_value = events
+            executions.append(execution)
+        table = tscr.HistoryTable.from_executions(
+            iter(executions),
+            max_workers=2)
+        assert table.execution_arns == ["arn:1", "arn:2", "arn:3", "arn:4"]
+        assert len(table.state) == 8
+        [e.get_history.assert_called_once_with() for e in executions]
+        session.reserve_connections.assert_called_once_with(2)
+
+    def test_str(self, table):
+        """Table string representation."""
+        exp = "history table (4 executions, 2 states, 8 rows)"
+        assert str(table) == exp
+
+    def test_percentiles(self, table):
+        """Percentiles of exited states' durations."""
+        res = table.percentiles(q=[0, 50, 100])
+        assert list(res) == ["a"]
+        np.testing.assert_allclose(res["a"], [2.0, 6.5, 8.0])
+
+    def test_percentiles_default(self, table):
+        """Default percentiles are p50, p95 and p99."""
+        res = table.percentiles()
+        np.testing.assert_allclose(
+            res["a"],
+            np.percentile([2.0, 6.0, 7.0, 8.0], [50, 95, 99]))
+
+    def test_no_exited(self, table):
+        """No exited states give empty results."""
+        empty = tscr.HistoryTable.from_histories([])
+        assert empty.percentiles() == {}
+        starts, values = empty.trend(3600)
+        assert starts.size == values.size == 0
+        starts, values = table.trend(3600, state_name="b")
+        assert starts.size == values.size == 0
+
+    def test_histogram(self, table):
+        """Histogram of state durations."""
+        counts, edges = table.histogram("a", bins=[0, 5, 10])
+        np.testing.assert_array_equal(counts, [1, 3])
+        np.testing.assert_array_equal(edges, [0, 5, 10])
+
+    def test_histogram_unknown_state(self, table):
+        """Unknown state raises."""
+        with pytest.raises(KeyError):
+            table.histogram("c")
+
+    def test_trend(self, table):
+        """State durations are grouped by interval."""
+        starts, values = table.trend(3600, state_name="a", q=100)
+        t0 = _t0.timestamp()
+        np.testing.assert_array_equal(starts, [t0, t0 + 3600])
+        np.testing.assert_allclose(values, [6.0, 8.0])
+
+    def test_retry_counts(self, table):
+        """Retries are counted per state."""
+        assert table.retry_counts() == {"a": 3, "b": 0}
+
+    def test_failure_counts_none(self, table):
+        """Retried states which succeeded aren't failures."""
+        assert table.failure_counts() == {}
@@ -0,0 +1,175 @@
+"""Test ``sfini.execution.backlog``."""
+
+from sfini.execution import backlog as tscr
+import pytest
+from unittest import mock
+import sfini
+from sfini.execution import history
+import datetime
+
+_t0 = datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)
+
+
+def _event(event_id, event_type, seconds, previous_event_id, **details):
+    """Build an history event."""
+    event = {
+        "id": event_id,
+        "type": event_type,
+        "timestamp": _t0 + datetime.timedelta(seconds=seconds)}
+    if previous_event_id is not None:
+        event["previousEventId"] = previous_event_id
+    details_key = history._type_keys.get(event_type)
+    if details_key is not None:
+        event[details_key] = details
+    return event
+
+
+def test_percentile():
+    """Linearly-interpolated percentile."""
+    assert tscr._percentile([], 50) is None
+    assert tscr._percentile([3.0], 95) == 3.0
+    assert tscr._percentile([1.0, 2.0, 4.0], 50) == 2.0
+    assert tscr._percentile([1.0, 2.0, 4.0], 75) == 3.0
+    assert tscr._percentile([1.0, 2.0, 4.0], 100) == 4.0
+
+
+class TestActivityQueueMetric:
+    """Test ``sfini.execution.backlog.ActivityQueueMetric``."""
+    @pytest.fixture
+    def metric(self):
+        """An example ActivityQueueMetric instance."""
+        metric = tscr.ActivityQueueMetric("act:arn", _t0)
+        metric.wait_times = [4.0, 1.0, 2.0]
+        metric.waiting_times = [5.0, 10.0]
+        return metric
+
+    def test_str(self, metric):
+        """ActivityQueueMetric string representation."""
+        exp = "'act:arn' queue (2 waiting, median wait: 2.0 seconds)"
+        assert str(metric) == exp
+
+    def test_backlog(self, metric):
+        """Number of waiting tasks."""
+        assert metric.backlog == 2
+
+    @pytest.mark.parametrize(
+        ("waiting_times", "exp"),
+        [([5.0, 10.0], 10.0), ([], None)])
+    def test_oldest_wait(self, metric, waiting_times, exp):
+        """Longest current wait."""
+        metric.waiting_times = waiting_times
+        assert metric.oldest_wait == exp
+
+    def test_percentile(self, metric):
+        """Wait-time percentile."""
+        assert metric.percentile(50) == 2.0
+
+    def test_to_dict(self, metric):
+        """Conversion to metric."""
+        exp = {
+            "activityArn": "act:arn",
+            "timestamp": "2019-07-01T00:00:00+00:00",
+            "samples": 3,
+            "waitP50": 2.0,
+            "waitP100": 4.0,
+            "backlog": 2,
+            "oldestWait": 10.0}
+        assert metric.to_dict(percentiles=(50, 100)) == exp
+
+
+class TestQueueLatencySampler:
+    """Test ``sfini.execution.backlog.QueueLatencySampler``."""
+    @pytest.fixture
+    def state_machines(self):
+        """State-machine mocks."""
+        state_machines = [
+            mock.Mock(spec=sfini.state_machine.StateMachine)
+            for _ in range(2)]
+        for state_machine in state_machines:
+            state_machine.session = mock.Mock(spec=sfini.AWSSession)
+        return state_machines
+
+    @pytest.fixture
+    def sampler(self, state_machines):
+        """An example QueueLatencySampler instance."""
+        return tscr.QueueLatencySampler(
+            state_machines,
+            max_executions=3,
+            max_events=10,
+            max_workers=2)
+
+    def test_init(self, sampler, state_machines):
+        """QueueLatencySampler initialisation."""
+        assert sampler.state_machines == state_machines
+        assert sampler.max_executions == 3
+        assert sampler.max_events == 10
+        assert sampler.max_workers == 2
+
+    def test_str(self, sampler):
+        """QueueLatencySampler string representation."""
+        assert str(sampler) == "queue latency sampler of 2 state-machines"
+
+    def test_sample(self, sampler, state_machines):
+        """Queue latency is sampled from recent executions."""
+        # Setup environment
+        finished_events = history.parse_history([
+            _event(3, "ActivityScheduled", 0, 2, resource="a:arn"),
+            _event(4, "ActivityStarted", 3, 3, workerName="w"),
+            _event(5, "ActivityFailed", 4, 4, error="SpamError"),
+            _event(6, "ActivityScheduled", 5, 5, resource="a:arn"),
+            _event(7, "ActivityStarted", 6, 6, workerName="w"),
+            _event(8, "ActivitySucceeded", 8, 7),
+            _event(9, "TaskStateExited", 8, 8, name="a"),
+            _event(10, "ExecutionSucceeded", 8, 9)])
+        running_events = history.parse_history([
+            _event(11, "ActivityStarted", 10, 10, workerName="w"),
+            _event(12, "ActivitySucceeded", 11, 11),
+            _event(13, "TaskStateExited", 11, 12, name="a"),
+            _event(14, "TaskStateEntered", 11, 13, name="b"),
+            _event(15, "ActivityScheduled", 11, 14, resource="b:arn")])
+        timed_out_events = history.parse_history([
+            _event(3, "ActivityScheduled", 0, 2, resource="b:arn"),
+            _event(4, "ActivityScheduleFailed", 1, 3, error="SpamError")])
+
+        executions = [mock.Mock() for _ in range(5)]
+        executions[0].get_last_events.return_value = finished_events
+        executions[1].get_last_events.return_value = running_events
+        executions[2].get_last_events.return_value = timed_out_events
+        executions[4].get_last_events.return_value = []
+        state_machines[0].iter_executions.return_value = iter(executions[:4])
+        state_machines[1].iter_executions.return_value = iter(executions[4:])
+
+        now = _t0 + datetime.timedelta(seconds=20)
+        datetime_mock = mock.Mock(wraps=datetime.datetime)
+        datetime_mock.now.return_value = now
+
+        # Run function
+        with mock.patch.object(datetime, "datetime", datetime_mock):
+            res = sampler.sample()
+
+        # Check result
+        assert set(res) == {"a:arn", "b:arn"}
+        assert res["a:arn"].activity_arn == "a:arn"
+        assert res["a:arn"].timestamp == now
+        assert res["a:arn"].wait_times == [3.0, 1.0]
+        assert res["a:arn"].waiting_times == []
+        assert res["b:arn"].wait_times == []
+        assert res["b:arn"].waiting_times == [9.0]
+        [s.iter_executions.assert_called_once_with() for s in state_machines]
+        for state_machine in state_machines:
+            state_machine.session.reserve_connections.assert_called_once_with(
+                sampler.max_workers)
+        for execution in executions[:3] + executions[4:]:
+            execution.get_last_events.assert_called_once_with(count=10)
+        executions[3].get_last_events.assert_not_called()
+
+    def test_iter_samples(self, sampler):
+        """Samples are taken periodically."""
+        sampler.sample = mock.Mock(side_effect=[{"a": 1}, {"a": 2}])
+        time_mock = mock.Mock()
+        time_mock.monotonic.side_effect = [0.0, 1.0, 10.0, 20.0]
+        with mock.patch.object(tscr, "time", time_mock):
+            samples = sampler.iter_samples(interval=5.0)
+            assert next(samples) == {"a": 1}
+            assert next(samples) == {"a": 2}
+        assert time_mock.sleep.call_args_list == [mock.call(4.0)]
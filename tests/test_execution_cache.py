@@ -0,0 +1,109 @@
+"""Test ``sfini.execution.cache``."""
+
+from sfini.execution import cache as tscr
+import pytest
+import datetime
+
+
+@pytest.fixture
+def now():
+    """Current time."""
+    return datetime.datetime.now(tz=datetime.timezone.utc)
+
+
+def test_encoding(now):
+    """API response encoding and decoding."""
+    data = {"a": [1, "spam", None], "b": now, "c": {"d": now}}
+    res = tscr._decode(tscr._encode(data))
+    assert res == data
+
+
+class TestExecutionCache:
+    """Test ``sfini.execution.cache.ExecutionCache``."""
+    @pytest.fixture
+    def cache(self):
+        """An example ExecutionCache instance."""
+        cache = tscr.ExecutionCache(":memory:", max_size=4096)
+        yield cache
+        cache.close()
+
+    def test_init(self, cache):
+        """ExecutionCache initialisation."""
+        assert cache.path == ":memory:"
+        assert cache.max_size == 4096
+
+    def test_persistence(self, tmpdir, now):
+        """Data is persisted between instances."""
+        path = str(tmpdir.join("cache.sqlite"))
+        desc = {"status": "SUCCEEDED", "startDate": now}
+        cache = tscr.ExecutionCache(path)
+        cache.put_description("spam:arn", desc)
+        cache.close()
+        cache = tscr.ExecutionCache(path)
+        assert cache.get_description("spam:arn") == desc
+        cache.close()
+
+    class TestDescription:
+        """Execution description storage."""
+        @pytest.mark.parametrize(
+            "status",
+            ["SUCCEEDED", "FAILED", "TIMED_OUT", "ABORTED"])
+        def test_finished(self, cache, now, status):
+            """Finished execution description is stored."""
+            desc = {"status": status, "startDate": now, "output": "{}"}
+            cache.put_description("spam:arn", desc)
+            assert cache.get_description("spam:arn") == desc
+            assert cache.get_description("bla:arn") is None
+
+        def test_running(self, cache, now):
+            """Running execution description is not stored."""
+            desc = {"status": "RUNNING", "startDate": now}
+            cache.put_description("spam:arn", desc)
+            assert cache.get_description("spam:arn") is None
+
+    class TestHistory:
+        """Execution history storage."""
+        def test_finished(self, cache, now):
+            """Finished execution history is stored."""
+            events = [
+                {"id": 1, "type": "ExecutionStarted", "timestamp": now},
+                {"id": 2, "type": "ExecutionFailed", "timestamp": now}]
+            cache.put_history("spam:arn", events)
+            assert cache.get_history("spam:arn") == events
+            assert cache.get_description("spam:arn") is None
+
+        def test_running(self, cache, now):
+            """Running execution history is not stored."""
+            events = [{"id": 1, "type": "ExecutionStarted", "timestamp": now}]
+            cache.put_history("spam:arn", events)
+            cache.put_history("bla:arn", [])
+            assert cache.get_history("spam:arn") is None
+            assert cache.get_history("bla:arn") is None
+
+    def test_eviction(self, cache, now):
+        """Least-recently used executions are evicted."""
+        # Build input
+        descs = [
+            {"status": "SUCCEEDED", "output": str(list(range(j, j + 400)))}
+            for j in range(6)]
+
+        # Setup environment
+        sizes = [len(tscr._encode(desc)) for desc in descs]
+        cache.max_size = sum(sizes[:5])
+
+        # Run function
+        for j, desc in enumerate(descs[:-1]):
+            cache.put_description("exec%d:arn" % j, desc)
+        cache.get_description("exec0:arn")
+        cache.put_description("exec5:arn", descs[-1])
+
+        # Check result
+        assert cache.get_description("exec0:arn") == descs[0]
+        assert cache.get_description("exec1:arn") is None
+        assert cache.get_description("exec5:arn") == descs[5]
+
+    def test_clear(self, cache):
+        """Cache clearing."""
+        cache.put_description("spam:arn", {"status": "SUCCEEDED"})
+        cache.clear()
+        assert cache.get_description("spam:arn") is None
@@ -0,0 +1,159 @@
+"""Test ``sfini.execution.export``."""
+
+from sfini.execution import export as tscr
+import pytest
+from unittest import mock
+import datetime
+import json
+
+_t0 = datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)
+
+
+def _history_events(n):
+    """Build an example history."""
+    history_events = [{
+        "id": 1,
+        "type": "ExecutionStarted",
+        "timestamp": _t0,
+        "executionStartedEventDetails": {"input": "{}"}}]
+    for j in range(2, n):
+        history_events.append({
+            "id": j,
+            "type": "PassStateEntered",
+            "timestamp": _t0 + datetime.timedelta(seconds=j),
+            "previousEventId": j - 1,
+            "stateEnteredEventDetails": {"name": "s%d" % j}})
+    history_events.append({
+        "id": n,
+        "type": "ExecutionFailed",
+        "timestamp": _t0 + datetime.timedelta(seconds=n),
+        "previousEventId": n - 1,
+        "executionFailedEventDetails": {"error": "SpamError"}})
+    return history_events
+
+
+@pytest.fixture
+def executions():
+    """Execution mocks: one paginated, and one cached."""
+    execution_a = mock.Mock(arn="a:arn")
+    execution_a.session.execution_cache = None
+    history_events = _history_events(4)
+    execution_a.session.sfn.get_execution_history.side_effect = [
+        {"events": history_events[:2], "nextToken": "42"},
+        {"events": history_events[2:]}]
+    execution_b = mock.Mock(arn="b:arn")
+    execution_b.session.execution_cache.get_history.return_value = (
+        _history_events(2))
+    return [execution_a, execution_b]
+
+
+@pytest.fixture
+def exp_rows():
+    """Expected flattened rows of example executions."""
+    return [
+        ("a:arn", 1, "ExecutionStarted", _t0, None, None, None),
+        (
+            "a:arn",
+            2,
+            "PassStateEntered",
+            _t0 + datetime.timedelta(seconds=2),
+            "s2",
+            1,
+            None),
+        (
+            "a:arn",
+            3,
+            "PassStateEntered",
+            _t0 + datetime.timedelta(seconds=3),
+            "s3",
+            2,
+            None),
+        (
+            "a:arn",
+            4,
+            "ExecutionFailed",
+            _t0 + datetime.timedelta(seconds=4),
+            None,
+            3,
+            "SpamError"),
+        ("b:arn", 1, "ExecutionStarted", _t0, None, None, None),
+        (
+            "b:arn",
+            2,
+            "ExecutionFailed",
+            _t0 + datetime.timedelta(seconds=2),
+            None,
+            1,
+            "SpamError")]
+
+
+def test_iter_rows(executions, exp_rows):
+    """Events are flattened, page by page."""
+    assert list(tscr.iter_rows(executions)) == exp_rows
+    get_execution_history = executions[0].session.sfn.get_execution_history
+    assert get_execution_history.call_args_list == [
+        mock.call(executionArn="a:arn"),
+        mock.call(executionArn="a:arn", nextToken="42")]
+    get_history = executions[1].session.execution_cache.get_history
+    get_history.assert_called_once_with("b:arn")
+
+
+def test_iter_rows_lazy(executions):
+    """Executions are consumed as rows are consumed."""
+    executions_iter = iter(executions)
+    rows = tscr.iter_rows(executions_iter)
+    assert next(rows)[0] == "a:arn"
+    assert next(executions_iter) is executions[1]
+
+
+def test_iter_column_batches(executions, exp_rows):
+    """Rows are batched into columns."""
+    res = list(tscr.iter_column_batches(executions, batch_size=4))
+    assert len(res) == 2
+    assert [list(b) for b in res] == [list(tscr.COLUMNS)] * 2
+    assert res[0]["event_id"] == [1, 2, 3, 4]
+    assert res[1]["execution_arn"] == ["b:arn", "b:arn"]
+    assert res[1]["error"] == [None, "SpamError"]
+    exp_columns = [list(c) for c in zip(*exp_rows[:4])]
+    assert list(res[0].values()) == exp_columns
+
+
+def test_write_ndjson(executions, exp_rows, tmp_path):
+    """Events are written as newline-delimited JSON."""
+    path = tmp_path / "history.ndjson"
+    assert tscr.write_ndjson(executions, path) == 6
+    lines = path.read_text().splitlines()
+    assert len(lines) == 6
+    assert json.loads(lines[3]) == {
+        "execution_arn": "a:arn",
+        "event_id": 4,
+        "event_type": "ExecutionFailed",
+        "timestamp": "2019-07-01T00:00:04+00:00",
+        "state_name": None,
+        "previous_event_id": 3,
+        "error": "SpamError"}
+
+
+def test_iter_record_batches(executions):
+    """Events are converted to Arrow record batches."""
+    pytest.importorskip("pyarrow")
+    res = list(tscr.iter_record_batches(executions, batch_size=5))
+    assert [b.num_rows for b in res] == [5, 1]
+    assert res[0].schema.names == list(tscr.COLUMNS)
+    assert res[0].column("state_name").to_pylist() == [
+        None, "s2", "s3", None, None]
+    assert res[1].column("timestamp").to_pylist() == [
+        _t0 + datetime.timedelta(seconds=2)]
+
+
+def test_write_parquet(executions, exp_rows, tmp_path):
+    """Events are written to Parquet, one row group per batch."""
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    path = tmp_path / "history.parquet"
+    assert tscr.write_parquet(executions, path, batch_size=4) == 6
+    parquet_file = pq.ParquetFile(str(path))
+    assert parquet_file.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.column_names == list(tscr.COLUMNS)
+    assert [tuple(r.values()) for r in table.to_pylist()] == exp_rows
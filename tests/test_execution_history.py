@@ -709,3 +709,13 @@ def test_parse_history():
     assert res == exp
     for k, c_mock in type_classes.items():
         assert c_mock.method_calls == exp_calls[k]
+
+
+@pytest.mark.parametrize(
+    ("details_str", "exp"),
+    [("", "spam [42] @ now"), ("bla", "spam [42] @ now:\n  bla")])
+def test_format_event(details_str, exp):
+    """History event formatting."""
+    event = tscr.Event("now", "spam", 42)
+    event.details_str = details_str
+    assert tscr.format_event(event) == exp
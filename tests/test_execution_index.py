@@ -0,0 +1,204 @@
+"""Test ``sfini.execution.index``."""
+
+from sfini.execution import index as tscr
+import pytest
+from unittest import mock
+import sfini
+import datetime
+from botocore import exceptions as bc_exc
+
+
+@pytest.fixture
+def now():
+    """Current time."""
+    return datetime.datetime.now(tz=datetime.timezone.utc)
+
+
+def _item(j, now, status="SUCCEEDED", duration=None):
+    """Build an execution list-item."""
+    item = {
+        "executionArn": "exec%d:arn" % j,
+        "stateMachineArn": "spam:arn",
+        "name": "exec%d" % j,
+        "status": status,
+        "startDate": now - datetime.timedelta(minutes=100 - j)}
+    if status != "RUNNING":
+        duration = j if duration is None else duration
+        stop = item["startDate"] + datetime.timedelta(seconds=duration)
+        item["stopDate"] = stop
+    return item
+
+
+class TestExecutionIndex:
+    """Test ``sfini.execution.index.ExecutionIndex``."""
+    @pytest.fixture
+    def state_machine(self):
+        """State-machine mock."""
+        state_machine = mock.Mock(spec=sfini.state_machine.StateMachine)
+        state_machine.arn = "spam:arn"
+        state_machine.session = mock.Mock()
+        return state_machine
+
+    @pytest.fixture
+    def index(self, state_machine):
+        """An example ExecutionIndex instance."""
+        index = tscr.ExecutionIndex(state_machine, ":memory:")
+        yield index
+        index.close()
+
+    def test_init(self, index, state_machine):
+        """ExecutionIndex initialisation."""
+        assert index.state_machine is state_machine
+        assert index.path == ":memory:"
+
+    def test_sync(self, index, state_machine, now):
+        """Initial index synchronisation."""
+        # Setup environment
+        items = [_item(j, now) for j in range(5)][::-1]
+        list_executions = state_machine.session.sfn.list_executions
+        list_executions.side_effect = [
+            {"executions": items[:3], "nextToken": "42"},
+            {"executions": items[3:]}]
+
+        # Run function
+        index.sync()
+
+        # Check result
+        assert index.count() == 5
+        assert list_executions.call_args_list == [
+            mock.call(stateMachineArn="spam:arn"),
+            mock.call(stateMachineArn="spam:arn", nextToken="42")]
+
+    def test_sync_incremental(self, index, state_machine, now):
+        """Synchronisation stops at newest known execution."""
+        # Setup environment
+        sfn = state_machine.session.sfn
+        items = [_item(j, now) for j in range(5)][::-1]
+        running = _item(5, now, status="RUNNING")
+        sfn.list_executions.side_effect = [
+            {"executions": [running] + items},
+            {"executions": [running]}]
+        index.sync()
+
+        finished = _item(5, now, duration=30)
+        new_items = [_item(j, now) for j in range(6, 9)][::-1]
+        sfn.list_executions.side_effect = [
+            {"executions": new_items[:2], "nextToken": "42"},
+            {"executions": new_items[2:] + [finished], "nextToken": "17"},
+            {"executions": []}]
+        sfn.describe_execution.return_value = finished
+
+        # Run function
+        index.sync()
+
+        # Check result
+        assert index.count() == 9
+        assert index.count(status="RUNNING") == 0
+        assert sfn.list_executions.call_count == 5
+        assert sfn.list_executions.call_args_list[-1] == mock.call(
+            stateMachineArn="spam:arn",
+            statusFilter="RUNNING")
+        sfn.describe_execution.assert_called_once_with(
+            executionArn="exec5:arn")
+        res = index.query(min_duration=29, max_duration=31)
+        assert [r["arn"] for r in res] == ["exec5:arn"]
+
+    def test_sync_missing(self, index, state_machine, now):
+        """Running executions which no longer exist are removed."""
+        # Setup environment
+        sfn = state_machine.session.sfn
+        items = [_item(j, now) for j in range(5)][::-1]
+        running = [_item(j, now, status="RUNNING") for j in (5, 6)][::-1]
+        sfn.list_executions.side_effect = [
+            {"executions": running + items},
+            {"executions": running}]
+        index.sync()
+
+        finished = _item(5, now, duration=30)
+        missing_exc = bc_exc.ClientError(
+            {"Error": {"Code": "ExecutionDoesNotExist"}},
+            "DescribeExecution")
+        sfn.list_executions.side_effect = [
+            {"executions": running + items},
+            {"executions": []}]
+        sfn.describe_execution.side_effect = [finished, missing_exc]
+
+        # Run function
+        index.sync()
+
+        # Check result
+        assert index.count() == 6
+        assert index.count(status="RUNNING") == 0
+        assert [c[1] for c in sfn.describe_execution.call_args_list] == [
+            {"executionArn": "exec5:arn"},
+            {"executionArn": "exec6:arn"}]
+
+    def test_sync_atomic(self, index, state_machine, now):
+        """Interrupted synchronisation isn't applied."""
+        items = [_item(j, now) for j in range(5)][::-1]
+        state_machine.session.sfn.list_executions.side_effect = [
+            {"executions": items[:3], "nextToken": "42"},
+            KeyboardInterrupt()]
+        with pytest.raises(KeyboardInterrupt):
+            index.sync()
+        assert index.count() == 0
+
+    class TestQueries:
+        """Index queries."""
+        @pytest.fixture
+        def index(self, index, state_machine, now):
+            """Populated index."""
+            items = [
+                _item(j, now, status="FAILED" if j % 3 else "SUCCEEDED")
+                for j in range(12)]
+            items.append(_item(12, now, status="RUNNING"))
+            state_machine.session.sfn.list_executions.side_effect = [
+                {"executions": items[::-1]},
+                {"executions": items[-1:]}]
+            index.sync()
+            return index
+
+        def test_count(self, index, now):
+            """Execution counting."""
+            assert index.count() == 13
+            assert index.count(status="FAILED") == 8
+            since = now - datetime.timedelta(minutes=95)
+            assert index.count(status="FAILED", since=since) == 5
+            until = now - datetime.timedelta(minutes=95)
+            assert index.count(until=until) == 5
+
+        def test_durations(self, index):
+            """Execution durations."""
+            res = index.durations(status="SUCCEEDED")
+            assert res == [0.0, 3.0, 6.0, 9.0]
+            assert len(index.durations()) == 12
+
+        @pytest.mark.parametrize(
+            ("status", "exp"),
+            [
+                ("SUCCEEDED", 4.5),
+                ("FAILED", 6.0),
+                (None, 5.5),
+                ("RUNNING", None),
+                ("ABORTED", None)])
+        def test_median_duration(self, index, status, exp):
+            """Median execution duration."""
+            assert index.median_duration(status=status) == exp
+
+        def test_median_duration_odd(self, index, now):
+            """Median duration of odd number of executions."""
+            since = now - datetime.timedelta(minutes=97)
+            assert index.median_duration(since=since) == 7.0
+
+        def test_query(self, index, now):
+            """Execution querying."""
+            res = index.query(status="SUCCEEDED", min_duration=3, limit=2)
+            assert [r["arn"] for r in res] == ["exec9:arn", "exec6:arn"]
+            assert res[0]["name"] == "exec9"
+            assert res[0]["status"] == "SUCCEEDED"
+            exp_start = now - datetime.timedelta(minutes=91)
+            assert abs(res[0]["start_date"] - exp_start).total_seconds() < 1e-3
+            assert res[0]["duration"] == 9.0
+            res = index.query(status="RUNNING")
+            assert res[0]["stop_date"] is None
+            assert res[0]["duration"] is None
@@ -0,0 +1,160 @@
+"""Test ``sfini.execution.spans``."""
+
+from sfini.execution import spans as tscr
+import pytest
+from sfini.execution import history
+import datetime
+
+_t0 = datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)
+
+
+def _event(event_id, event_type, seconds, previous_event_id, **details):
+    """Build an history event."""
+    event = {
+        "id": event_id,
+        "type": event_type,
+        "timestamp": _t0 + datetime.timedelta(seconds=seconds)}
+    if previous_event_id is not None:
+        event["previousEventId"] = previous_event_id
+    details_key = history._type_keys.get(event_type)
+    if details_key is not None:
+        event[details_key] = details
+    return event
+
+
+@pytest.fixture
+def events():
+    """Example execution history.
+
+    Task 'a', then parallel 'p' with branches ['b1', 'b2'] and ['c'],
+    then pass 'd'.
+    """
+
+    history_events = [
+        _event(1, "ExecutionStarted", 0, None),
+        _event(2, "TaskStateEntered", 1, 1, name="a"),
+        _event(3, "ActivityScheduled", 1, 2, resource="act:arn"),
+        _event(4, "ActivityStarted", 3, 3, workerName="w"),
+        _event(5, "ActivitySucceeded", 7, 4),
+        _event(6, "TaskStateExited", 7, 5, name="a"),
+        _event(7, "ParallelStateEntered", 8, 6, name="p"),
+        _event(8, "ParallelStateStarted", 8, 7),
+        _event(9, "PassStateEntered", 9, 8, name="b1"),
+        _event(10, "PassStateEntered", 9, 8, name="c"),
+        _event(11, "PassStateExited", 10, 9, name="b1"),
+        _event(12, "WaitStateEntered", 10, 11, name="b2"),
+        _event(13, "PassStateExited", 12, 10, name="c"),
+        _event(14, "WaitStateExited", 20, 12, name="b2"),
+        _event(15, "ParallelStateSucceeded", 20, 14),
+        _event(16, "ParallelStateExited", 21, 15, name="p"),
+        _event(17, "PassStateEntered", 21, 16, name="d"),
+        _event(18, "PassStateExited", 22, 17, name="d"),
+        _event(19, "ExecutionSucceeded", 22, 18)]
+    return history.parse_history(history_events)
+
+
+class TestHistoryIndex:
+    """Test ``sfini.execution.spans.HistoryIndex``."""
+    @pytest.fixture
+    def index(self, events):
+        """An example HistoryIndex instance."""
+        return tscr.HistoryIndex(events)
+
+    def test_cause(self, index, events):
+        """Causal event lookup."""
+        assert index.cause(events[4]) is events[3]
+        assert index.cause(events[0]) is None
+
+    def test_effects(self, index, events):
+        """Effect events lookup."""
+        assert index.effects(events[7]) == [events[8], events[9]]
+        assert index.effects(events[-1]) == []
+
+    def test_state_spans(self, index):
+        """State span pairing and linking."""
+        spans = {s.state_name: s for s in index.state_spans}
+        assert [s.state_name for s in index.state_spans] == [
+            "a", "p", "b1", "c", "b2", "d"]
+        assert spans["a"].duration == 6.0
+        assert spans["p"].duration == 13.0
+        assert spans["a"].previous is None
+        assert spans["p"].previous is spans["a"]
+        assert spans["b1"].previous is None
+        assert spans["b1"].parent is spans["p"]
+        assert spans["b2"].previous is spans["b1"]
+        assert spans["b2"].parent is spans["p"]
+        assert spans["c"].parent is spans["p"]
+        assert spans["p"].children == [spans["b1"], spans["c"], spans["b2"]]
+        assert spans["d"].previous is spans["p"]
+        assert spans["d"].parent is None
+
+    def test_task_spans(self, index):
+        """Task span pairing."""
+        task, = index.task_spans
+        assert task.state_name == "a"
+        assert task.state_span is index.state_spans[0]
+        assert index.state_spans[0].tasks == [task]
+        assert task.resource == "act:arn"
+        assert task.queue_time == 2.0
+        assert task.execution_time == 4.0
+
+    def test_state_durations(self, index):
+        """Per-state wall time."""
+        exp = {"a": 6.0, "p": 13.0, "b1": 1.0, "b2": 10.0, "c": 3.0, "d": 1.0}
+        assert index.state_durations() == exp
+
+    def test_task_times(self, index):
+        """Per-state task queue and execution times."""
+        assert index.task_queue_times() == {"a": 2.0}
+        assert index.task_execution_times() == {"a": 4.0}
+
+    def test_critical_path(self, index):
+        """Critical path through parallel branches."""
+        res = index.critical_path()
+        assert [s.state_name for s in res] == ["a", "p", "b1", "b2", "d"]
+
+    def test_unfinished(self, events):
+        """Execution history of running execution."""
+        index = tscr.HistoryIndex(events[:4])
+        span, = index.state_spans
+        assert span.duration is None
+        task, = index.task_spans
+        assert task.queue_time == 2.0
+        assert task.execution_time is None
+        assert [s.state_name for s in index.critical_path()] == ["a"]
+
+    def test_retries(self):
+        """Task attempts are attached to their state."""
+        history_events = [
+            _event(1, "ExecutionStarted", 0, None),
+            _event(2, "TaskStateEntered", 1, 1, name="a"),
+            _event(3, "ActivityScheduled", 1, 2, resource="act:arn"),
+            _event(4, "ActivityStarted", 2, 3, workerName="w"),
+            _event(5, "ActivityFailed", 3, 4, error="SpamError"),
+            _event(6, "ActivityScheduled", 5, 5, resource="act:arn"),
+            _event(7, "ActivityStarted", 6, 6, workerName="w"),
+            _event(8, "ActivitySucceeded", 8, 7),
+            _event(9, "TaskStateExited", 8, 8, name="a")]
+        index = tscr.HistoryIndex(history.parse_history(history_events))
+        span, = index.state_spans
+        assert span.tasks == index.task_spans
+        assert [t.execution_time for t in span.tasks] == [1.0, 2.0]
+        assert index.task_queue_times() == {"a": 2.0}
+
+    def test_loop(self):
+        """State executed multiple times."""
+        history_events = [_event(1, "ExecutionStarted", 0, None)]
+        for j in range(3):
+            k = 2 + 2 * j
+            history_events += [
+                _event(k, "PassStateEntered", k, k - 1, name="a"),
+                _event(k + 1, "PassStateExited", k + 1.5, k, name="a")]
+        index = tscr.HistoryIndex(history.parse_history(history_events))
+        assert index.state_durations() == {"a": 4.5}
+        assert len(index.critical_path()) == 3
+
+    def test_empty(self):
+        """Empty history."""
+        index = tscr.HistoryIndex([])
+        assert index.critical_path() == []
+        assert index.state_durations() == {}
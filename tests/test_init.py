@@ -0,0 +1,97 @@
+"""Test ``sfini`` package initialisation."""
+
+import sfini as tscr
+import pytest
+import os
+import sys
+import subprocess
+
+_import_time_budget = 0.1  # seconds
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run Python in a new process, with ``sfini`` importable."""
+    env = dict(os.environ)
+    path = os.path.dirname(os.path.dirname(tscr.__file__))
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (path, env.get("PYTHONPATH")) if p)
+    return subprocess.run(
+        (sys.executable,) + args,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True)
+
+
+@pytest.mark.parametrize("name", tscr.__all__ + ["StringEquals", "Task"])
+def test_public_api(name):
+    """Public names are available."""
+    assert name in dir(tscr)
+    assert getattr(tscr, name).__name__ == name
+
+
+def test_submodules():
+    """Submodules are available as attributes."""
+    from sfini import state_machine
+    assert tscr.state_machine is state_machine
+    assert tscr.state.choice.And is tscr.And
+
+
+def test_missing():
+    """Missing attribute raises."""
+    with pytest.raises(AttributeError):
+        _ = tscr.spam
+
+
+def test_version():
+    """Package version."""
+    assert tscr.__version__ is None or isinstance(tscr.__version__, str)
+
+
+def test_lazy():
+    """Importing ``sfini`` doesn't import submodules or ``boto3``."""
+    code = (
+        "import sys, sfini; "
+        "print(sorted(m for m in sys.modules if m.startswith(("
+        "'sfini.', 'boto3', 'pkg_resources'))))")
+    proc = _run_python("-c", code)
+    assert proc.stdout.strip() == "[]"
+
+
+def test_lazy_states():
+    """Defining states doesn't import execution modules."""
+    code = (
+        "import sys, sfini; sfini.Choice; "
+        "print(sorted(m for m in sys.modules if m.startswith(("
+        "'sfini.execution', 'sfini._interpreter', 'sqlite3'))))")
+    proc = _run_python("-c", code)
+    assert proc.stdout.strip() == "[]"
+
+
+def test_lazy_state_machine():
+    """Building state-machines doesn't import the interpreter."""
+    code = (
+        "import sys, sfini; "
+        "sfini.construct_state_machine('sm', sfini.Pass('p'), session=1); "
+        "print('sfini._interpreter' in sys.modules)")
+    proc = _run_python("-c", code)
+    assert proc.stdout.strip() == "False"
+
+
+def test_lazy_emulator():
+    """Emulator sessions don't import ``boto3``."""
+    code = (
+        "import sys, sfini.emulator; sfini.emulator.EmulatorSession(); "
+        "print('boto3' in sys.modules)")
+    proc = _run_python("-c", code)
+    assert proc.stdout.strip() == "False"
+
+
+def test_import_time():
+    """Importing ``sfini`` is within budget."""
+    proc = _run_python("-X", "importtime", "-c", "import sfini")
+    lines = proc.stderr.splitlines()
+    lines = [line for line in lines if line.endswith("| sfini")]
+    cumulative = int(lines[-1].split("|")[1]) / 1e6
+    assert cumulative < _import_time_budget
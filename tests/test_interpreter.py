@@ -0,0 +1,496 @@
+"""Test ``sfini._interpreter``."""
+
+from sfini import _interpreter as tscr
+import pytest
+from unittest import mock
+import datetime
+import threading
+
+_act_arn = "arn:aws:states:us-east-1:123:activity:spam"
+
+
+class _Interpreter(tscr.Interpreter):
+    """Interpreter running tasks with local functions."""
+    def __init__(self, definition, tasks, time_scale=0.0):
+        super().__init__(definition, time_scale=time_scale)
+        self.tasks = tasks
+
+    def run_task(self, resource, task_input, timeout, heartbeat, event_id):
+        self.task_started(event_id, "worker")
+        return self.tasks[resource](task_input)
+
+
+def _types(interpreter):
+    """Get types of recorded events."""
+    return [e["type"] for e in interpreter.history]
+
+
+def test_parse_timestamp():
+    """Time-stamp parsing."""
+    tz = datetime.timezone.utc
+    exp = datetime.datetime(2019, 7, 1, 12, 30, tzinfo=tz)
+    assert tscr.parse_timestamp("2019-07-01T12:30:00Z") == exp
+    assert tscr.parse_timestamp("2019-07-01T22:30:00+10:00") == exp
+    exp = exp.replace(microsecond=5000)
+    assert tscr.parse_timestamp("2019-07-01T12:30:00.005+00:00") == exp
+    with pytest.raises(ValueError):
+        tscr.parse_timestamp("2019-07-01T12:30:00")
+
+
+@pytest.mark.parametrize(
+    ("rule", "exp"),
+    [
+        ({"Variable": "$.n", "NumericEquals": 3}, True),
+        ({"Variable": "$.n", "NumericGreaterThan": 3}, False),
+        ({"Variable": "$.n", "NumericLessThanEquals": 3}, True),
+        ({"Variable": "$.s", "StringEquals": "spam"}, True),
+        ({"Variable": "$.s", "StringLessThan": "eggs"}, False),
+        ({"Variable": "$.s", "NumericEquals": 3}, False),
+        ({"Variable": "$.b", "BooleanEquals": True}, True),
+        ({"Variable": "$.b", "NumericEquals": 1}, False),
+        ({"Variable": "$.missing", "StringEquals": "spam"}, False),
+        (
+            {
+                "Variable": "$.t",
+                "TimestampGreaterThan": "2019-07-01T00:00:00+00:00"},
+            True),
+        (
+            {"Variable": "$.s", "TimestampEquals": "2019-07-01T00:00:00Z"},
+            False),
+        (
+            {"And": [
+                {"Variable": "$.n", "NumericEquals": 3},
+                {"Variable": "$.b", "BooleanEquals": False}]},
+            False),
+        (
+            {"Or": [
+                {"Variable": "$.n", "NumericEquals": 2},
+                {"Variable": "$.b", "BooleanEquals": True}]},
+            True),
+        ({"Not": {"Variable": "$.n", "NumericEquals": 3}}, False)])
+def test_evaluate_rule(rule, exp):
+    """Choice-rule evaluation."""
+    data = {"n": 3, "s": "spam", "b": True, "t": "2019-07-02T00:00:00Z"}
+    assert tscr.evaluate_rule(rule, data) is exp
+
+
+def test_compile_choices():
+    """Choice-state rules compilation."""
+    state_defn = {
+        "Type": "Choice",
+        "Choices": [
+            {"Variable": "$.n", "NumericLessThan": 0, "Next": "neg"},
+            {"Variable": "$.n", "NumericEquals": 0, "Next": "zero"}],
+        "Default": "pos"}
+    choose = tscr.compile_choices(state_defn)
+    assert [choose({"n": n}) for n in (-1, 0, 1)] == ["neg", "zero", "pos"]
+    del state_defn["Default"]
+    assert tscr.compile_choices(state_defn)({"n": 1}) is None
+
+
+class TestDecisionTables:
+    """Test decision-table compilation of choice-rules."""
+    @pytest.mark.parametrize(
+        "comparison",
+        [
+            "NumericEquals",
+            "NumericLessThan",
+            "NumericLessThanEquals",
+            "NumericGreaterThan",
+            "NumericGreaterThanEquals"])
+    def test_numeric(self, comparison):
+        """Tables match rule-by-rule evaluation."""
+        values = [5, 2, 8, 2, 5.5, 0, 8]
+        rules = [
+            {"Variable": "$.n", comparison: v, "Next": str(j)}
+            for j, v in enumerate(values)]
+        rules.append({"Variable": "$.s", "StringEquals": "x", "Next": "s"})
+        state_defn = {"Choices": rules, "Default": "default"}
+        choose = tscr.compile_choices(state_defn)
+        inputs = [{"n": n / 2} for n in range(-2, 20)] + [
+            {"n": True}, {"n": "5"}, {"s": "x"}, {}]
+        for data in inputs:
+            exp = next(
+                (r["Next"] for r in rules if tscr.evaluate_rule(r, data)),
+                "default")
+            assert choose(data) == exp, data
+
+    @pytest.mark.parametrize(
+        "comparison",
+        ["StringEquals", "StringLessThan", "StringGreaterThanEquals"])
+    def test_string(self, comparison):
+        """String tables match rule-by-rule evaluation."""
+        values = ["m", "c", "x", "c"]
+        rules = [
+            {"Variable": "$.s", comparison: v, "Next": str(j)}
+            for j, v in enumerate(values)]
+        choose = tscr.compile_choices({"Choices": rules})
+        for data in [{"s": c} for c in "abcdmwxyz"] + [{"s": 1}]:
+            exp = next(
+                (r["Next"] for r in rules if tscr.evaluate_rule(r, data)),
+                None)
+            assert choose(data) == exp, data
+
+    def test_many_rules(self):
+        """Large equality tables are used."""
+        rules = [
+            {"Variable": "$.s", "StringEquals": "k%d" % j, "Next": str(j)}
+            for j in range(1000)]
+        choose = tscr.compile_choices({"Choices": rules, "Default": "-"})
+        assert choose({"s": "k742"}) == "742"
+        assert choose({"s": "k1000"}) == "-"
+
+    def test_find_shadowed_rules(self):
+        """Unreachable rules are found."""
+        rules = [
+            {"Variable": "$.s", "StringEquals": "a", "Next": "0"},
+            {"Variable": "$.s", "StringEquals": "a", "Next": "1"},
+            {"Variable": "$.n", "NumericLessThan": 5, "Next": "2"},
+            {"Variable": "$.n", "NumericLessThan": 9, "Next": "3"},
+            {"Variable": "$.n", "NumericLessThan": 7, "Next": "4"},
+            {"Variable": "$.n", "NumericGreaterThan": 5, "Next": "5"},
+            {"Variable": "$.n", "NumericGreaterThan": 6, "Next": "6"},
+            {"Variable": "$.n", "NumericEquals": 6, "Next": "7"}]
+        res = tscr.find_shadowed_rules({"Choices": rules})
+        assert res == [(1, 0), (4, 3), (6, 5)]
+
+
+class TestInterpreter:
+    """Test ``sfini._interpreter.Interpreter``."""
+    def test_pass(self):
+        """Pass states with data-flow paths."""
+        definition = {
+            "StartAt": "a",
+            "States": {
+                "a": {
+                    "Type": "Pass",
+                    "Result": {"x": 1},
+                    "ResultPath": "$.res",
+                    "Next": "b"},
+                "b": {
+                    "Type": "Pass",
+                    "InputPath": "$.res",
+                    "ResultPath": "$.copy",
+                    "OutputPath": "$.copy",
+                    "End": True}}}
+        interpreter = _Interpreter(definition, {})
+        res = interpreter.run({"spam": 42})
+        assert res == {"x": 1}
+        assert _types(interpreter) == [
+            "ExecutionStarted",
+            "PassStateEntered",
+            "PassStateExited",
+            "PassStateEntered",
+            "PassStateExited",
+            "ExecutionSucceeded"]
+        assert [e.get("previousEventId") for e in interpreter.history] == [
+            None, 1, 2, 3, 4, 5]
+        assert interpreter.history[2]["stateExitedEventDetails"] == {
+            "name": "a",
+            "output": '{"spam": 42, "res": {"x": 1}}'}
+        details = interpreter.history[-1]["executionSucceededEventDetails"]
+        assert details == {"output": '{"x": 1}'}
+
+    def test_task_retry_catch(self):
+        """Task failures are retried, then caught."""
+        task_fn = mock.Mock(side_effect=tscr.StatesError("SpamError", "bla"))
+        definition = {
+            "StartAt": "t",
+            "States": {
+                "t": {
+                    "Type": "Task",
+                    "Resource": _act_arn,
+                    "Retry": [{
+                        "ErrorEquals": ["States.TaskFailed"],
+                        "MaxAttempts": 2,
+                        "IntervalSeconds": 1}],
+                    "Catch": [{
+                        "ErrorEquals": ["SpamError"],
+                        "ResultPath": "$.error",
+                        "Next": "s"}],
+                    "End": True},
+                "s": {"Type": "Succeed"}}}
+        interpreter = _Interpreter(definition, {_act_arn: task_fn})
+        res = interpreter.run({"a": 1})
+        assert res == {"a": 1, "error": {"Error": "SpamError", "Cause": "bla"}}
+        assert task_fn.call_args_list == [mock.call({"a": 1})] * 3
+        assert _types(interpreter) == (
+            ["ExecutionStarted", "TaskStateEntered"] +
+            ["ActivityScheduled", "ActivityStarted", "ActivityFailed"] * 3 +
+            [
+                "TaskStateExited",
+                "SucceedStateEntered",
+                "SucceedStateExited",
+                "ExecutionSucceeded"])
+        scheduled = [
+            e for e in interpreter.history
+            if e["type"] == "ActivityScheduled"]
+        assert [e["previousEventId"] for e in scheduled] == [2, 5, 8]
+        assert interpreter.history[10]["previousEventId"] == 10
+
+    def test_task_runtime_error(self):
+        """Task runtime errors aren't retried or caught."""
+        task_fn = mock.Mock(
+            side_effect=tscr.StatesError("States.Runtime", "bla"))
+        definition = {
+            "StartAt": "t",
+            "States": {
+                "t": {
+                    "Type": "Task",
+                    "Resource": _act_arn,
+                    "Retry": [{
+                        "ErrorEquals": ["States.TaskFailed"],
+                        "MaxAttempts": 2}],
+                    "Catch": [{
+                        "ErrorEquals": ["States.ALL"],
+                        "Next": "s"}],
+                    "End": True},
+                "s": {"Type": "Succeed"}}}
+        interpreter = _Interpreter(definition, {_act_arn: task_fn})
+        with pytest.raises(tscr.StatesError) as e:
+            interpreter.run({"a": 1})
+        assert e.value.error == "States.Runtime"
+        task_fn.assert_called_once_with({"a": 1})
+        assert _types(interpreter)[-2:] == [
+            "ActivityFailed",
+            "ExecutionFailed"]
+
+    def test_task_success(self):
+        """Task output is inserted at result path."""
+        definition = {
+            "StartAt": "t",
+            "States": {
+                "t": {
+                    "Type": "Task",
+                    "Resource": _act_arn,
+                    "InputPath": "$.a",
+                    "ResultPath": "$.b",
+                    "TimeoutSeconds": 10,
+                    "End": True}}}
+        interpreter = _Interpreter(definition, {_act_arn: lambda x: x + 1})
+        assert interpreter.run({"a": 1}) == {"a": 1, "b": 2}
+        details = interpreter.history[2]["activityScheduledEventDetails"]
+        assert details == {
+            "resource": _act_arn,
+            "input": "1",
+            "timeoutInSeconds": 10}
+
+    def test_choice(self):
+        """Choice states branch on rules."""
+        definition = {
+            "StartAt": "c",
+            "States": {
+                "c": {
+                    "Type": "Choice",
+                    "Choices": [
+                        {
+                            "Variable": "$.n",
+                            "NumericGreaterThan": 3,
+                            "Next": "big"}],
+                    "Default": "small"},
+                "big": {"Type": "Pass", "Result": "big", "End": True},
+                "small": {"Type": "Pass", "Result": "small", "End": True}}}
+        assert _Interpreter(definition, {}).run({"n": 4}) == "big"
+        assert _Interpreter(definition, {}).run({"n": 2}) == "small"
+
+    def test_choice_no_match(self):
+        """Choice with no matching rule and no default fails."""
+        definition = {
+            "StartAt": "c",
+            "States": {
+                "c": {
+                    "Type": "Choice",
+                    "Choices": [
+                        {
+                            "Variable": "$.n",
+                            "NumericGreaterThan": 3,
+                            "Next": "c"}]}}}
+        interpreter = _Interpreter(definition, {})
+        with pytest.raises(tscr.StatesError) as e:
+            interpreter.run({"n": 2})
+        assert e.value.error == "States.NoChoiceMatched"
+        assert _types(interpreter)[-1] == "ExecutionFailed"
+
+    def test_fail(self):
+        """Fail state fails execution."""
+        definition = {
+            "StartAt": "f",
+            "States": {
+                "f": {"Type": "Fail", "Error": "SpamError", "Cause": "bla"}}}
+        interpreter = _Interpreter(definition, {})
+        with pytest.raises(tscr.StatesError) as e:
+            interpreter.run({})
+        assert (e.value.error, e.value.cause) == ("SpamError", "bla")
+        assert interpreter.history[-1] == {
+            "timestamp": mock.ANY,
+            "type": "ExecutionFailed",
+            "id": 3,
+            "previousEventId": 2,
+            "executionFailedEventDetails": {
+                "error": "SpamError",
+                "cause": "bla"}}
+
+    def test_wait(self):
+        """Wait states sleep, scaled."""
+        definition = {
+            "StartAt": "w",
+            "States": {
+                "w": {"Type": "Wait", "SecondsPath": "$.s", "End": True}}}
+        interpreter = _Interpreter(definition, {}, time_scale=0.5)
+        interpreter.sleep = mock.Mock()
+        assert interpreter.run({"s": 10}) == {"s": 10}
+        interpreter.sleep.assert_called_once_with(10)
+
+    def test_wait_timestamp(self):
+        """Wait states wait until a time."""
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        until = now + datetime.timedelta(seconds=100)
+        definition = {
+            "StartAt": "w",
+            "States": {
+                "w": {
+                    "Type": "Wait",
+                    "Timestamp": until.isoformat(),
+                    "End": True}}}
+        interpreter = _Interpreter(definition, {})
+        interpreter.sleep = mock.Mock()
+        interpreter.run({})
+        seconds, = interpreter.sleep.call_args[0]
+        assert 99 < seconds <= 100
+
+    @pytest.mark.parametrize(
+        ("state_defn", "data"),
+        [
+            ({"SecondsPath": "$.s"}, {}),
+            ({"SecondsPath": "$.s"}, {"s": "spam"}),
+            ({"TimestampPath": "$.t"}, {}),
+            ({"TimestampPath": "$.t"}, {"t": "spam"})])
+    def test_wait_invalid(self, state_defn, data):
+        """Wait states with unmatched or invalid paths fail the run."""
+        state_defn = dict(state_defn, Type="Wait", End=True)
+        definition = {"StartAt": "w", "States": {"w": state_defn}}
+        interpreter = _Interpreter(definition, {})
+        interpreter.sleep = mock.Mock()
+        with pytest.raises(tscr.StatesError) as e:
+            interpreter.run(data)
+        assert e.value.error == "States.Runtime"
+        assert _types(interpreter)[-1] == "ExecutionFailed"
+        interpreter.sleep.assert_not_called()
+
+    def test_parallel(self):
+        """Parallel state branches are run, outputs collected."""
+        definition = {
+            "StartAt": "p",
+            "States": {
+                "p": {
+                    "Type": "Parallel",
+                    "Branches": [
+                        {
+                            "StartAt": "a",
+                            "States": {
+                                "a": {
+                                    "Type": "Pass",
+                                    "InputPath": "$.x",
+                                    "End": True}}},
+                        {
+                            "StartAt": "b",
+                            "States": {
+                                "b": {
+                                    "Type": "Task",
+                                    "Resource": _act_arn,
+                                    "End": True}}}],
+                    "ResultPath": "$.res",
+                    "End": True}}}
+        tasks = {_act_arn: lambda x: x["x"] * 2}
+        interpreter = _Interpreter(definition, tasks)
+        assert interpreter.run({"x": 21}) == {"x": 21, "res": [21, 42]}
+        types = _types(interpreter)
+        assert types[:3] == [
+            "ExecutionStarted",
+            "ParallelStateEntered",
+            "ParallelStateStarted"]
+        assert types[-3:] == [
+            "ParallelStateSucceeded",
+            "ParallelStateExited",
+            "ExecutionSucceeded"]
+        entered = [
+            e for e in interpreter.history
+            if e["type"] in ("PassStateEntered", "TaskStateEntered")]
+        assert [e["previousEventId"] for e in entered] == [3, 3]
+
+    def test_parallel_failed(self):
+        """Parallel state branch failure fails the state."""
+        definition = {
+            "StartAt": "p",
+            "States": {
+                "p": {
+                    "Type": "Parallel",
+                    "Branches": [
+                        {
+                            "StartAt": "f",
+                            "States": {
+                                "f": {"Type": "Fail", "Error": "Spam"}}}],
+                    "End": True}}}
+        interpreter = _Interpreter(definition, {})
+        with pytest.raises(tscr.StatesError) as e:
+            interpreter.run({})
+        assert e.value.error == "Spam"
+        assert _types(interpreter)[-2:] == [
+            "ParallelStateFailed",
+            "ExecutionFailed"]
+
+    @pytest.mark.parametrize(
+        "branch_state_defn",
+        [
+            {"Type": "Wait", "TimestampPath": "$.when", "End": True},
+            {"Type": "Task", "Resource": _act_arn, "End": True}])
+    def test_parallel_branch_error(self, branch_state_defn):
+        """Parallel state branch errors fail the run as runtime errors."""
+        definition = {
+            "StartAt": "p",
+            "States": {
+                "p": {
+                    "Type": "Parallel",
+                    "Branches": [
+                        {"StartAt": "b", "States": {"b": branch_state_defn}}],
+                    "Catch": [{
+                        "ErrorEquals": ["States.ALL"],
+                        "ResultPath": "$.error",
+                        "Next": "s"}],
+                    "End": True},
+                "s": {"Type": "Succeed"}}}
+        tasks = {_act_arn: lambda x: x["missing"]}
+        interpreter = _Interpreter(definition, tasks)
+        with pytest.raises(tscr.StatesError) as e:
+            interpreter.run({})
+        assert e.value.error == "States.Runtime"
+        assert _types(interpreter)[-2:] == [
+            "ParallelStateFailed",
+            "ExecutionFailed"]
+
+    def test_abort(self):
+        """Aborted runs stop waiting."""
+        definition = {
+            "StartAt": "w",
+            "States": {"w": {"Type": "Wait", "Seconds": 100, "End": True}}}
+        interpreter = _Interpreter(definition, {}, time_scale=1.0)
+        timer = threading.Timer(0.01, interpreter.abort, ("Spam", "bla"))
+        timer.start()
+        with pytest.raises(tscr.ExecutionAborted):
+            interpreter.run({})
+        assert interpreter.aborted
+        assert interpreter.history[-1]["type"] == "ExecutionAborted"
+        details = interpreter.history[-1]["executionAbortedEventDetails"]
+        assert details == {"error": "Spam", "cause": "bla"}
+
+    def test_timeout(self):
+        """Runs are stopped after the execution time-out."""
+        definition = {
+            "StartAt": "w",
+            "TimeoutSeconds": 0.01,
+            "States": {"w": {"Type": "Wait", "Seconds": 100, "End": True}}}
+        interpreter = _Interpreter(definition, {}, time_scale=1.0)
+        with pytest.raises(tscr.StatesError) as e:
+            interpreter.run({})
+        assert e.value.error == "States.Timeout"
+        assert interpreter.history[-1]["type"] == "ExecutionTimedOut"
@@ -0,0 +1,102 @@
+"""Test ``sfini._jsonpath``."""
+
+from sfini import _jsonpath as tscr
+import pytest
+
+
+@pytest.mark.parametrize(
+    ("path", "exp"),
+    [
+        ("$", []),
+        ("$.spam", ["spam"]),
+        ("$.spam.eggs[2]", ["spam", "eggs", 2]),
+        ("$['spam bla'][0]", ["spam bla", 0]),
+        ('$["a.b"]', ["a.b"])])
+def test_parse(path, exp):
+    """Reference-path parsing."""
+    assert tscr.parse(path) == exp
+
+
+@pytest.mark.parametrize("path", ["spam", "$.", "$[spam]", "$.a..b"])
+def test_parse_invalid(path):
+    """Invalid reference paths raise."""
+    with pytest.raises(tscr.PathError):
+        tscr.parse(path)
+
+
+def test_validate():
+    """Path validation."""
+    tscr.validate("$.spam[0]")
+    tscr.validate("$..spam[?(@.eggs)]", reference=False)
+    with pytest.raises(tscr.PathError):
+        tscr.validate("$..spam")
+    with pytest.raises(tscr.PathError):
+        tscr.validate("spam", reference=False)
+
+
+def test_compile_cached():
+    """Compiled getters and setters are reused."""
+    assert tscr.getter("$.spam") is tscr.getter("$.spam")
+    assert tscr.setter("$.spam") is tscr.setter("$.spam")
+
+
+class TestGet:
+    """Test ``sfini._jsonpath.get``."""
+    @pytest.fixture
+    def data(self):
+        """Example data."""
+        return {"spam": {"eggs": [1, 2, {"a": 42}]}, "bla": None}
+
+    @pytest.mark.parametrize(
+        ("path", "exp"),
+        [
+            ("$.spam.eggs[2].a", 42),
+            ("$.spam.eggs[0]", 1),
+            ("$.bla", None)])
+    def test_get(self, data, path, exp):
+        """Values are found."""
+        assert tscr.get(data, path) == exp
+
+    def test_root(self, data):
+        """Root path gets all data."""
+        assert tscr.get(data, "$") is data
+
+    @pytest.mark.parametrize(
+        "path",
+        ["$.eggs", "$.spam.eggs[3]", "$.spam[0]", "$.spam.eggs.a"])
+    def test_missing(self, data, path):
+        """Missing values raise."""
+        with pytest.raises(tscr.PathError):
+            tscr.get(data, path)
+
+
+class TestPut:
+    """Test ``sfini._jsonpath.put``."""
+    def test_put(self):
+        """Value is put at path, creating objects."""
+        data = {"spam": [1, {}]}
+        res = tscr.put(data, "$.spam[1].eggs.bla", 42)
+        assert res == {"spam": [1, {"eggs": {"bla": 42}}]}
+        assert data == {"spam": [1, {}]}
+
+    def test_copy_on_write(self):
+        """Only containers on path are copied."""
+        data = {"spam": {"a": 1}, "eggs": [{"b": 2}, {"c": 3}]}
+        res = tscr.put(data, "$.eggs[1].d", 4)
+        assert res == {
+            "spam": {"a": 1},
+            "eggs": [{"b": 2}, {"c": 3, "d": 4}]}
+        assert data == {"spam": {"a": 1}, "eggs": [{"b": 2}, {"c": 3}]}
+        assert res["spam"] is data["spam"]
+        assert res["eggs"][0] is data["eggs"][0]
+        assert res["eggs"] is not data["eggs"]
+
+    def test_root(self):
+        """Root path replaces data."""
+        assert tscr.put({"spam": 1}, "$", [42]) == [42]
+
+    @pytest.mark.parametrize("path", ["$.spam.eggs", "$.spam[2]", "$[0]"])
+    def test_mismatch(self, path):
+        """Paths not matching data raise."""
+        with pytest.raises(tscr.PathError):
+            tscr.put({"spam": [1]}, path, 42)
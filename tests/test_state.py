@@ -329,6 +329,7 @@ class TestChoice:
             foo_rule = mock.Mock(spec=sfini.state.choice.ChoiceRule)
             foo_rule.next_state = mock.Mock(spec=_base.State)
             foo_rule.next_state.name = "fooNext"
+            foo_rule.next_state._get_next_states.return_value = []
             bar_rule = mock.Mock(spec=sfini.state.choice.ChoiceRule)
             bar_rule.next_state = mock.Mock(spec=_base.State)
             bar_rule.next_state.name = "barNext"
@@ -343,15 +344,15 @@ class TestChoice:
             exp_states = {
                 "bla": states["bla"],
                 "barNext": foo_rule.next_state,
-                "spam": state}
+                "spam": state,
+                "fooNext": foo_rule.next_state}
 
             # Run function
             state.add_to(states)
 
             # Check result
             assert states == exp_states
-            foo_rule.next_state.add_to.assert_called_once_with(states)
-            bar_rule.next_state.add_to.assert_not_called()
+            bar_rule.next_state._get_next_states.assert_not_called()
 
         def test_has_default(self, state):
             """Has default state."""
@@ -359,12 +360,14 @@ class TestChoice:
             foo_rule = mock.Mock(spec=sfini.state.choice.ChoiceRule)
             foo_rule.next_state = mock.Mock(spec=_base.State)
             foo_rule.next_state.name = "fooNext"
+            foo_rule.next_state._get_next_states.return_value = []
             bar_rule = mock.Mock(spec=sfini.state.choice.ChoiceRule)
             bar_rule.next_state = mock.Mock(spec=_base.State)
             bar_rule.next_state.name = "barNext"
             state.choices = [foo_rule, bar_rule]
             state.default = mock.Mock(spec=_base.State)
             state.default.name = "default"
+            state.default._get_next_states.return_value = []
 
             # Build input
             states = {
@@ -375,16 +378,17 @@ class TestChoice:
             exp_states = {
                 "bla": states["bla"],
                 "barNext": foo_rule.next_state,
-                "spam": state}
+                "spam": state,
+                "fooNext": foo_rule.next_state,
+                "default": state.default}
 
             # Run function
             state.add_to(states)
 
             # Check result
             assert states == exp_states
-            state.default.add_to.assert_called_once_with(states)
-            foo_rule.next_state.add_to.assert_called_once_with(states)
-            bar_rule.next_state.add_to.assert_not_called()
+            assert list(states)[2:] == ["spam", "fooNext", "default"]
+            bar_rule.next_state._get_next_states.assert_not_called()
 
     class TestAdd:
         """Choice-rule adding."""
@@ -482,6 +486,41 @@ class TestChoice:
             assert "path" in str(e.value) or "transition" in str(e.value)
             assert str(state) in str(e.value)
 
+    @pytest.mark.parametrize(
+        ("data", "exp_name"),
+        [
+            ({"n": 1}, "a"),
+            ({"n": 2}, "b"),
+            ({"n": 3}, "b"),
+            ({"n": 4}, "bla"),
+            ({}, "bla")])
+    def test_compile(self, state, data, exp_name):
+        """Choice-rules compilation."""
+        states = {n: tscr.Succeed(n) for n in ("a", "b", "bla")}
+        state.choices = [
+            sfini.state.choice.NumericEquals("$.n", 1, states["a"]),
+            sfini.state.choice.NumericEquals("$.n", 2, states["b"]),
+            sfini.state.choice.NumericEquals("$.n", 3, states["b"]),
+            sfini.state.choice.NumericEquals("$.n", 1, states["bla"])]
+        state.default = states["bla"]
+        assert state.compile()(data) is states[exp_name]
+
+    def test_compile_no_default(self, state):
+        """Choice-rules compilation without default."""
+        state.choices = [
+            sfini.state.choice.StringEquals("$.s", "a", tscr.Succeed("a"))]
+        assert state.compile()({"s": "b"}) is None
+
+    def test_find_shadowed_rules(self, state):
+        """Unreachable choice-rules are found."""
+        next_state = tscr.Succeed("a")
+        state.choices = [
+            sfini.state.choice.NumericEquals("$.n", 1, next_state),
+            sfini.state.choice.NumericEquals("$.n", 2, next_state),
+            sfini.state.choice.NumericEquals("$.n", 1, next_state)]
+        res = state.find_shadowed_rules()
+        assert res == [(state.choices[2], state.choices[0])]
+
 
 class TestTask:
     """Test ``sfini.state._state.Task``."""
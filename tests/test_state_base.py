@@ -23,6 +23,14 @@ class TestState:
         assert state.input_path == "$.spam.input"
         assert state.output_path == "$.spam.output"
 
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"input_path": "spam"}, {"output_path": ".spam"}])
+    def test_init_invalid_path(self, kwargs):
+        """Invalid paths are rejected at definition."""
+        with pytest.raises(ValueError):
+            tscr.State("spam", **kwargs)
+
     def test_str(self, state):
         """State stringification."""
         res = str(state)
@@ -147,11 +155,15 @@ class TestHasNext:
             """Has next state."""
             state.next = mock.Mock(spec=tscr.State)
             state.next.name = "spamNext"
+            state.next._get_next_states.return_value = []
             states = {"bla": mock.Mock(spec=tscr.State)}
-            exp_states = {"bla": states["bla"], "spam": state}
+            exp_states = {
+                "bla": states["bla"],
+                "spam": state,
+                "spamNext": state.next}
             state.add_to(states)
             assert states == exp_states
-            state.next.add_to.assert_called_once_with(states)
+            state.next._get_next_states.assert_called_once_with()
 
         def test_not_terminal_already_registered(self, state):
             """Has next state."""
@@ -164,7 +176,7 @@ class TestHasNext:
                 "spam": state}
             state.add_to(states)
             assert states == exp_states
-            state.next.add_to.assert_not_called()
+            state.next._get_next_states.assert_not_called()
 
     @pytest.mark.parametrize(
         "prev_next_state",
@@ -229,6 +241,11 @@ class TestHasResultPath:
         assert state.output_path == "$.spam.output"
         assert state.result_path == "$.result"
 
+    def test_init_invalid_path(self):
+        """Result path must be a reference path."""
+        with pytest.raises(ValueError):
+            tscr.HasResultPath("spam", result_path="$..result")
+
     @pytest.mark.parametrize(
         ("result_path", "exp"),
         [(tscr._default, {}), ("$.result", {"ResultPath": "$.result"})])
@@ -462,6 +479,7 @@ class TestCanCatch:
         # Setup environment
         foo_state = mock.Mock(spec=tscr.State)
         foo_state.name = "foo"
+        foo_state._get_next_states.return_value = []
         bar_state = mock.Mock(spec=tscr.State)
         bar_state.name = "bar"
         state.catchers = [
@@ -472,15 +490,19 @@ class TestCanCatch:
         states = {"bla": mock.Mock(spec=tscr.State), "bar": bar_state}
 
         # Build expectation
-        exp_states = {"bla": states["bla"], "bar": bar_state, "spam": state}
+        exp_states = {
+            "bla": states["bla"],
+            "bar": bar_state,
+            "spam": state,
+            "foo": foo_state}
 
         # Run function
         state.add_to(states)
 
         # Check result
         assert states == exp_states
-        foo_state.add_to.assert_called_once_with(states)
-        bar_state.add_to.assert_not_called()
+        assert list(states) == ["bla", "bar", "spam", "foo"]
+        bar_state._get_next_states.assert_not_called()
 
     def test_catch(self, state):
         """Catch handler adding."""
@@ -124,7 +124,7 @@ class TestTimestampRule:
     def rule(self, state_mock, timestamp):
         """An example _TimestampRule instance."""
         return tscr._TimestampRule(
-            "%.varPath",
+            "$.varPath",
             timestamp,
             next_state=state_mock)
 
@@ -336,3 +336,47 @@ def test_expected_value_type(klass, exp):
 def test_final(klass):
     """Concrete choice-rules are finalised."""
     assert klass._final is True
+
+
+@pytest.mark.parametrize(
+    ("rule", "data", "exp"),
+    [
+        (tscr.NumericEquals("$.a", 42), {"a": 42}, True),
+        (tscr.NumericEquals("$.a", 42), {"a": "42"}, False),
+        (tscr.NumericLessThan("$.a[1]", 3.5), {"a": [9, 3]}, True),
+        (tscr.StringGreaterThanEquals("$.s", "b"), {"s": "a"}, False),
+        (tscr.BooleanEquals("$.b", False), {"b": 0}, False),
+        (tscr.BooleanEquals("$.b", False), {}, False),
+        (
+            tscr.TimestampGreaterThan(
+                "$.t",
+                datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)),
+            {"t": "2019-07-01T00:00:01Z"},
+            True),
+        (
+            tscr.TimestampLessThanEquals(
+                "$.t",
+                datetime.datetime(2019, 7, 1, tzinfo=datetime.timezone.utc)),
+            {"t": "2019-07-01"},
+            False),
+        (
+            tscr.And([
+                tscr.NumericGreaterThanEquals("$.a", 1),
+                tscr.Not(tscr.StringEquals("$.s", "spam"))]),
+            {"a": 1, "s": "eggs"},
+            True),
+        (
+            tscr.Or([
+                tscr.NumericGreaterThanEquals("$.a", 1),
+                tscr.StringEquals("$.s", "spam")]),
+            {"a": 0, "s": "eggs"},
+            False)])
+def test_compile(rule, data, exp):
+    """Choice-rules compile to predicates."""
+    assert rule.compile()(data) is exp
+
+
+def test_compile_invalid():
+    """Invalid choice-rules aren't compiled."""
+    with pytest.raises(TypeError):
+        tscr.StringEquals("$.a", 42).compile()
@@ -6,12 +6,18 @@ from unittest import mock
 import sfini
 import datetime
 import json
+from botocore import exceptions as bc_exc
 
 
 @pytest.fixture
 def session_mock():
     """An AWSSession mock."""
-    return mock.Mock(spec=sfini.AWSSession)
+    session = mock.Mock(spec=sfini.AWSSession)
+    session.state_machine_registry = sfini._util.Registry(
+        session.sfn.list_state_machines,
+        "stateMachines",
+        "stateMachineArn")
+    return session
 
 
 class TestStateMachine:
@@ -154,8 +160,48 @@ class TestStateMachine:
         assert res_definition == sm_definition
         state_machine.to_dict.assert_called_once_with()
 
+    def test_hash_definition(self, state_machine):
+        """Definition fingerprint is canonical."""
+        res_a = state_machine._hash_definition({"a": 1, "b": [2, {"c": 3}]})
+        res_b = state_machine._hash_definition({"b": [2, {"c": 3}], "a": 1})
+        res_c = state_machine._hash_definition({"a": 1, "b": [{"c": 3}, 2]})
+        assert res_a == res_b
+        assert res_a != res_c
+
+    class TestDescribe:
+        """State-machine description."""
+        def test_registered(self, state_machine, session_mock):
+            """Registered state-machine is described."""
+            state_machine.arn = "spam:arn"
+            res = state_machine._describe()
+            assert res is session_mock.sfn.describe_state_machine.return_value
+            session_mock.sfn.describe_state_machine.assert_called_once_with(
+                stateMachineArn="spam:arn")
+
+        @pytest.mark.parametrize(
+            ("code", "exp"),
+            [("StateMachineDoesNotExist", None), ("AccessDenied", "raise")])
+        def test_error(self, state_machine, session_mock, code, exp):
+            """Missing state-machine isn't described."""
+            state_machine.arn = "spam:arn"
+            exc = bc_exc.ClientError({"Error": {"Code": code}}, "describe")
+            session_mock.sfn.describe_state_machine.side_effect = exc
+            if exp == "raise":
+                with pytest.raises(bc_exc.ClientError):
+                    state_machine._describe()
+            else:
+                assert state_machine._describe() is exp
+
     class TestRegister:
         """State-machine registration/updating."""
+        @pytest.fixture
+        def state_machine(self, state_machine):
+            """An example StateMachine instance, with definition."""
+            state_machine.to_dict = mock.Mock(return_value={"a": [1, 2]})
+            state_machine._sfn_create = mock.Mock()
+            state_machine._sfn_update = mock.Mock()
+            return state_machine
+
         @pytest.mark.parametrize(
             ("allow_update", "is_registered"),
             [(True, False), (False, True), (False, False)])
@@ -171,27 +217,41 @@ class TestStateMachine:
                 is_registered):
             """State-machine creation."""
             state_machine.default_role_arn = "role/default:arn"
-            state_machine.is_registered = mock.Mock(return_value=is_registered)
-            state_machine._sfn_create = mock.Mock()
-            state_machine._sfn_update = mock.Mock()
-            exp_ir_calls = [mock.call()] * allow_update
+            state_machine._describe = mock.Mock(return_value=(
+                {"definition": "{}", "roleArn": "role"} if is_registered
+                else None))
+            exp_describe_calls = [mock.call()] * allow_update
             state_machine.register(
                 role_arn=role_arn,
                 allow_update=allow_update)
             state_machine._sfn_create.assert_called_once_with(exp_role_arn)
             state_machine._sfn_update.assert_not_called()
-            assert state_machine.is_registered.call_args_list == exp_ir_calls
+            assert state_machine._describe.call_args_list == (
+                exp_describe_calls)
 
-        def test_update(self, state_machine):
-            """State-machine updating."""
-            state_machine.is_registered = mock.Mock(return_value=True)
-            state_machine._sfn_create = mock.Mock()
-            state_machine._sfn_update = mock.Mock()
-            role_arn = "role/bla:arn"
+        @pytest.mark.parametrize(
+            ("definition", "deployed_role_arn", "role_arn", "exp_update"),
+            [
+                ('{"a": [1, 2]}', "role/bla:arn", "role/bla:arn", False),
+                ('{\n  "a": [1, 2]\n}', "role/bla:arn", None, False),
+                ('{"a": [2, 1]}', "role/bla:arn", "role/bla:arn", True),
+                ('{"a": [1, 2]}', "role/bla:arn", "role/eggs:arn", True)])
+        def test_update(
+                self,
+                state_machine,
+                definition,
+                deployed_role_arn,
+                role_arn,
+                exp_update):
+            """State-machine updating, only when changed."""
+            state_machine._describe = mock.Mock(return_value={
+                "definition": definition,
+                "roleArn": deployed_role_arn})
             state_machine.register(role_arn=role_arn, allow_update=True)
             state_machine._sfn_create.assert_not_called()
-            state_machine._sfn_update.assert_called_once_with(role_arn)
-            state_machine.is_registered.assert_called_once_with()
+            exp_calls = [mock.call(role_arn)] * exp_update
+            assert state_machine._sfn_update.call_args_list == exp_calls
+            state_machine._describe.assert_called_once_with()
 
     def test_deregister(self, state_machine, session_mock):
         """State-machine de-registration."""
@@ -227,6 +287,77 @@ class TestStateMachine:
         assert now.strftime("%Y-%m-%dT%H-%M") in res_name
         exec_mock.start.assert_called_once_with()
 
+    def test_hash_execution_name(self, state_machine):
+        """Deterministic execution name generation."""
+        res_a = state_machine._hash_execution_name({"a": 42, "b": [1, 2]})
+        res_b = state_machine._hash_execution_name({"b": [1, 2], "a": 42})
+        res_c = state_machine._hash_execution_name({"a": 43, "b": [1, 2]})
+        assert res_a == res_b
+        assert res_a != res_c
+        assert res_a.startswith("spam_")
+        state_machine.name = "spam" * 30
+        res = state_machine._hash_execution_name({"a": 42})
+        assert len(res) <= sfini._util.MAX_NAME_LENGTH
+
+    def test_start_executions(self, state_machine, session_mock):
+        """Concurrent execution starting."""
+        # Setup environment
+        state_machine.arn = "spam:arn"
+        exec_mocks = {}
+
+        def exec_class(name, arn, execution_input, session):
+            exec_mocks[name] = mock.Mock(spec=sfini.execution.Execution)
+            exec_mocks[name].execution_input = execution_input
+            return exec_mocks[name]
+
+        state_machine._execution_class = mock.Mock(side_effect=exec_class)
+        execution_inputs = [{"a": j} for j in range(20)]
+
+        # Build expectation
+        exp_names = ["exec%d" % j for j in range(20)]
+
+        # Run function
+        res = state_machine.start_executions(
+            execution_inputs,
+            concurrency=4,
+            name_fn=lambda e: "exec%d" % e["a"])
+
+        # Check result
+        assert [e.execution_input for e in res] == execution_inputs
+        assert sorted(exec_mocks) == sorted(exp_names)
+        for exec_mock in exec_mocks.values():
+            exec_mock.start.assert_called_once_with(allow_existing=True)
+        state_machine._execution_class.assert_has_calls(
+            [
+                mock.call(n, "spam:arn", e, session=session_mock)
+                for n, e in zip(exp_names, execution_inputs)],
+            any_order=True)
+
+    def test_start_executions_retries_rate_limited(self, state_machine):
+        """Retried execution starts are rate-limited too."""
+        state_machine.arn = "spam:arn"
+        exec_mock = mock.Mock(spec=sfini.execution.Execution)
+        exc = bc_exc.ClientError(
+            {"Error": {"Code": "ThrottlingException"}},
+            "StartExecution")
+        exec_mock.start.side_effect = [exc, exc, None]
+        state_machine._execution_class = mock.Mock(return_value=exec_mock)
+        limiter_mock = mock.Mock(spec=sfini._util.RateLimiter)
+        limiter_class_mock = mock.Mock(return_value=limiter_mock)
+        with mock.patch.object(sfini._util, "RateLimiter", limiter_class_mock):
+            with mock.patch.object(sfini._util.time, "sleep"):
+                state_machine.start_executions([{"a": 42}], max_rate=5.0)
+        assert exec_mock.start.call_count == 3
+        assert limiter_mock.acquire.call_count == 3
+
+    def test_start_executions_default_name(self, state_machine):
+        """Concurrent execution starting with input-hash names."""
+        state_machine.arn = "spam:arn"
+        state_machine._execution_class = mock.Mock()
+        state_machine.start_executions([{"a": 42}])
+        res_name = state_machine._execution_class.call_args[0][0]
+        assert res_name == state_machine._hash_execution_name({"a": 42})
+
     def test_build_executions(self, state_machine, session_mock):
         """Execution instantiation from list-items."""
         # Setup environment
@@ -346,6 +477,186 @@ class TestStateMachine:
         session_mock.sfn.list_executions.assert_called_once_with(**kw)
         state_machine._build_executions.assert_called_once_with(items)
 
+    def test_iter_executions(self, state_machine, session_mock):
+        """Execution iteration page-by-page."""
+        # Setup environment
+        state_machine.arn = "spam:arn"
+        pages = [
+            {"executions": [{"name": "exec1"}], "nextToken": "42"},
+            {"executions": [{"name": "exec2"}, {"name": "exec3"}]}]
+        session_mock.sfn.list_executions.side_effect = pages
+        exec_mocks = [mock.Mock(spec=sfini.execution.Execution) for _ in "ab"]
+        state_machine._build_executions = mock.Mock(
+            side_effect=[exec_mocks[:1], exec_mocks[1:]])
+
+        # Run function
+        res_iter = state_machine.iter_executions(status="RUNNING")
+        res_first = next(res_iter)
+
+        # Check result
+        assert res_first is exec_mocks[0]
+        session_mock.sfn.list_executions.assert_called_once_with(
+            stateMachineArn="spam:arn",
+            statusFilter="RUNNING")
+        assert list(res_iter) == exec_mocks[1:]
+        assert state_machine._build_executions.call_args_list == [
+            mock.call([{"name": "exec1"}]),
+            mock.call([{"name": "exec2"}, {"name": "exec3"}])]
+
+    def test_stop_executions(self, state_machine):
+        """Running execution stopping."""
+        # Setup environment
+        exec_mocks = [
+            mock.Mock(spec=sfini.execution.Execution)
+            for _ in range(25)]
+        state_machine.iter_executions = mock.Mock(
+            return_value=iter(exec_mocks))
+        callback = mock.Mock()
+
+        # Run function
+        res = state_machine.stop_executions(
+            error_code="spam",
+            details="bla",
+            concurrency=3,
+            callback=callback)
+
+        # Check result
+        assert res == exec_mocks
+        state_machine.iter_executions.assert_called_once_with(
+            status="RUNNING")
+        for exec_mock in exec_mocks:
+            exec_mock.stop.assert_called_once_with(
+                error_code="spam",
+                details="bla")
+        assert callback.call_args_list == [mock.call(e) for e in exec_mocks]
+
+
+class TestRunLocally:
+    """Test ``sfini.state_machine.StateMachine.run_locally``."""
+    @pytest.fixture
+    def session_mock(self, session_mock):
+        """An AWSSession mock with region and account."""
+        session_mock.region = "spamregion"
+        session_mock.account_id = "0123"
+        return session_mock
+
+    @pytest.fixture
+    def calls(self):
+        """Activity calls."""
+        return []
+
+    @pytest.fixture
+    def state_machine(self, session_mock, calls):
+        """An example state-machine with callable activities."""
+        def double(data):
+            calls.append(("double", data))
+            if len(calls) < 2:
+                raise ValueError(data)
+            return data * 2
+
+        def negate(data):
+            calls.append(("negate", data))
+            return -data
+
+        double_activity = sfini.activity.CallableActivity(
+            "double",
+            double,
+            session=session_mock)
+        negate_activity = sfini.activity.CallableActivity(
+            "negate",
+            negate,
+            session=session_mock)
+        lambda_ = sfini.Lambda("spam", session=session_mock)
+
+        init = sfini.Pass("init", result=3, result_path="$.n")
+        wait = sfini.Wait("wait", 10)
+        branch_double = sfini.Task(
+            "double",
+            double_activity,
+            input_path="$.n")
+        branch_negate = sfini.Task(
+            "negate",
+            negate_activity,
+            input_path="$.n")
+        parallel = sfini.Parallel("parallel", result_path="$.res")
+        parallel.add(tscr.construct_state_machine(
+            "a",
+            branch_double,
+            session=session_mock))
+        parallel.add(tscr.construct_state_machine(
+            "b",
+            branch_negate,
+            session=session_mock))
+        parallel.retry_for(["ValueError"], interval=5)
+        choice = sfini.Choice("choice")
+        fail = sfini.Fail("fail", error="Big")
+        remote = sfini.Task("remote", lambda_, result_path="$.remote")
+        done = sfini.Succeed("done", output_path="$.res")
+        choice.add(sfini.NumericGreaterThan("$.a", 10, next_state=fail))
+        choice.add(sfini.NumericLessThan("$.a", 0, next_state=remote))
+        choice.set_default(done)
+        remote.catch(["States.ALL"], done, result_path="$.error")
+        init.goes_to(wait)
+        wait.goes_to(parallel)
+        parallel.goes_to(choice)
+        return tscr.construct_state_machine(
+            "spam",
+            init,
+            session=session_mock)
+
+    def test_get_callable_activities(self, state_machine):
+        """Activities are found in parallel branches."""
+        res = state_machine._get_callable_activities()
+        arn_fmt = "arn:aws:states:spamregion:0123:activity:%s"
+        assert set(res) == {arn_fmt % "double", arn_fmt % "negate"}
+        assert res[arn_fmt % "double"].name == "double"
+
+    def test_run(self, state_machine, calls):
+        """State-machine is interpreted."""
+        res = state_machine.run_locally({"a": 1}, time_scale=0.0)
+        assert res == [6, -3]
+        assert sorted(calls) == [
+            ("double", 3),
+            ("double", 3),
+            ("negate", 3),
+            ("negate", 3)]
+
+    def test_fail(self, state_machine, calls):
+        """State-machine failure is raised."""
+        calls.append(None)
+        with pytest.raises(sfini._interpreter.StatesError) as e:
+            state_machine.run_locally({"a": 42}, time_scale=0.0)
+        assert e.value.error == "Big"
+
+    def test_remote(self, state_machine, calls):
+        """Non-local task resource fails, even if caught."""
+        with pytest.raises(sfini._interpreter.StatesError) as e:
+            state_machine.run_locally({"a": -1}, time_scale=0.0)
+        assert e.value.error == "States.Runtime"
+        assert "can't be run locally" in e.value.cause
+
+    def test_wait_path_missing(self, session_mock):
+        """Unmatched wait path fails, also in caught branches."""
+        wait = sfini.Wait("w", "$.when")
+        state_machine = tscr.construct_state_machine(
+            "spam",
+            wait,
+            session=session_mock)
+        with pytest.raises(sfini._interpreter.StatesError) as e:
+            state_machine.run_locally({}, time_scale=0.0)
+        assert e.value.error == "States.Runtime"
+
+        parallel = sfini.Parallel("parallel")
+        parallel.add(state_machine)
+        parallel.catch(["States.ALL"], sfini.Succeed("done"))
+        state_machine = tscr.construct_state_machine(
+            "eggs",
+            parallel,
+            session=session_mock)
+        with pytest.raises(sfini._interpreter.StatesError) as e:
+            state_machine.run_locally({}, time_scale=0.0)
+        assert e.value.error == "States.Runtime"
+
 
 def test_construct_state_machine(session_mock):
     """State-machine building."""
@@ -390,3 +701,173 @@ def test_construct_state_machine(session_mock):
         comment=comment,
         timeout=timeout,
         session=session_mock)
+
+
+class TestConstructLarge:
+    """State-machine building for generated definitions."""
+    _n_states = 10000
+
+    def test_linear(self, session_mock):
+        """Long chain of states doesn't reach the recursion limit."""
+        states = [sfini.Pass("p%d" % j) for j in range(self._n_states)]
+        for state, next_state in zip(states[:-1], states[1:]):
+            state.goes_to(next_state)
+        res = tscr.construct_state_machine(
+            "spam",
+            states[0],
+            session=session_mock)
+        assert list(res.states) == ["p%d" % j for j in range(self._n_states)]
+        assert len(res.to_dict()["States"]) == self._n_states
+
+    def test_branching(self, session_mock):
+        """States are added depth-first, in definition order."""
+        states = [sfini.Pass("p%d" % j) for j in range(self._n_states)]
+        choice = sfini.Choice("choice")
+        choice.add(sfini.NumericEquals("$.a", 1, states[0]))
+        for state, next_state in zip(states[:-1], states[1:]):
+            state.goes_to(next_state)
+        task = sfini.Task("task", mock.Mock(spec=sfini.activity.Activity))
+        task.goes_to(choice)
+        fail = sfini.Fail("fail")
+        task.catch(["States.ALL"], fail)
+        states[-1].goes_to(task)
+        choice.set_default(fail)
+
+        res = tscr.construct_state_machine(
+            "spam",
+            choice,
+            session=session_mock)
+        exp = ["choice"] + ["p%d" % j for j in range(self._n_states)]
+        exp += ["task", "fail"]
+        assert list(res.states) == exp
+
+
+def test_find_loops():
+    """Loop finding."""
+    graph = {"a": ["b"], "b": ["c", "d"], "c": ["a"], "d": ["d"], "e": ["a"]}
+    res = tscr._find_loops(graph)
+    assert sorted(sorted(loop) for loop in res) == [["a", "b", "c"], ["d"]]
+    graph = {j: [j + 1] for j in range(10000)}
+    graph[10000] = [0]
+    res = tscr._find_loops(graph)
+    assert len(res) == 1 and len(res[0]) == 10001
+
+
+class TestValidate:
+    """Static state-machine validation."""
+    @pytest.fixture
+    def activity(self):
+        """An activity mock."""
+        return mock.Mock(spec=sfini.activity.Activity)
+
+    def _construct(self, start_state, session_mock):
+        """Construct state-machine."""
+        return tscr.construct_state_machine(
+            "spam",
+            start_state,
+            session=session_mock)
+
+    def _problems(self, state_machine):
+        """Validation problems."""
+        with pytest.raises(ValueError) as e:
+            state_machine.validate()
+        return str(e.value).splitlines()[1:]
+
+    def test_valid(self, activity, session_mock):
+        """Valid state-machine, with a waiting loop."""
+        task = sfini.Task("task", activity)
+        choice = sfini.Choice("choice")
+        wait = sfini.Wait("wait", 10)
+        task.goes_to(choice)
+        choice.add(sfini.BooleanEquals("$.done", False, wait))
+        choice.set_default(sfini.Succeed("succeed"))
+        wait.goes_to(task)
+        task.catch(["States.ALL"], sfini.Fail("fail"))
+        parallel = sfini.Parallel("parallel")
+        parallel.add(self._construct(sfini.Pass("branchPass"), session_mock))
+        parallel.goes_to(task)
+        state_machine = self._construct(parallel, session_mock)
+        state_machine.validate()
+
+    def test_transitions(self, session_mock):
+        """Unreachable states and missing transition targets."""
+        first = sfini.Pass("first")
+        first.goes_to(sfini.Pass("missing"))
+        state_machine = tscr.StateMachine(
+            "spam",
+            {"first": first, "orphan": sfini.Succeed("orphan")},
+            "first",
+            session=session_mock)
+        assert self._problems(state_machine) == [
+            "  State 'first' goes to 'missing', which isn't in definition",
+            "  State 'orphan' is unreachable"]
+        state_machine.start_state = "bla"
+        assert self._problems(state_machine)[-1] == (
+            "  Start state 'bla' isn't in definition")
+
+    def test_choice(self, session_mock):
+        """Choice states without a path, or with shadowed rules."""
+        empty = sfini.Choice("empty")
+        state_machine = self._construct(empty, session_mock)
+        assert self._problems(state_machine) == [
+            "  Choice 'empty' has no next path"]
+
+        choice = sfini.Choice("choice")
+        succeed = sfini.Succeed("succeed")
+        choice.add(sfini.StringEquals("$.a", "x", succeed))
+        choice.add(sfini.StringEquals("$.a", "x", succeed))
+        choice.add(sfini.StringEquals("$.a", "y", succeed))
+        state_machine = self._construct(choice, session_mock)
+        problems = self._problems(state_machine)
+        assert len(problems) == 1
+        assert "shadowed" in problems[0]
+
+    def test_loop(self, session_mock):
+        """Loops without waiting burn state transitions."""
+        first = sfini.Pass("first")
+        choice = sfini.Choice("choice")
+        first.goes_to(choice)
+        choice.add(sfini.BooleanEquals("$.done", False, first))
+        choice.set_default(sfini.Succeed("succeed"))
+        spin = sfini.Pass("spin")
+        spin.goes_to(spin)
+        choice.add(sfini.BooleanEquals("$.spin", True, spin))
+        state_machine = self._construct(first, session_mock)
+        assert sorted(self._problems(state_machine)) == [
+            "  Loop without 'Wait' or 'Task' state: 'first', 'choice'",
+            "  Loop without 'Wait' or 'Task' state: 'spin'"]
+
+    def test_parallel(self, session_mock):
+        """Branches are validated, and can't reuse state names."""
+        parallel = sfini.Parallel("parallel")
+        parallel.add(self._construct(sfini.Pass("parallel"), session_mock))
+        parallel.add(self._construct(sfini.Pass("p"), session_mock))
+        parallel.add(self._construct(sfini.Choice("p"), session_mock))
+        state_machine = self._construct(parallel, session_mock)
+        assert self._problems(state_machine) == [
+            "  Parallel 'parallel' branch 2: Choice 'p' has no next path",
+            "  State name 'parallel' is used more than once",
+            "  State name 'p' is used more than once"]
+
+    def test_parallel_nested(self, session_mock):
+        """Repeated names in nested branches are reported once."""
+        inner = sfini.Parallel("inner")
+        inner.add(self._construct(sfini.Pass("p"), session_mock))
+        inner.add(self._construct(sfini.Pass("p"), session_mock))
+        outer = sfini.Parallel("outer")
+        outer.add(self._construct(inner, session_mock))
+        state_machine = self._construct(outer, session_mock)
+        assert self._problems(state_machine) == [
+            "  State name 'p' is used more than once"]
+
+    def test_large(self, session_mock):
+        """Generated state-machines are validated without recursion."""
+        states = [sfini.Pass("p%d" % j) for j in range(10000)]
+        for state, next_state in zip(states[:-1], states[1:]):
+            state.goes_to(next_state)
+        state_machine = self._construct(states[0], session_mock)
+        state_machine.validate()
+        states[-1].goes_to(states[0])
+        problems = self._problems(state_machine)
+        assert len(problems) == 1
+        assert problems[0].startswith("  Loop without 'Wait' or 'Task' state")
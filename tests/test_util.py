@@ -4,7 +4,10 @@ from sfini import _util as tscr
 import pytest
 from unittest import mock
 import logging as lg
+import time
+import threading
 import boto3
+from botocore import exceptions as bc_exc
 
 
 class TestDefaultParameter:
@@ -179,6 +182,117 @@ def test_collect_paginated():
     assert fn.call_args_list == exp_calls
 
 
+def test_iter_paginated():
+    """Paginated AWS API endpoint request iteration."""
+    # Build input
+    fn_rvs = [
+        {"items": [1, 5, 4], "nextToken": 42},
+        {"items": [9, 3, 0], "nextToken": 17},
+        {"items": [8]}]
+    fn = mock.Mock(side_effect=fn_rvs)
+    kwargs = {"a": 128, "b": [{"c": None, "d": "spam"}]}
+
+    # Build expectation
+    exp = [{"items": [1, 5, 4]}, {"items": [9, 3, 0]}, {"items": [8]}]
+    exp_calls = [
+        mock.call(**kwargs),
+        mock.call(nextToken=42, **kwargs),
+        mock.call(nextToken=17, **kwargs)]
+
+    # Run function
+    res_iter = tscr.iter_paginated(fn, **kwargs)
+    res_first = next(res_iter)
+
+    # Check result
+    assert fn.call_count == 1
+    assert [res_first] + list(res_iter) == exp
+    assert fn.call_args_list == exp_calls
+
+
+class TestCallWithRetries:
+    """Test ``sfini._util.call_with_retries``."""
+    @staticmethod
+    def _error(code):
+        return bc_exc.ClientError({"Error": {"Code": code}}, "spam")
+
+    def test_success(self):
+        """API call succeeds."""
+        fn = mock.Mock(return_value={"spam": 42})
+        with mock.patch.object(tscr.time, "sleep") as sleep_mock:
+            res = tscr.call_with_retries(fn, "a", b=42)
+        assert res == {"spam": 42}
+        fn.assert_called_once_with("a", b=42)
+        sleep_mock.assert_not_called()
+
+    def test_throttled(self):
+        """API call is retried when throttled."""
+        fn = mock.Mock(side_effect=[
+            self._error("ThrottlingException"),
+            self._error("TooManyRequestsException"),
+            {"spam": 42}])
+        with mock.patch.object(tscr.time, "sleep") as sleep_mock:
+            res = tscr.call_with_retries(fn, b=42)
+        assert res == {"spam": 42}
+        assert fn.call_args_list == [mock.call(b=42)] * 3
+        assert sleep_mock.call_count == 2
+
+    def test_max_attempts(self):
+        """API call throttling error is re-raised after maximum attempts."""
+        fn = mock.Mock(side_effect=self._error("ThrottlingException"))
+        with mock.patch.object(tscr.time, "sleep"):
+            with pytest.raises(bc_exc.ClientError):
+                tscr.call_with_retries(fn, max_attempts=3)
+        assert fn.call_count == 3
+
+    def test_other_error(self):
+        """Non-throttling error is raised immediately."""
+        fn = mock.Mock(side_effect=self._error("InvalidName"))
+        with mock.patch.object(tscr.time, "sleep") as sleep_mock:
+            with pytest.raises(bc_exc.ClientError):
+                tscr.call_with_retries(fn)
+        fn.assert_called_once_with()
+        sleep_mock.assert_not_called()
+
+
+class TestMapConcurrent:
+    """Test ``sfini._util.map_concurrent``."""
+    def test_ordered(self):
+        """Results are yielded in order of items."""
+        def fn(item):
+            time.sleep(0.001 * (item % 3))
+            return item * 2
+
+        res = list(tscr.map_concurrent(fn, iter(range(50)), max_workers=4))
+        assert res == [j * 2 for j in range(50)]
+
+    def test_error(self):
+        """Error in function is propagated."""
+        def fn(item):
+            if item == 7:
+                raise ValueError(item)
+            return item
+
+        with pytest.raises(ValueError):
+            list(tscr.map_concurrent(fn, range(20), max_workers=3))
+
+
+class TestRateLimiter:
+    """Test ``sfini._util.RateLimiter``."""
+    def test_burst(self):
+        """Acquisitions within burst don't wait."""
+        limiter = tscr.RateLimiter(1.0, burst=5)
+        with mock.patch.object(tscr.time, "sleep") as sleep_mock:
+            [limiter.acquire() for _ in range(5)]
+        sleep_mock.assert_not_called()
+
+    def test_rate(self):
+        """Acquisitions beyond burst are limited to rate."""
+        limiter = tscr.RateLimiter(200.0, burst=2)
+        t = time.monotonic()
+        [limiter.acquire() for _ in range(12)]
+        assert time.monotonic() - t >= 10 / 200.0 * 0.9
+
+
 class TestEasyRepr:
     """Test ``sfini._util.easy_repr``"""
     def test_no_params(self):
@@ -361,6 +475,61 @@ class TestEasyRepr:
         assert res == exp
 
 
+class TestRegistry:
+    """Test ``sfini._util.Registry``."""
+    @pytest.fixture
+    def list_fn(self):
+        """Paginated listing function mock."""
+        return mock.Mock(side_effect=[
+            {"items": [{"arn": "a"}, {"arn": "b"}], "nextToken": "1"},
+            {"items": [{"arn": "c"}]},
+            {"items": [{"arn": "d"}]}])
+
+    @pytest.fixture
+    def registry(self, list_fn):
+        """An example Registry instance."""
+        return tscr.Registry(list_fn, "items", "arn", ttl=60.0)
+
+    def test_snapshot(self, registry, list_fn):
+        """Resources are listed once."""
+        assert "a" in registry
+        assert "c" in registry
+        assert "d" not in registry
+        assert registry.get("b") == {"arn": "b"}
+        assert registry.get("d") is None
+        assert [item["arn"] for item in registry.items()] == ["a", "b", "c"]
+        assert list_fn.call_args_list == [
+            mock.call(), mock.call(nextToken="1")]
+
+    def test_add_remove(self, registry, list_fn):
+        """Registrations and removals are recorded."""
+        registry.add({"arn": "e"})
+        assert list_fn.call_count == 0
+        assert "e" not in registry
+        registry.add({"arn": "e"})
+        registry.remove("a")
+        registry.remove("f")
+        assert [item["arn"] for item in registry.items()] == ["b", "c", "e"]
+        assert list_fn.call_count == 2
+
+    def test_invalidate(self, registry, list_fn):
+        """Invalidated snapshot is rebuilt."""
+        assert "d" not in registry
+        registry.invalidate()
+        assert "d" in registry
+        assert list_fn.call_count == 3
+
+    def test_ttl(self, registry, list_fn):
+        """Stale snapshot is rebuilt."""
+        assert "d" not in registry
+        registry.ttl = 0.0
+        registry.invalidate()
+        list_fn.side_effect = [{"items": []}] * 2
+        assert "a" not in registry
+        assert "a" not in registry
+        assert list_fn.call_count == 4
+
+
 class TestAWSSession:
     """Test ``sfini._util.AWSSession``."""
     @pytest.fixture
@@ -402,18 +571,172 @@ class TestAWSSession:
         """AWS Step Functions client."""
         res = sfini_session.sfn
         assert res is session.client.return_value
-        session.client.assert_called_once_with("stepfunctions")
+        session.client.assert_called_once_with(
+            "stepfunctions",
+            config=mock.ANY)
+        config = session.client.call_args[1]["config"]
+        assert config.max_pool_connections == 10
+        assert config.retries == {
+            "mode": "adaptive",
+            "max_attempts": tscr.BOTOCORE_MAX_ATTEMPTS}
+
+    def test_reserve_connections(self, sfini_session, session):
+        """Clients are replaced to keep more connections."""
+        session.client.side_effect = lambda *_, **__: mock.Mock()
+        sfn = sfini_session.sfn
+        sfini_session.reserve_connections(5)
+        assert sfini_session.sfn is sfn
+        sfini_session.reserve_connections(42)
+        assert sfini_session.max_pool_connections == 42
+        assert sfini_session.sfn is not sfn
+        config = session.client.call_args[1]["config"]
+        assert config.max_pool_connections == 42
+        assert sfini_session.sfn_long_poll is not sfini_session.sfn
+        assert session.client.call_count == 3
+
+    def test_sfn_long_poll(self, sfini_session, session):
+        """AWS Step Functions client for long-polling."""
+        session.client.side_effect = lambda *_, **__: mock.Mock()
+        res = sfini_session.sfn_long_poll
+        assert res is not sfini_session.sfn
+        assert session.client.call_count == 2
+        config = session.client.call_args_list[0][1]["config"]
+        assert config.read_timeout == tscr.LONG_POLL_READ_TIMEOUT > 60
+        config = session.client.call_args_list[1][1]["config"]
+        assert config.read_timeout == 60
+
+    def test_sfn_threads(self, session):
+        """Client is created once, when shared between threads."""
+        def client(*_, **__):
+            time.sleep(0.01)
+            return mock.Mock()
+
+        session.client.side_effect = client
+        sfini_session = tscr.AWSSession(session, max_pool_connections=4)
+        results = []
+
+        def get_sfn():
+            results.append(sfini_session.sfn)
+
+        threads = [threading.Thread(target=get_sfn) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 4
+        assert all(r is results[0] for r in results)
+        session.client.assert_called_once_with(
+            "stepfunctions",
+            config=mock.ANY)
+        config = session.client.call_args[1]["config"]
+        assert config.max_pool_connections == 4
+
+    @pytest.mark.parametrize(
+        ("attr", "list_fn_name", "exp_items_key", "exp_arn_key"),
+        [
+            (
+                "activity_registry",
+                "list_activities",
+                "activities",
+                "activityArn"),
+            (
+                "state_machine_registry",
+                "list_state_machines",
+                "stateMachines",
+                "stateMachineArn")])
+    def test_registry(
+            self,
+            sfini_session,
+            attr,
+            list_fn_name,
+            exp_items_key,
+            exp_arn_key):
+        """Registered resources snapshots."""
+        sfini_session.sfn = mock.Mock()
+        sfini_session.registry_ttl = 42.0
+        res = getattr(sfini_session, attr)
+        assert res.list_fn is getattr(sfini_session.sfn, list_fn_name)
+        assert res.items_key == exp_items_key
+        assert res.arn_key == exp_arn_key
+        assert res.ttl == 42.0
 
     def test_region(self, sfini_session, session):
         """AWS session API region."""
         session.region_name = "spamregion"
         assert sfini_session.region == "spamregion"
 
+    def test_region_name(self, session):
+        """AWS region is provided."""
+        session.region_name = "spamregion"
+        sfini_session = tscr.AWSSession(session, region_name="eggsregion")
+        assert sfini_session.region == "eggsregion"
+
     def test_account_id(self, sfini_session, session):
         """AWS account ID."""
         client_mock = mock.Mock()
         session.client.return_value = client_mock
         client_mock.get_caller_identity.return_value = {"Account": "spamacc"}
         assert sfini_session.account_id == "spamacc"
-        session.client.assert_called_once_with("sts")
+        session.client.assert_called_once_with("sts", config=mock.ANY)
         client_mock.get_caller_identity.assert_called_once_with()
+
+    class TestAccountIdOffline:
+        """AWS account ID without STS."""
+        @pytest.fixture
+        def session(self, session):
+            """AWS ``boto3`` session mock, with credentials."""
+            credentials = mock.Mock(spec=["access_key"])
+            credentials.access_key = "AKIASPAM"
+            session.get_credentials.return_value = credentials
+            client_mock = session.client.return_value
+            client_mock.get_caller_identity.return_value = {"Account": "sts"}
+            return session
+
+        @pytest.fixture
+        def cache_path(self, tmp_path):
+            """Account ID cache path."""
+            return str(tmp_path / "sfini" / "account-ids.json")
+
+        def test_argument(self, session, monkeypatch):
+            """Account ID is provided."""
+            monkeypatch.setenv("AWS_ACCOUNT_ID", "env")
+            sfini_session = tscr.AWSSession(session, aws_account_id="arg")
+            assert sfini_session.account_id == "arg"
+            session.client.assert_not_called()
+
+        def test_environment(self, session, monkeypatch):
+            """Account ID is in environment."""
+            monkeypatch.setenv("AWS_ACCOUNT_ID", "env")
+            assert tscr.AWSSession(session).account_id == "env"
+            session.client.assert_not_called()
+
+        def test_credentials(self, session, monkeypatch):
+            """Account ID is provided by credentials."""
+            monkeypatch.delenv("AWS_ACCOUNT_ID", raising=False)
+            session.get_credentials.return_value.account_id = "creds"
+            assert tscr.AWSSession(session).account_id == "creds"
+            session.client.assert_not_called()
+
+        def test_cache(self, session, monkeypatch, cache_path):
+            """Account ID is cached on disk."""
+            monkeypatch.delenv("AWS_ACCOUNT_ID", raising=False)
+            res = tscr.AWSSession(session, account_id_cache=cache_path)
+            assert res.account_id == "sts"
+            res = tscr.AWSSession(session, account_id_cache=cache_path)
+            assert res.account_id == "sts"
+            session.client.assert_called_once_with("sts", config=mock.ANY)
+            with open(cache_path) as f:
+                assert "AKIASPAM" not in f.read()
+
+            session.get_credentials.return_value.access_key = "AKIAEGGS"
+            res = tscr.AWSSession(session, account_id_cache=cache_path)
+            assert res.account_id == "sts"
+            assert session.client.call_count == 2
+
+        def test_no_cache(self, session, monkeypatch, cache_path):
+            """Account ID isn't cached on disk."""
+            monkeypatch.delenv("AWS_ACCOUNT_ID", raising=False)
+            for _ in range(2):
+                res = tscr.AWSSession(session, account_id_cache=None)
+                assert res.account_id == "sts"
+            assert session.client.call_count == 2
@@ -290,7 +290,7 @@ class TestWorker:
             return {}
 
         activity_mock.arn = "spamActivity:arn"
-        gat_mock = session_mock.sfn.get_activity_task
+        gat_mock = session_mock.sfn_long_poll.get_activity_task
         gat_mock.side_effect = get_activity_task
         worker._execute_on = mock.Mock()
 